@@ -0,0 +1,135 @@
+"""Measure cold start cost: import time and first-invocation latency
+
+Run from the repository root::
+
+    python -m benchmarks.bench_coldstart             # compare against baseline
+    python -m benchmarks.bench_coldstart --save      # record a new baseline
+    python -m benchmarks.bench_coldstart --modules   # slowest imports
+
+Each run starts a fresh interpreter, which imports echokit, builds an
+app with a couple of handlers and handles a sample event twice: once
+cold, and once warm for comparison. The median of several runs is
+reported and compared against *benchmarks/coldstart.json*. Bytecode is
+compiled first, so the numbers don't include compiling echokit.
+"""
+import argparse
+import compileall
+import json
+import statistics
+import subprocess
+import sys
+from os import path
+
+ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+BASELINE = path.join(ROOT, 'benchmarks', 'coldstart.json')
+EVENT = path.join(ROOT, 'tests', 'requests', 'set_color_intent.txt')
+
+#: Run in each fresh interpreter, printing timings (in ms) as JSON
+SCRIPT = '''
+import json, sys
+from time import perf_counter
+started = perf_counter()
+from echokit import EchoKit
+imported = perf_counter()
+app = EchoKit('')
+
+@app.intent('MyColorIsIntent')
+@app.slot('color')
+def my_color_is(request, session, color):
+    return app.response(f'Your color is {color}')
+
+@app.launch
+def launch(request, session):
+    return app.response('Welcome')
+
+app.initialize()
+constructed = perf_counter()
+with open(sys.argv[1]) as f:
+    event = json.load(f)
+loaded = perf_counter()
+app.handler(event, None)
+first = perf_counter()
+app.handler(event, None)
+warm = perf_counter()
+print(json.dumps({
+    'import': (imported - started) * 1e3,
+    'construct': (constructed - imported) * 1e3,
+    'first_invocation': (first - loaded) * 1e3,
+    'warm_invocation': (warm - first) * 1e3,
+}))
+'''
+
+
+def run_once():
+    output = subprocess.run([sys.executable, '-c', SCRIPT, EVENT], cwd=ROOT,
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def measure(runs=15):
+    """Median timings (ms) over *runs* fresh interpreters"""
+    compileall.compile_dir(path.join(ROOT, 'echokit'), quiet=1)
+    results = [run_once() for _ in range(runs)]
+    return {key: round(statistics.median(r[key] for r in results), 3)
+            for key in results[0]}
+
+
+def slowest_modules(count=15):
+    """Cumulative import time (ms) of the slowest modules"""
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                             'import echokit'], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stderr
+    modules = []
+    for line in output.splitlines()[1:]:
+        _, _, cumulative, name = (part.strip() for part in
+                                  line.replace('|', ':', 2).split(':', 3))
+        modules.append((int(cumulative) / 1e3, name))
+    return sorted(modules, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=15)
+    parser.add_argument('--save', action='store_true',
+                        help='Save results as the new baseline')
+    parser.add_argument('--modules', action='store_true',
+                        help='Also list the slowest imports')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Allowed regression, as a fraction '
+                             '(default: 0.25)')
+    args = parser.parse_args()
+
+    baseline = {}
+    if path.exists(BASELINE):
+        with open(BASELINE) as f:
+            baseline = json.load(f)
+    results = measure(args.runs)
+    print(f"{'phase':<20} {'time (ms)':>10} {'baseline':>10}")
+    for name, value in results.items():
+        print(f"{name:<20} {value:>10} {baseline.get(name, '-'):>10}")
+    if args.modules:
+        print(f"\n{'module':<40} {'cumulative (ms)':>16}")
+        for ms, name in slowest_modules():
+            print(f"{name:<40} {ms:>16.2f}")
+
+    if args.save:
+        with open(BASELINE, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Saved baseline: {BASELINE}")
+        return
+    regressions = [
+        f"{name}: {value} > {baseline[name]} (+{args.threshold:.0%})"
+        for name, value in results.items()
+        if name in baseline and value > baseline[name] * (1 + args.threshold)
+        # Ignore noise in very small values
+        and value - baseline[name] > 0.5
+    ]
+    if regressions:
+        print("\nRegressions:")
+        print('\n'.join(regressions))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
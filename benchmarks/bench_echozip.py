@@ -0,0 +1,102 @@
+"""Time ``echozip`` bundle builds on a synthetic project tree
+
+Run from the repository root::
+
+    python -m benchmarks.bench_echozip --files 5000
+
+Generates a project of Python modules, text data and incompressible
+binary files in a temporary directory, then times:
+
+* *zipfile*: adding every file with :mod:`zipfile`, one at a time, as
+  echozip used to (without its temporary copy of the tree)
+* *cold*: a build with an empty cache
+* *warm*: the same build again, with every file in the cache
+* *one_changed*: a build after changing a single file
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+import zipfile
+from os import path
+from echokit.echozip import ZipCache, build, collect
+
+
+def make_tree(root, files, seed=0):
+    """Write a synthetic project of *files* files under *root*"""
+    rng = random.Random(seed)
+    words = ['skill', 'intent', 'slot', 'session', 'response', 'request',
+             'color', 'speech', 'card', 'reprompt', 'handler', 'attribute']
+    for i in range(files):
+        directory = path.join(root, f"package{i % 20}", f"module{i % 7}")
+        os.makedirs(directory, exist_ok=True)
+        kind = i % 10
+        if kind < 6:
+            lines = [f"def {rng.choice(words)}_{n}(request, session):\n"
+                     f"    return '{' '.join(rng.choices(words, k=8))}'\n"
+                     for n in range(rng.randint(20, 200))]
+            with open(path.join(directory, f"file{i}.py"), 'w') as f:
+                f.writelines(lines)
+        elif kind < 9:
+            with open(path.join(directory, f"data{i}.json"), 'w') as f:
+                f.write(' '.join(rng.choices(words, k=rng.randint(500, 5000))))
+        else:
+            with open(path.join(directory, f"image{i}.png"), 'wb') as f:
+                f.write(rng.randbytes(rng.randint(10000, 100000))
+                        if hasattr(rng, 'randbytes') else
+                        os.urandom(rng.randint(10000, 100000)))
+
+
+def zipfile_build(files, output):
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, source in files:
+            archive.write(source, name)
+
+
+def timed(function, *args, **kwargs):
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args()
+    root = tempfile.mkdtemp(prefix='echozip-bench-')
+    try:
+        project = path.join(root, 'project')
+        make_tree(project, args.files)
+        files = collect(project)
+        cache_dir = path.join(root, 'cache')
+        rows = []
+        elapsed, _ = timed(zipfile_build, files, path.join(root, 'a.zip'))
+        rows.append(('zipfile', elapsed, path.getsize(path.join(root,
+                                                               'a.zip'))))
+        for label in ('cold', 'warm', 'one_changed'):
+            if label == 'one_changed':
+                changed = [source for name, source in files
+                           if name.endswith('.py') and
+                           not name.startswith('echokit/')][0]
+                with open(changed, 'a') as f:
+                    f.write('# changed\n')
+            output = path.join(root, f'{label}.zip')
+            # A new cache each time, as a separate echozip run would have
+            elapsed, result = timed(build, files, output,
+                                    cache=ZipCache(cache_dir),
+                                    workers=args.workers)
+            rows.append((label, elapsed, result.size))
+        total = sum(path.getsize(source) for _, source in files)
+        print(f"{len(files)} files, {total / 1e6:.1f} MB uncompressed")
+        print(f"{'build':<12} {'seconds':>8} {'MB':>8}")
+        for label, elapsed, size in rows:
+            print(f"{label:<12} {elapsed:>8.3f} {size / 1e6:>8.2f}")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""Compare eager, lazy and typed-view parsing of incoming events
+
+Run from the repository root::
+
+    python -m benchmarks.bench_request
+
+Each measurement parses an event and reads the fields dispatch needs
+(*request.type*, *request.intent.name* and
+*session.application.applicationId*).
+"""
+import timeit
+from echokit.request import ASKRequest, LazyASKRequest, Envelope
+from benchmarks.events import large_event
+
+
+PARSERS = {
+    'eager': lambda event: ASKRequest(**event),
+    'lazy': lambda event: LazyASKRequest(**event),
+    'typed': Envelope,
+}
+
+
+def dispatch_fields(parse, event):
+    event_ = parse(event)
+    return (event_.request.type, event_.request.intent.name,
+            event_.session.application.applicationId)
+
+
+def main(number=2000):
+    sizes = {
+        'small': large_event(attributes=0, viewports=0),
+        'medium': large_event(attributes=20, viewports=2),
+        'large': large_event(attributes=200, viewports=16),
+    }
+    print(f"{'event':<8}" + ''.join(f"{name + ' (us)':>14}" for name in PARSERS))
+    for label, event in sizes.items():
+        row = f"{label:<8}"
+        for parse in PARSERS.values():
+            best = min(timeit.repeat(lambda: dispatch_fields(parse, event),
+                                     number=number, repeat=5))
+            row += f"{best / number * 1e6:>14.2f}"
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Load test :mod:`echokit.server` with the *samples/session* skill
+
+Run from the repository root::
+
+    python -m benchmarks.bench_server --connections 64 --requests 20000
+
+Starts a server for the sample skill in a subprocess, then sends
+*MyColorIsIntent* requests over keep-alive connections and reports
+requests/sec along with p50/p99 latency.
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from os import path
+from benchmarks.events import load
+
+ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+
+
+async def client(port, body, count, latencies):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    request = (f"POST / HTTP/1.1\r\nHost: localhost\r\n"
+               f"Content-Type: application/json\r\n"
+               f"Content-Length: {len(body)}\r\n\r\n").encode() + body
+    for _ in range(count):
+        start = time.perf_counter()
+        writer.write(request)
+        head = await reader.readuntil(b'\r\n\r\n')
+        length = int(head.lower().split(b'content-length: ')[1]
+                     .split(b'\r\n')[0])
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+
+
+async def wait_for_server(port, timeout=10):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def load_test(port, connections, requests):
+    body = json.dumps(load('set_color_intent.txt')).encode()
+    await wait_for_server(port)
+    # Warm up each connection's path through the server first
+    await asyncio.gather(*(client(port, body, 10, [])
+                           for _ in range(connections)))
+    latencies = []
+    per_client = requests // connections
+    start = time.perf_counter()
+    await asyncio.gather(*(client(port, body, per_client, latencies)
+                           for _ in range(connections)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(f"requests:    {len(latencies)}")
+    print(f"requests/s:  {len(latencies) / elapsed:.0f}")
+    print(f"p50 (ms):    {latencies[len(latencies) // 2] * 1000:.2f}")
+    print(f"p99 (ms):    {latencies[int(len(latencies) * 0.99)] * 1000:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--connections', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    command = [sys.executable, '-m', 'echokit.server', 'session:app',
+               '--port', str(args.port), '--processes', str(args.processes),
+               '--app-dir', path.join(ROOT, 'samples', 'session')]
+    if args.workers:
+        command += ['--workers', str(args.workers)]
+    server = subprocess.Popen(command, cwd=ROOT, stderr=subprocess.DEVNULL)
+    try:
+        asyncio.run(load_test(args.port, args.connections, args.requests))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == '__main__':
+    main()
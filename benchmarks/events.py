@@ -0,0 +1,75 @@
+"""Sample events shaped like real-world Alexa requests
+
+Events sent by modern devices carry far more than the request itself:
+*context.System* includes device, user and API details, and devices
+with screens add *Viewport*/*Viewports* blocks. These helpers build
+events along those lines for benchmarking.
+"""
+import copy
+import json
+from os import path
+
+_REQUESTS_DIR = path.join(path.dirname(path.dirname(path.abspath(__file__))),
+                          'tests', 'requests')
+
+
+def load(name='multi_slot_intent.txt'):
+    """Load one of the sample requests in *tests/requests/*"""
+    with open(path.join(_REQUESTS_DIR, name)) as f:
+        return json.load(f)
+
+
+def large_event(name='multi_slot_intent.txt', attributes=50, viewports=8):
+    """Return a sample request padded out to a realistic size
+
+    :param name: Sample request (under *tests/requests/*) to start from
+    :param attributes: Number of session attributes to include, each
+        a small nested object
+    :param viewports: Number of entries in *context.Viewports*
+    :return: dict
+    """
+    event = copy.deepcopy(load(name))
+    event['session']['attributes'] = {
+        f'attr_{i}': {'value': i, 'label': f'Attribute {i}',
+                      'tags': ['a', 'b', 'c'], 'meta': {'seen': i % 2 == 0}}
+        for i in range(attributes)
+    }
+    system = event['context']['System']
+    system['apiEndpoint'] = 'https://api.amazonalexa.com'
+    system['apiAccessToken'] = 'x' * 512
+    system['device'] = {
+        'deviceId': 'amzn1.ask.device.' + 'A' * 160,
+        'supportedInterfaces': {
+            'AudioPlayer': {},
+            'Display': {'templateVersion': '1.0', 'markupVersion': '1.0'},
+            'Alexa.Presentation.APL': {'runtime': {'maxVersion': '1.9'}},
+        },
+        'persistentEndpointId': 'amzn1.alexa.endpoint.' + 'B' * 64,
+    }
+    system['user']['permissions'] = {'consentToken': 'y' * 512}
+    system['person'] = {'personId': 'amzn1.ask.person.' + 'C' * 128}
+    event['context']['Viewport'] = {
+        'experiences': [{'arcMinuteWidth': 246, 'arcMinuteHeight': 144,
+                         'canRotate': False, 'canResize': False}],
+        'mode': 'HUB',
+        'shape': 'RECTANGLE',
+        'pixelWidth': 1024,
+        'pixelHeight': 600,
+        'dpi': 160,
+        'currentPixelWidth': 1024,
+        'currentPixelHeight': 600,
+        'touch': ['SINGLE'],
+        'video': {'codecs': ['H_264_42', 'H_264_41']},
+    }
+    event['context']['Viewports'] = [
+        {'type': 'APL', 'id': f'main_{i}', 'shape': 'RECTANGLE', 'dpi': 213,
+         'presentationType': 'STANDARD', 'canRotate': False,
+         'configuration': {'current': {
+             'mode': 'HUB', 'video': {'codecs': ['H_264_42']},
+             'size': {'type': 'DISCRETE', 'pixelWidth': 1280,
+                      'pixelHeight': 800}}}}
+        for i in range(viewports)
+    ]
+    event['context']['Extensions'] = {'available': {
+        'aplext:backstack:10': {}}}
+    return event
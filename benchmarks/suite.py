@@ -0,0 +1,258 @@
+"""Benchmark suite for the request -> response hot path
+
+Run from the repository root::
+
+    python -m benchmarks.suite                 # compare against baseline
+    python -m benchmarks.suite --save          # record a new baseline
+    python -m benchmarks.suite -k dispatch     # only matching cases
+
+Each case records the median wall time per call (over several repeats)
+along with allocations measured by :mod:`tracemalloc`: the number of
+memory blocks still held by the result of one call, and the peak memory
+used while making it. Results are compared against
+*benchmarks/baseline.json*, exiting with a non-zero status if any case
+allocates more than *--threshold* more blocks (25% by default), or
+takes more than *--time-threshold* longer (50% by default, since wall
+times are noisier than allocations). Wall times depend on the machine,
+so record the baseline on the same machine you compare on: *--save*
+notes the command, date, Python version and platform under *_measured*.
+"""
+import argparse
+import copy
+import json
+import statistics
+import sys
+import timeit
+import tracemalloc
+from os import path
+from echokit import EchoKit
+from echokit.request import ASKRequest, LazyASKRequest, Envelope
+from echokit.response import Response
+from echokit.template import ResponseTemplate
+from echokit.exc import ASKException
+from benchmarks.events import large_event
+
+BASELINE = path.join(path.dirname(path.abspath(__file__)), 'baseline.json')
+
+#: Default allowed regression in wall time. Medians of repeated runs of
+#: unchanged code on a shared machine were measured up to ~30% apart, so
+#: only bigger slowdowns are flagged
+TIME_THRESHOLD = 0.5
+
+#: Session attributes/viewports for each event size
+SIZES = {'small': (0, 0), 'medium': (20, 2), 'large': (200, 16)}
+
+
+def _app():
+    app = EchoKit('')
+
+    @app.intent('AnimalColorIntent')
+    def plain(request, session):
+        return app.response('Hello')
+
+    @app.intent('AnimalColorSlotIntent')
+    @app.slot('FirstColor', 'SecondColor')
+    def with_slots(request, session, FirstColor, SecondColor):
+        return app.response(f'{FirstColor} and {SecondColor}')
+
+    @app.intent('AttributesIntent')
+    def attributes(request, session):
+        response = app.response('Hello')
+        response.session_attributes['turns'] = \
+            response.session_attributes.get('turns', 0) + 1
+        return response
+    return app
+
+
+def cases():
+    """Return benchmark cases as a `dict` of name -> zero-arg callable"""
+    cases_ = {}
+    for size, (attributes, viewports) in SIZES.items():
+        event = large_event(attributes=attributes, viewports=viewports)
+        cases_[f'parse.eager.{size}'] = lambda e=event: ASKRequest(**e)
+        cases_[f'parse.lazy.{size}'] = lambda e=event: LazyASKRequest(**e)
+        cases_[f'parse.typed.{size}'] = lambda e=event: Envelope(e)
+        parsed = ASKRequest(**event)
+        cases_[f'roundtrip.dict.{size}'] = parsed._dict
+
+    app = _app()
+    event = large_event(attributes=20, viewports=2)
+    for name in ('AnimalColorIntent', 'AnimalColorSlotIntent'):
+        e = copy.deepcopy(event)
+        e['request']['intent']['name'] = name
+        label = 'slot' if 'Slot' in name else 'plain'
+        cases_[f'dispatch.{label}'] = lambda e=e: app.handler(e, None)
+
+    # Misrouted traffic, rejected before the event is parsed
+    e = large_event(attributes=200, viewports=2)
+    e['session']['application']['applicationId'] = 'another-skill'
+
+    def rejected(e=e):
+        try:
+            app.handler(e, None)
+        except ASKException as exc:
+            return exc
+    cases_['dispatch.rejected'] = rejected
+
+    # Tens of KB of session state, which the handler doesn't read
+    e = large_event(attributes=200, viewports=2)
+    e['request']['intent']['name'] = 'AnimalColorIntent'
+    cases_['dispatch.large_state'] = lambda e=e: app.handler(e, None)
+
+    e = copy.deepcopy(event)
+    e['request']['intent']['name'] = 'AttributesIntent'
+    e['session']['attributes'] = {'turns': 0, 'history': [
+        {'intent': 'AnimalColorIntent', 'slots': {'FirstColor': 'red'}}
+    ] * 50}
+
+    def attributes_roundtrip(e=e):
+        response = app.handler(e, None)
+        e['session']['attributes'] = response['sessionAttributes']
+        return response
+    cases_['dispatch.attributes'] = attributes_roundtrip
+
+    cases_['response.speech'] = lambda: Response('Hello there')._dict
+    cases_['response.chain'] = lambda: (
+        Response('Is that Springfield Ohio, or Springfield Illinois?')
+        .reprompt("I didn't catch that. Was that Ohio or Illinois?")
+        .simple_card('Springfield', 'Ohio or Illinois?')._dict
+    )
+    cases_['response.standard_card'] = lambda: (
+        Response('<speak>Hello</speak>', speech_type='SSML')
+        .standard_card('Title', 'Text', 'https://example.com/small.png',
+                       'https://example.com/large.png')._dict
+    )
+    template = ResponseTemplate(
+        'Is that {city} Ohio, or {city} Illinois?',
+        reprompt="I didn't catch that. Was that Ohio or Illinois?",
+        card={'type': 'Simple', 'title': '{city}',
+              'content': 'Ohio or Illinois?'}
+    )
+    cases_['response.template'] = lambda: \
+        template.render(city='Springfield')._dict
+    return cases_
+
+
+def measure(func, number=None, repeat=7):
+    """Measure a single case
+
+    :return: `dict` with *time_us* (median time per call over *repeat*
+        runs, in microseconds), *blocks* (memory blocks held by one
+        call's result) and *peak_kb* (peak memory while making one call)
+    """
+    func()
+    if number is None:
+        number, _ = timeit.Timer(func).autorange()
+    median = statistics.median(
+        timeit.repeat(func, number=number, repeat=repeat)
+    ) / number
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, 'lineno')
+                 if stat.count_diff > 0)
+    del result
+    return {'time_us': round(median * 1e6, 3), 'blocks': blocks,
+            'peak_kb': round((peak - base) / 1024, 2)}
+
+
+def compare(results, baseline, threshold, time_threshold=TIME_THRESHOLD):
+    """Compare results against a baseline
+
+    :param threshold: Allowed regression in allocated blocks, which are
+        deterministic, as a fraction
+    :param time_threshold: Allowed regression in wall time, as a
+        fraction. Looser, since (median) times still vary from run to
+        run.
+    :return: List of regression messages
+    """
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        for metric, allowed in (('time_us', time_threshold),
+                                ('blocks', threshold)):
+            limit = expected[metric] * (1 + allowed)
+            # Ignore noise in very small values
+            if result[metric] > limit and \
+                    result[metric] - expected[metric] > 1:
+                regressions.append(
+                    f"{name}: {metric} {result[metric]} > "
+                    f"{expected[metric]} (+{allowed:.0%})"
+                )
+    return regressions
+
+
+def environment():
+    """Describe how results were measured, saved along with a baseline"""
+    import os
+    import platform
+    import time
+    return {
+        'command': ' '.join(['python -m benchmarks.suite'] + sys.argv[1:]),
+        'date': time.strftime('%Y-%m-%d'),
+        'python': f"{platform.python_implementation()} "
+                  f"{platform.python_version()}",
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-k', dest='match', default='',
+                        help='Only run cases whose name contains this')
+    parser.add_argument('--save', action='store_true',
+                        help='Save results as the new baseline')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Allowed regression in allocated blocks, as '
+                             'a fraction (default: 0.25)')
+    parser.add_argument('--time-threshold', type=float,
+                        default=TIME_THRESHOLD,
+                        help='Allowed regression in wall time, as a '
+                             f'fraction (default: {TIME_THRESHOLD})')
+    args = parser.parse_args()
+
+    baseline = {}
+    if path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {}
+    print(f"{'case':<28} {'time (us)':>10} {'baseline':>10} "
+          f"{'blocks':>7} {'peak (KB)':>10}")
+    for name, func in cases().items():
+        if args.match not in name:
+            continue
+        result = results[name] = measure(func)
+        expected = baseline.get(name, {}).get('time_us', '-')
+        print(f"{name:<28} {result['time_us']:>10} {expected:>10} "
+              f"{result['blocks']:>7} {result['peak_kb']:>10}")
+
+    if args.save:
+        baseline.update(results)
+        baseline['_measured'] = environment()
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Saved baseline: {args.baseline}")
+        return
+    regressions = compare(results, baseline, args.threshold,
+                          args.time_threshold)
+    if regressions:
+        print("\nRegressions:")
+        print('\n'.join(regressions))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,4 +3,36 @@ __author__ = 'Edward Wells'
 
 from .echokit import EchoKit
 
-__all__ = ['echokit', 'EchoKit']
+#: Names importable from the package, and the submodule defining each.
+#: Submodules are only imported when one of their names is first used,
+#: so skills don't pay to import what they don't use on cold starts.
+_LAZY = {
+    'Response': 'response',
+    'ASKException': 'exc',
+    'RequestRejected': 'exc',
+    'current_context': 'context',
+    'Router': 'router',
+    'SSML': 'ssml',
+    'ResponseTemplate': 'template',
+    'TextTemplate': 'template',
+    'MessageCatalog': 'catalog',
+    'SessionStore': 'persistence',
+    'AttributeCodec': 'codec',
+    'SizeAccountant': 'codec',
+}
+
+__all__ = ['echokit', 'EchoKit'] + list(_LAZY)
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    value = getattr(import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
@@ -0,0 +1,166 @@
+"""Copy-on-write session attributes
+
+Incoming session attributes are wrapped in :class:`SessionAttributes`
+rather than being copied up front. It shares the incoming objects until
+they're needed: top-level values are only replaced when they're written,
+and nested objects (`dict` and `list` values) are copied the first time
+they're read, so handlers can change them in place without touching the
+incoming event. Conversations carrying lots of state only pay to copy
+the parts a handler actually looks at.
+
+Which attributes were changed is tracked, so hooks (persisting state,
+say) can look at just those:
+
+.. code-block:: python
+
+    @app.intent("AddToCartIntent")
+    @app.slot("item")
+    def add_to_cart(request, session, item):
+        response = app.response(f"Added {item}")
+        response.session_attributes.setdefault("cart", []).append(item)
+        response.session_attributes.changed  # {'cart': [..., item]}
+        return response
+"""
+import copy
+
+
+class SessionAttributes(dict):
+    """`dict` of session attributes, copied on write"""
+    __slots__ = ('_original', '_written', '_removed', '_copied')
+
+    def __init__(self, original=None):
+        """
+
+        :param original: Incoming session attributes, which are never
+            modified
+        :type original: dict
+        """
+        original = original if original is not None else {}
+        super().__init__(original)
+        self._original = original
+        self._written = set()
+        self._removed = set()
+        self._copied = set()
+
+    def _load(self, key, value):
+        """Prepare a value the first time it's read
+
+        Nested objects are copied (and kept in place of the original),
+        so changes to them can't affect the incoming event.
+        """
+        if isinstance(value, (dict, list)):
+            value = copy.deepcopy(value)
+            dict.__setitem__(self, key, value)
+            self._copied.add(key)
+        return value
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        if key in self._copied or key in self._written:
+            return value
+        return self._load(key, value)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def copy(self):
+        return dict(self.items())
+
+    def __eq__(self, other):
+        # Copies are equal to the originals, so there's no need to
+        # prepare anything to compare
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self.items())!r})"
+
+    def _write(self, key):
+        self._written.add(key)
+        self._removed.discard(key)
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        self._write(key)
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self._written.discard(key)
+        self._copied.discard(key)
+        self._removed.add(key)
+
+    def pop(self, key, *default):
+        if key in self:
+            value = self[key]
+            del self[key]
+            return value
+        return dict.pop(self, key, *default)
+
+    def popitem(self):
+        key = next(reversed(self))
+        return key, self.pop(key)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def clear(self):
+        for key in list(self):
+            del self[key]
+
+    @property
+    def changed(self):
+        """Attributes which were set, or changed in place
+
+        :return: `dict` of attribute names to their new values
+        """
+        changed = {key: dict.__getitem__(self, key) for key in self._written}
+        for key in self._copied:
+            value = dict.__getitem__(self, key)
+            if value != self._original.get(key):
+                changed[key] = value
+        return changed
+
+    @property
+    def removed(self):
+        """Names of incoming attributes which were deleted"""
+        return frozenset(key for key in self._removed
+                         if key in self._original)
+
+    @property
+    def modified(self):
+        """*True* if any attribute was set, deleted or changed in place"""
+        return bool(self._written or self.removed or self.changed)
+
+    def _raw_items(self):
+        """Items as they're held, without preparing any values"""
+        return dict.items(self)
+
+    def _dict(self):
+        """Return the attributes as a plain `dict` for a response
+
+        If nothing was modified, the incoming `dict` is returned as it
+        is rather than being rebuilt.
+        """
+        if not self.modified:
+            return self._original
+        return dict(dict.items(self))
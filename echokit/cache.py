@@ -0,0 +1,123 @@
+"""Response caching for idempotent handlers
+
+Handlers for requests like help, static facts or saying goodbye return
+the same response for the same intent, slot values and locale. Wrapping
+them with :func:`echokit.EchoKit.cached` stores the response the first
+time, and reuses it for matching requests afterwards:
+
+.. code-block:: python
+
+    @app.intent("AMAZON.HelpIntent")
+    @app.cached(ttl=3600)
+    def on_help(request, session):
+        return app.response("You can ask me for a fact.")
+
+    app.cache_stats()  # {'skill.on_help': {'hits': ..., 'misses': ...}}
+
+Statistics are keyed by each handler's module and qualified name. Slot
+values are stripped and lower-cased in the cache key, so *" RED "* and
+*"red"* share one cached response: only cache handlers whose response
+doesn't depend on the exact wording. Session attributes aren't cached:
+each response gets the attributes of the request it's answering, so
+cached handlers shouldn't change them.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """Thread-safe LRU cache of responses, with an optional TTL"""
+    def __init__(self, ttl=None, maxsize=128):
+        """
+
+        :param ttl: Seconds before a cached response expires, or *None*
+            to keep responses until they're evicted
+        :param maxsize: Maximum number of responses to keep. The least
+            recently used response is evicted to make room for new ones.
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value for *key*, or *None*"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires is None or expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        """Cache *value* under *key*"""
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Remove all cached values"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return hit/miss statistics as a `dict`"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+def request_key(request):
+    """Build a cache key from the intent name, slot values and locale
+
+    Slot values are normalized (stripped and lower-cased) so that minor
+    differences in what the user said share an entry.
+
+    :param request: The parsed *request*
+    :return: Hashable key
+    """
+    type_ = request.type
+    slots = ()
+    if type_ == 'IntentRequest':
+        intent = request.intent
+        type_ = intent.name
+        if intent.slots:
+            slots = tuple(sorted(
+                (name, _normalize(slot.get('value')))
+                for name, slot in intent.slots.items()
+            ))
+    return type_, slots, request.locale
+
+
+def _normalize(value):
+    return value.strip().lower() if isinstance(value, str) else value
+
+
+def freeze(response):
+    """Copy the cacheable part of a serialized response
+
+    :param response: :attr:`echokit.response.Response._dict`
+    :return: Tuple of the response version and body
+    """
+    return response['version'], copy.deepcopy(response['response'])
@@ -0,0 +1,317 @@
+"""Capturing traffic for replay and debugging
+
+A :class:`CaptureSink` records each event handled by
+:class:`echokit.EchoKit` along with its response, without slowing
+requests down much: :func:`CaptureSink.capture` only snapshots the pair
+as JSON (so later changes to them aren't recorded) and puts it on a
+bounded in-memory queue, and a background thread redacts and writes
+them in batches. Files are JSON lines (one
+*{"event": ..., "response": ...}* object per line, which ``echoreplay``
+reads directly), compressed with gzip (or zstd, if the *zstandard*
+package is installed) and rotated by size or age:
+
+.. code-block:: python
+
+    from echokit.capture import CaptureSink
+
+    app = EchoKit("my_app_id",
+                  capture=CaptureSink("/tmp/capture", sample_rate=0.1))
+
+If the writer falls behind and the queue fills up, records are dropped
+according to *policy* rather than holding up requests: *drop_newest*
+(the default) discards the record being captured, *drop_oldest* makes
+room by discarding the oldest waiting record, and *block* waits briefly
+for room before giving up. Waiting records are written when the
+interpreter exits, or by calling :func:`CaptureSink.flush`.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+from .exc import ASKException
+from .logs import DEFAULT_REDACT, _random, _redact
+
+#: Policies for records captured while the queue is full
+POLICIES = ('drop_newest', 'drop_oldest', 'block')
+#: File name suffix for each compression
+SUFFIXES = {'gzip': '.jsonl.gz', 'zstd': '.jsonl.zst', None: '.jsonl'}
+
+_SEPARATORS = (',', ':')
+
+
+class CaptureSink:
+    """Writes captured event/response pairs from a background thread"""
+    def __init__(self, directory, prefix='capture', compression='gzip',
+                 max_bytes=64 * 1024 * 1024, max_age=300, queue_size=10000,
+                 policy='drop_newest', block_timeout=0.01, batch_size=256,
+                 flush_interval=1.0, sample_rate=1.0,
+                 redact=DEFAULT_REDACT):
+        """
+
+        :param directory: Directory to write files to, created if needed
+        :param prefix: Start of each file's name
+        :param compression: *gzip*, *zstd* or *None*
+        :param max_bytes: Uncompressed bytes to write to a file before
+            starting a new one
+        :param max_age: Seconds to write to a file before starting a new
+            one, or *None* to only rotate by size
+        :param queue_size: Maximum number of records waiting to be written
+        :param policy: One of :data:`POLICIES`, for when the queue is full
+        :param block_timeout: Seconds to wait for room in the queue with
+            the *block* policy
+        :param batch_size: Maximum number of records to write at once
+        :param flush_interval: Maximum seconds records wait before being
+            written
+        :param sample_rate: Fraction (0 to 1) of requests to capture
+        :param redact: Dotted paths of fields to redact, the same as
+            :class:`echokit.logs.RequestLogger`
+        """
+        if policy not in POLICIES:
+            raise ASKException(f"Invalid policy: {policy!r}, expected one "
+                               f"of {POLICIES}")
+        if compression not in SUFFIXES:
+            raise ASKException(f"Invalid compression: {compression!r}, "
+                               f"expected one of {tuple(SUFFIXES)}")
+        if compression == 'zstd':
+            try:
+                import zstandard  # noqa: F401
+            except ImportError:
+                raise ASKException("zstd compression requires the "
+                                   "zstandard package") from None
+        self.directory = directory
+        self.prefix = prefix
+        self.compression = compression
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.queue_size = queue_size
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.sample_rate = sample_rate
+        self.redact = [p.split('.') for p in redact]
+        #: Paths of the files written to so far
+        self.files = []
+        self._closed = False
+        self._reset()
+        atexit.register(self.close)
+        if hasattr(os, 'register_at_fork'):
+            # Threads don't survive forking (by echoserve --processes,
+            # say), so each process starts its own writer
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        #: Number of records captured, dropped and written
+        self.captured = 0
+        self.dropped = 0
+        self.written = 0
+        #: Number of errors serializing or writing records (which are
+        #: counted as dropped)
+        self.errors = 0
+        self._queue = deque()
+        # Captured records which have since been written or discarded
+        self._settled = 0
+        self._flushing = 0
+        self._cond = threading.Condition()
+        self._file_lock = threading.Lock()
+        self._thread = None
+        self._file = None
+        self._file_bytes = 0
+        self._file_opened = 0.0
+
+    def capture(self, event, response):
+        """Queue an event and its response to be written
+
+        Never blocks (beyond *block_timeout* with the *block* policy).
+
+        :return: *True* if the record was queued
+        """
+        if self._closed:
+            return False
+        if self.sample_rate < 1 and _random() >= self.sample_rate:
+            return False
+        try:
+            # Snapshot both now: the handler (or calls it left running)
+            # may still change them
+            record = (json.dumps(event, separators=_SEPARATORS, default=str),
+                      json.dumps(response, separators=_SEPARATORS,
+                                 default=str))
+        except Exception:
+            with self._cond:
+                self.dropped += 1
+            return False
+        if self._thread is None:
+            self._start()
+        with self._cond:
+            if len(self._queue) >= self.queue_size:
+                if self.policy == 'drop_oldest':
+                    self._queue.popleft()
+                    self.dropped += 1
+                    self._settled += 1
+                elif self.policy == 'block' and self._cond.wait_for(
+                        lambda: len(self._queue) < self.queue_size,
+                        self.block_timeout):
+                    pass
+                else:
+                    self.dropped += 1
+                    return False
+            self._queue.append(record)
+            self.captured += 1
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify_all()
+        return True
+
+    def _start(self):
+        """Start the writer thread, on first use"""
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True,
+                                            name='echokit-capture')
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: len(self._queue) >= self.batch_size or
+                    self._closed or self._flushing, self.flush_interval
+                )
+                batch = [self._queue.popleft() for _ in
+                         range(min(len(self._queue), self.batch_size))]
+                closed = self._closed and not self._queue
+                # Make room for blocked capture() calls
+                self._cond.notify_all()
+            if batch:
+                with self._file_lock:
+                    try:
+                        failed = self._write(batch)
+                    except Exception:
+                        # Keep running whatever goes wrong (a full disk,
+                        # say), dropping the batch
+                        self.errors += 1
+                        failed = len(batch)
+                        self._abandon_file()
+                with self._cond:
+                    self.dropped += failed
+                    self._settled += len(batch)
+                    self._cond.notify_all()
+            if closed:
+                with self._file_lock:
+                    self._abandon_file()
+                return
+
+    def _write(self, batch):
+        """Write a batch of records
+
+        :return: Number of records which couldn't be serialized
+        """
+        lines = []
+        for event, response in batch:
+            if not self.redact:
+                lines.append(f'{{"event":{event},"response":{response}}}')
+                continue
+            try:
+                record = {'event': json.loads(event),
+                          'response': json.loads(response)}
+                for path in self.redact:
+                    record = _redact(record, path)
+                lines.append(json.dumps(record, separators=_SEPARATORS))
+            except Exception:
+                self.errors += 1
+        if not lines:
+            return len(batch)
+        data = ('\n'.join(lines) + '\n').encode('utf-8')
+        now = time.monotonic()
+        if self._file is not None and (
+                self._file_bytes >= self.max_bytes or
+                (self.max_age is not None and
+                 now - self._file_opened >= self.max_age)):
+            self._close_file()
+        if self._file is None:
+            self._open_file(now)
+        self._file.write(data)
+        self._file_bytes += len(data)
+        self.written += len(lines)
+        return len(batch) - len(lines)
+
+    def _open_file(self, now):
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.gmtime())
+        name = (f"{self.prefix}-{stamp}-{os.getpid()}-{len(self.files)}"
+                f"{SUFFIXES[self.compression]}")
+        path = os.path.join(self.directory, name)
+        if self.compression == 'gzip':
+            import gzip
+            self._file = gzip.open(path, 'wb')
+        elif self.compression == 'zstd':
+            import zstandard
+            self._file = zstandard.ZstdCompressor().stream_writer(
+                open(path, 'wb'), closefd=True
+            )
+        else:
+            self._file = open(path, 'wb')
+        self.files.append(path)
+        self._file_bytes = 0
+        self._file_opened = now
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _abandon_file(self):
+        """Close the current file, ignoring errors: after a failed write,
+        the next batch starts a new file
+        """
+        try:
+            self._close_file()
+        except Exception:
+            self.errors += 1
+            self._file = None
+
+    def flush(self, timeout=5.0):
+        """Write everything captured so far, and finish the current file
+
+        :param timeout: Maximum seconds to wait
+        :return: *True* if everything was written in time
+        """
+        if self._thread is None:
+            return True
+        with self._cond:
+            target = self.captured
+            self._flushing += 1
+            self._cond.notify_all()
+            try:
+                done = self._cond.wait_for(lambda: self._settled >= target,
+                                           timeout)
+            finally:
+                self._flushing -= 1
+        if done:
+            # Start a new file next time, so this one is complete on disk
+            with self._file_lock:
+                self._abandon_file()
+        return done
+
+    def close(self, timeout=5.0):
+        """Write everything captured so far and stop the writer thread"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self):
+        """Return capture statistics as a `dict`"""
+        return {
+            'captured': self.captured,
+            'dropped': self.dropped,
+            'written': self.written,
+            'errors': self.errors,
+            'queued': len(self._queue),
+            'files': len(self.files),
+        }
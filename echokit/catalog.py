@@ -0,0 +1,161 @@
+"""Locale-specific message catalogs
+
+A :class:`MessageCatalog` reads messages from a directory of JSON files,
+one per locale (*en-US.json*, *de-DE.json*, ...), each mapping message
+keys to text with *{name}* placeholders:
+
+.. code-block:: json
+
+    {
+        "welcome": "Welcome, {name}!",
+        "goodbye": "<speak>Goodbye!<break time=\\"300ms\\"/></speak>"
+    }
+
+Each locale is only loaded (and its messages compiled) the first time a
+request in that locale needs it, so a cold start doesn't pay for every
+locale the skill supports. Loaded locales are kept in a module-level
+index, so warm invocations (and every :class:`MessageCatalog` for the same
+directory) share them. Messages starting with *<speak>* are treated as
+SSML: their markup is checked with :func:`echokit.ssml.validate` when the
+locale is loaded, and values are escaped when they're filled in.
+
+.. code-block:: python
+
+    app = EchoKit("my_app_id", catalog=MessageCatalog("messages"))
+
+    @app.launch
+    def launch(request, session):
+        response = app.response(key="welcome", name="Bob")
+        response.reprompt(app.message("welcome_reprompt"))
+        return response
+
+For locales without a file of their own, the language (*en.json* for
+*en-GB*) is tried next, then the catalog's default locale. Keys missing
+from a locale's file are looked up the same way.
+"""
+import json
+import threading
+from os import path
+from .exc import ASKException
+from .template import TextTemplate
+
+#: Loaded locales, by (catalog directory, locale)
+_index = {}
+_lock = threading.Lock()
+
+#: Names which can't be used as placeholders in messages, since they're
+#: arguments to :func:`echokit.EchoKit.response`
+RESERVED = ('speech', 'speech_type', 'key')
+
+
+class MessageCatalog:
+    """Messages for each locale, loaded lazily from JSON files"""
+    def __init__(self, directory, default_locale='en-US'):
+        """
+
+        :param directory: Directory containing a *{locale}.json* file
+            for each locale
+        :param default_locale: Locale to fall back on for requests in
+            locales without their own file
+        """
+        self.directory = path.abspath(directory)
+        self.default_locale = default_locale
+
+    def messages(self, locale=None):
+        """Return the compiled messages for a locale, loading them if needed
+
+        :param locale: Locale such as *en-US*. Defaults to
+            :attr:`default_locale`.
+        :return: `dict` of message keys to
+            :class:`echokit.template.TextTemplate`
+        :raises echokit.exc.ASKException: If there are no messages for
+            the locale, its language or the default locale
+        """
+        locale = locale or self.default_locale
+        messages = _index.get((self.directory, locale))
+        if messages is None:
+            messages = self._load(locale)
+        return messages
+
+    def _candidates(self, locale):
+        candidates = [locale]
+        language = locale.split('-')[0]
+        if language != locale:
+            candidates.append(language)
+        if self.default_locale not in candidates:
+            candidates.append(self.default_locale)
+        return candidates
+
+    def _load(self, locale):
+        with _lock:
+            for candidate in self._candidates(locale):
+                messages = _index.get((self.directory, candidate))
+                if messages is None:
+                    file_path = path.join(self.directory, f"{candidate}.json")
+                    if not path.isfile(file_path):
+                        continue
+                    messages = _compile(file_path)
+                    _index[(self.directory, candidate)] = messages
+                # Also index the requested locale, so the fallback only
+                # has to be found once
+                _index[(self.directory, locale)] = messages
+                return messages
+        raise ASKException(f"No messages for locale {locale!r} in "
+                           f"{self.directory}")
+
+    def format(self, key, locale=None, **values):
+        """Return a message with its placeholders filled in
+
+        :param key: Message key
+        :param locale: Locale such as *en-US*
+        :param values: Values for the message's placeholders
+        :return: str
+        :raises echokit.exc.ASKException: If the message doesn't exist
+            or a placeholder has no value
+        """
+        return self.get(key, locale).render(**values)
+
+    def get(self, key, locale=None):
+        """Return the compiled message for a key
+
+        Keys missing from the locale's messages are looked up in its
+        language, then the default locale.
+
+        :return: :class:`echokit.template.TextTemplate`
+        :raises echokit.exc.ASKException: If none of them has the key
+        """
+        locale = locale or self.default_locale
+        message = self.messages(locale).get(key)
+        if message is not None:
+            return message
+        for candidate in self._candidates(locale)[1:]:
+            try:
+                message = self.messages(candidate).get(key)
+            except ASKException:
+                continue
+            if message is not None:
+                return message
+        raise ASKException(f"No message {key!r} for locale {locale!r}")
+
+    def preload(self, *locales):
+        """Load locales ahead of time (at import time, say)"""
+        for locale in locales or (self.default_locale,):
+            self.messages(locale)
+
+
+def _compile(file_path):
+    with open(file_path, encoding='utf-8') as f:
+        raw = json.load(f)
+    if not isinstance(raw, dict):
+        raise ASKException(f"Messages must be a JSON object: {file_path}")
+    messages = {}
+    for key, text in raw.items():
+        ssml = isinstance(text, str) and text.startswith('<speak>')
+        messages[key] = TextTemplate(text, ssml=ssml, reserved=RESERVED)
+        if ssml:
+            try:
+                messages[key].validate()
+            except ASKException as e:
+                raise ASKException(f"Invalid SSML for {key!r} in "
+                                   f"{file_path}: {e}") from None
+    return messages
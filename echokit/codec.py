@@ -0,0 +1,182 @@
+"""Compact session attributes and response size budgeting
+
+Session attributes are sent back in every response and come back in
+every request, so large ones make each turn of a long conversation
+slower to send and parse. An :class:`AttributeCodec` compresses
+attributes whose JSON is over a size threshold into short strings, and
+decodes them again only when a handler reads them:
+
+.. code-block:: python
+
+    from echokit.codec import AttributeCodec, SizeAccountant
+
+    app = EchoKit("my_app_id", codec=AttributeCodec(threshold=512),
+                  size_accountant=SizeAccountant())
+
+Handlers keep using session attributes as a plain `dict`. Attributes a
+handler never reads are sent back exactly as they arrived, without
+being decoded or compressed again.
+
+A :class:`SizeAccountant` measures each serialized response, logging a
+warning as it nears Alexa's limit and raising
+:exc:`echokit.exc.ASKException` if it's over.
+"""
+import json
+import logging
+import zlib
+from base64 import b85decode, b85encode
+from .attributes import SessionAttributes
+from .exc import ASKException
+
+#: Prefix marking an encoded attribute value
+PREFIX = 'ekz1:'
+#: Maximum size (bytes) of a response Alexa accepts
+RESPONSE_LIMIT = 24 * 1024
+
+_SEPARATORS = (',', ':')
+
+
+class AttributeCodec:
+    """Compresses large session attribute values"""
+    def __init__(self, threshold=1024, level=6):
+        """
+
+        :param threshold: Minimum size of an attribute's JSON (in
+            characters) before it's compressed
+        :param level: :func:`zlib.compress` level, 1 (fastest) to 9
+            (smallest)
+        """
+        self.threshold = threshold
+        self.level = level
+
+    def encode_value(self, value):
+        """Return *value* encoded if that makes it smaller, else *value*"""
+        if _is_encoded(value):
+            # Never read, so it's unchanged
+            return value
+        raw = json.dumps(value, separators=_SEPARATORS)
+        if len(raw) < self.threshold:
+            return value
+        encoded = PREFIX + b85encode(
+            zlib.compress(raw.encode('utf-8'), self.level)
+        ).decode('ascii')
+        return encoded if len(encoded) < len(raw) else value
+
+    @staticmethod
+    def decode_value(value):
+        """Return the original value of an encoded attribute
+
+        Values which aren't encoded are returned as they are.
+        """
+        if not _is_encoded(value):
+            return value
+        try:
+            raw = zlib.decompress(b85decode(value[len(PREFIX):]))
+        except (ValueError, zlib.error) as e:
+            raise ASKException(f"Invalid encoded session attribute: {e}")
+        return json.loads(raw)
+
+    def encode(self, attributes):
+        """Encode session attributes for a response
+
+        :param attributes: Session attributes
+        :type attributes: dict
+        :return: `dict` with large values encoded
+        """
+        if isinstance(attributes, SessionAttributes):
+            items = attributes._raw_items()
+        else:
+            items = attributes.items()
+        return {key: self.encode_value(value) for key, value in items}
+
+    def decode(self, attributes):
+        """Wrap incoming session attributes, to decode them as they're read
+
+        :return: :class:`LazyAttributes`
+        """
+        return LazyAttributes(attributes, self)
+
+
+def _is_encoded(value):
+    return type(value) is str and value.startswith(PREFIX)
+
+
+class LazyAttributes(SessionAttributes):
+    """Session attributes, decoding values as they're first read
+
+    Decoded values replace the encoded ones, so each is only decoded
+    once. Reading an encoded attribute counts as changing it (see
+    :attr:`echokit.attributes.SessionAttributes.changed`).
+    """
+    __slots__ = ('_codec',)
+
+    def __init__(self, original=None, codec=None):
+        super().__init__(original)
+        self._codec = codec or AttributeCodec
+
+    def _load(self, key, value):
+        if _is_encoded(value):
+            # Decoding already makes a new object, no need to copy it
+            value = self._codec.decode_value(value)
+            dict.__setitem__(self, key, value)
+            self._copied.add(key)
+            return value
+        return super()._load(key, value)
+
+    def __eq__(self, other):
+        return dict(self.items()) == other
+
+    __hash__ = None
+
+
+class SizeAccountant:
+    """Checks serialized responses against Alexa's size limit"""
+    def __init__(self, limit=RESPONSE_LIMIT, warn_ratio=0.8, strict=True,
+                 logger=None):
+        """
+
+        :param limit: Maximum response size, in bytes
+        :param warn_ratio: Fraction of *limit* above which a warning is
+            logged
+        :param strict: If *True*, raise :exc:`echokit.exc.ASKException`
+            for responses over *limit*. If *False*, only log an error.
+        :param logger: :class:`logging.Logger` for warnings
+        """
+        self.limit = limit
+        self.warn_ratio = warn_ratio
+        self.strict = strict
+        self.log = logger or logging.getLogger(__name__)
+        #: Size of the largest response checked so far
+        self.largest = 0
+
+    def size(self, response):
+        """Size of a serialized response, in bytes"""
+        return len(json.dumps(response, separators=_SEPARATORS)
+                   .encode('utf-8'))
+
+    def check(self, response):
+        """Measure a serialized response
+
+        :param response: :attr:`echokit.response.Response._dict`
+        :return: Size of the response, in bytes
+        :raises echokit.exc.ASKException: If the response is too large
+            (and :attr:`strict` is set)
+        """
+        size = self.size(response)
+        if size > self.largest:
+            self.largest = size
+        if size > self.limit:
+            attributes = {
+                key: len(json.dumps(value, separators=_SEPARATORS))
+                for key, value in response.get('sessionAttributes',
+                                               {}).items()
+            }
+            message = (f"Response is {size} bytes, over the {self.limit} "
+                       f"byte limit. Session attribute sizes: {attributes}")
+            if self.strict:
+                raise ASKException(message)
+            self.log.error(message)
+        elif size > self.limit * self.warn_ratio:
+            self.log.warning("Response is %d bytes, nearing the %d byte "
+                             "limit", size, self.limit)
+        return size
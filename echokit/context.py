@@ -0,0 +1,52 @@
+"""Per-request state shared between :class:`echokit.EchoKit` and handlers
+
+State for the request currently being handled is kept in a
+:class:`contextvars.ContextVar`, so a single :class:`echokit.EchoKit`
+instance can safely handle many requests at once, whether on separate
+threads or as separate asyncio tasks.
+"""
+from contextvars import ContextVar
+
+_current = ContextVar('echokit_request_context', default=None)
+
+
+class RequestContext:
+    """State for a single request being handled"""
+    __slots__ = ('app', 'event', 'lambda_context', 'request', 'session',
+                 'session_attributes', 'name', 'started', 'timings')
+
+    def __init__(self, app, event, lambda_context, request, session,
+                 session_attributes, name, started):
+        """
+
+        :param app: :class:`echokit.EchoKit` handling the request
+        :param event: The raw incoming event
+        :param lambda_context: Context object passed to the Lambda handler
+        :param request: The parsed *request*
+        :param session: The parsed *session*
+        :param session_attributes: Session attributes to apply to
+            responses created for this request
+        :type session_attributes: dict
+        :param name: Intent name, or the request type if this isn't
+            an *IntentRequest*
+        :param started: :func:`time.perf_counter` value from when
+            handling the request began
+        """
+        self.app = app
+        self.event = event
+        self.lambda_context = lambda_context
+        self.request = request
+        self.session = session
+        self.session_attributes = session_attributes
+        self.name = name
+        self.started = started
+        #: Seconds spent in each phase of handling the request so far
+        self.timings = []
+
+
+def current_context():
+    """Return the :class:`RequestContext` for the request being handled
+
+    :return: :class:`RequestContext`, or *None* outside of a request
+    """
+    return _current.get()
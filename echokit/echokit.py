@@ -1,8 +1,20 @@
 """Module for :class:`EchoKit`"""
 import logging
-from .request import ASKRequest
+import threading
+from collections.abc import Awaitable
+from functools import partial, wraps
+from time import perf_counter
+from .request import ASKRequest, LazyASKRequest, Envelope
 from .response import Response
 from .exc import ASKException
+from .context import RequestContext, _current
+from .logs import RequestLogger
+from .metrics import Metrics
+from .slots import compile_slots
+from .cache import ResponseCache, freeze, request_key
+from .persistence import user_id
+from .attributes import SessionAttributes
+from .prevalidate import PING_RESPONSE, Prevalidator, is_ping
 
 
 class EchoKit:
@@ -12,7 +24,10 @@ class EchoKit:
 
     When defining a handler in AWS Lambda, specify :func:`handler`
     """
-    def __init__(self, app_id, verify_app_id=True):
+    def __init__(self, app_id, verify_app_id=True, lazy=False, typed=True,
+                 request_logger=None, metrics=True, catalog=None,
+                 store=None, codec=None, size_accountant=None,
+                 capture=None):
         """
 
         :param app_id: Application ID for your skill
@@ -22,43 +37,211 @@ class EchoKit:
             any mismatched IDs. If *False*, incoming application IDs
             are ignored
         :type verify_app_id: bool
+        :param lazy: If *True*, incoming events are parsed with
+            :class:`echokit.request.LazyASKRequest`, which only wraps
+            nested objects as they're accessed. If *False* (default),
+            the whole event is converted up front with
+            :class:`echokit.request.ASKRequest`. Only applies when
+            *typed* is *False*
+        :type lazy: bool
+        :param typed: If *True* (default), incoming events are read
+            through the typed views in :mod:`echokit.request`
+            (:class:`echokit.request.Envelope` and friends) rather
+            than being converted into :class:`echokit.request.ASKRequest`
+        :type typed: bool
+        :param request_logger: :class:`echokit.logs.RequestLogger` used to
+            log each request and its response. Defaults to logging full,
+            redacted records at *INFO* to this module's logger (which
+            is only emitted if that level is enabled)
+        :param metrics: :class:`echokit.metrics.Metrics` to record the
+            time taken by each phase of handling requests in. *True*
+            (default) creates a new one, *False* disables timing.
+        :param catalog: :class:`echokit.catalog.MessageCatalog` to look
+            up messages passed to :func:`response` or :func:`message` by
+            key
+        :param store: :class:`echokit.persistence.SessionStore` for
+            attributes persisted across sessions, available to handlers
+            as :attr:`persistent`
+        :param codec: :class:`echokit.codec.AttributeCodec` to compress
+            large session attributes with
+        :param size_accountant: :class:`echokit.codec.SizeAccountant` to
+            check the size of each response with
+        :param capture: :class:`echokit.capture.CaptureSink` to record
+            each event and its response to
         """
         self.log = logging.getLogger(__name__)
-        self.log.setLevel(logging.INFO)
+        #: :class:`echokit.logs.RequestLogger` for handled requests
+        self.request_logger = request_logger or RequestLogger(self.log)
+        #: :class:`echokit.metrics.Metrics` for handled requests, if enabled
+        self.metrics = Metrics() if metrics is True else (metrics or None)
+        #: :class:`echokit.catalog.MessageCatalog` for localized messages
+        self.catalog = catalog
+        #: :class:`echokit.persistence.SessionStore` for user attributes
+        self.store = store
+        #: :class:`echokit.codec.AttributeCodec` for session attributes
+        self.codec = codec
+        #: :class:`echokit.codec.SizeAccountant` for responses
+        self.size_accountant = size_accountant
+        #: :class:`echokit.capture.CaptureSink` for handled requests
+        self.capture = capture
+        #: Seconds :func:`fan_out` waits for calls outside of Lambda
+        self.fan_out_budget = 3.0
         #: The application ID for your skill
         self.app_id = app_id
         #: *True* to check requests against :attr:`EchoKit.app_id`
         self.verify_app_id = verify_app_id
+        #: Other application IDs accepted along with :attr:`app_id`, as
+        #: routed to this app by :func:`echokit.router.Router.add`
+        self.app_id_aliases = frozenset()
+        if typed:
+            self._parse = Envelope
+        elif lazy:
+            self._parse = lambda event: LazyASKRequest(**event)
+        else:
+            self._parse = lambda event: ASKRequest(**event)
         self._handler_functions = {}
-        # Don't set session attributes here. These are set by incoming
-        # requests only, and are applied to responses before any can be set
-        self._session_attributes = {}
+        self._prevalidator = None
+        self._caches = {}
+        self._init_hooks = []
+        self._initialized = False
+        # Thread running on_init hooks, if any
+        self._initializing = None
+        self._init_cond = threading.Condition()
         if not verify_app_id:
             self.log.warning("App ID verification disabled, this skill will "
                              "attempt to respond to all incoming requests")
 
-    def response(self, speech, speech_type='PlainText'):
+    def response(self, speech=None, speech_type='PlainText', key=None,
+                 **values):
         """Create a response for the user
 
-        :param speech: Output speech
+        :param speech: Output speech, or an :class:`echokit.ssml.SSML`
+            builder
         :param speech_type: Use *PlainText* (default) if *speech* is
             formatted as plain text. Use *SSML* if *speech*
             is a string of SSML markup.
+        :param key: Instead of *speech*, the key of a message in
+            :attr:`catalog` to use for the request's locale. SSML
+            messages set *speech_type* automatically.
+        :param values: Values for the message's placeholders
         :return: :class:`echokit.response.Response`
         """
+        # Session attributes are only set by incoming requests, and are
+        # applied to responses before any can be set
+        ctx = _current.get()
+        if key is not None:
+            message = self._message(key, ctx)
+            speech = message.render(**values)
+            if message.ssml:
+                speech_type = 'SSML'
         return Response(
             speech=speech,
             speech_type=speech_type,
-            session_attributes=self._session_attributes
+            session_attributes=ctx.session_attributes if ctx else None
+        )
+
+    def message(self, key, **values):
+        """Return a message from :attr:`catalog` for the request's locale
+
+        :param key: Message key
+        :param values: Values for the message's placeholders
+        :return: str
+        """
+        return self._message(key, _current.get()).render(**values)
+
+    def _message(self, key, ctx):
+        if self.catalog is None:
+            raise ASKException("No message catalog configured")
+        locale = ctx.request.locale if ctx else None
+        return self.catalog.get(key, locale)
+
+    @property
+    def persistent(self):
+        """Persisted attributes of the user making the current request
+
+        :return: :class:`echokit.persistence.PersistentAttributes`
+        """
+        if self.store is None:
+            raise ASKException("No session store configured")
+        ctx = _current.get()
+        if ctx is None:
+            raise ASKException("No request is being handled")
+        user = user_id(ctx.event)
+        if user is None:
+            raise ASKException("Request has no user ID")
+        return self.store.get(user)
+
+    def fan_out(self, calls, budget=None, margin=0.25, required=None,
+                fallback=None):
+        """Run calls (to backends, say) concurrently, within a deadline
+
+        In Lambda, the deadline is the time left in the invocation (from
+        *get_remaining_time_in_millis()* on the Lambda context) less
+        *margin*, leaving time to build and send the response. Outside
+        Lambda, :attr:`fan_out_budget` is used. Calls still running at
+        the deadline are abandoned. See :mod:`echokit.fanout`. Blocks
+        while waiting: from async handlers, await :func:`fan_out_async`.
+
+        :param calls: `dict` of names to callables taking no arguments
+        :param budget: Maximum seconds to wait, overriding
+            :attr:`fan_out_budget` (and capping the time left in Lambda)
+        :param margin: Seconds to leave before the invocation times out
+        :param required: Names of the calls the response can't do
+            without. Defaults to all of them.
+        :param fallback: Function taking the
+            :class:`echokit.fanout.FanOutResult` and returning a
+            :class:`echokit.response.Response`, called if any required
+            call failed or timed out
+        :return: :class:`echokit.fanout.FanOutResult`
+        """
+        from .fanout import fan_out
+        return fan_out(calls, self._fan_out_timeout(budget, margin),
+                       required, fallback)
+
+    async def fan_out_async(self, calls, budget=None, margin=0.25,
+                            required=None, fallback=None):
+        """Coroutine equivalent of :func:`fan_out`, for async handlers
+
+        :func:`fan_out` blocks while it waits, which would stall the
+        event loop under :func:`handle_async` or ``echoserve``.
+        """
+        from .fanout import fan_out_async
+        return await fan_out_async(
+            calls, self._fan_out_timeout(budget, margin), required, fallback
         )
 
+    def _fan_out_timeout(self, budget, margin):
+        timeout = self.fan_out_budget if budget is None else budget
+        ctx = _current.get()
+        remaining = getattr(ctx.lambda_context if ctx else None,
+                            'get_remaining_time_in_millis', None)
+        if remaining is not None:
+            left = remaining() / 1000 - margin
+            timeout = left if budget is None else min(left, budget)
+        return timeout
+
+    def render(self, template, **values):
+        """Create a response for the user from a template
+
+        :param template: :class:`echokit.template.ResponseTemplate`
+        :param values: Values for the template's placeholders
+        :return: :class:`echokit.response.Response`
+        """
+        ctx = _current.get()
+        return template.render(ctx.session_attributes if ctx else None,
+                               **values)
+
     def launch(self, func):
         """Decorator to handle *LaunchRequest*"""
         self._handler_functions['LaunchRequest'] = func
+        self._prevalidator = None
+        return func
 
     def session_ended(self, func):
         """Decorator to handle *SessionEndedRequest*"""
         self._handler_functions['SessionEndedRequest'] = func
+        self._prevalidator = None
+        return func
 
     def intent(self, name):
         """Decorator to handle *IntentRequest*
@@ -68,25 +251,197 @@ class EchoKit:
         """
         def intent_wrapper(func):
             self._handler_functions[name] = func
+            self._prevalidator = None
+            return func
         return intent_wrapper
 
+    def on_init(self, func):
+        """Decorator to register a function to run once, before any
+        requests are handled
+
+        Use it to warm caches (load message catalogs, open connections,
+        compile templates, ...). Call :func:`initialize` at the end of
+        your skill's module so hooks run while Lambda initializes the
+        function, rather than during the first invocation:
+
+        .. code-block:: python
+
+            app = EchoKit("my_app_id", catalog=CATALOG)
+
+            @app.on_init
+            def warm():
+                CATALOG.preload("en-US", "en-GB")
+
+            app.initialize()
+
+        Hooks that haven't run by the first request are run then. Hooks
+        registered after :func:`initialize` are run straight away. Hooks
+        may handle requests themselves (to warm up handlers) or register
+        more hooks.
+        """
+        with self._init_cond:
+            self._init_hooks.append(func)
+            initialized = self._initialized
+        if initialized:
+            func()
+        return func
+
+    def initialize(self):
+        """Run :func:`on_init` hooks and prepare for the first request
+
+        Only does anything the first time it's called. Calls from other
+        threads wait for the hooks to finish, while calls made by the
+        hooks themselves (through :func:`handler`, say) return straight
+        away. If a hook raises an exception, the next call starts over.
+
+        :return: This app
+        """
+        current = threading.get_ident()
+        with self._init_cond:
+            if self._initialized or self._initializing == current:
+                return self
+            self._init_cond.wait_for(lambda: self._initializing is None)
+            if self._initialized:
+                return self
+            self._initializing = current
+        # Hooks are run without holding the lock, so they can handle
+        # requests or register more hooks
+        try:
+            # Compile prevalidation ahead of the first request
+            self._prevalidator = None
+            self._compiled_prevalidator()
+            ran = 0
+            while True:
+                with self._init_cond:
+                    if ran == len(self._init_hooks):
+                        self._initialized = True
+                        break
+                    hook = self._init_hooks[ran]
+                hook()
+                ran += 1
+        finally:
+            with self._init_cond:
+                self._initializing = None
+                self._init_cond.notify_all()
+        return self
+
+    def cached(self, ttl=None, maxsize=128):
+        """Decorator to cache the responses of an idempotent handler
+
+        Responses are cached by intent name (or request type), slot
+        values and locale, so the handler only runs for requests it
+        hasn't answered recently. Slot values are stripped and
+        lower-cased in the key, so *" RED "* and *"red"* share a
+        cached response. Session attributes aren't cached;
+        each response gets those of the request being handled. Apply
+        it below :func:`intent`, :func:`launch` or :func:`session_ended`:
+
+        .. code-block:: python
+
+            @app.intent("AMAZON.HelpIntent")
+            @app.cached(ttl=3600)
+            def on_help(request, session):
+                return app.response("You can ask me for a fact.")
+
+        The :class:`echokit.cache.ResponseCache` is available as the
+        decorated function's *cache* attribute, and statistics for all
+        cached handlers via :func:`cache_stats`.
+
+        :param ttl: Seconds to cache responses for, or *None* to keep
+            them until evicted
+        :param maxsize: Maximum number of responses to cache
+        :return:
+        """
+        cache = ResponseCache(ttl=ttl, maxsize=maxsize)
+
+        def cache_wrapper(func):
+            # Qualified, since handlers in different modules (or classes)
+            # may share a name
+            self._caches[f"{func.__module__}.{func.__qualname__}"] = cache
+
+            @wraps(func)
+            def sync_handler_func(request_, session_):
+                key = request_key(request_)
+                cached = cache.get(key)
+                if cached is not None:
+                    return self._cached_response(*cached)
+                response = func(request_, session_)
+                cache.put(key, freeze(response._dict))
+                return response
+
+            @wraps(func)
+            async def async_handler_func(request_, session_):
+                key = request_key(request_)
+                cached = cache.get(key)
+                if cached is not None:
+                    return self._cached_response(*cached)
+                response = await func(request_, session_)
+                cache.put(key, freeze(response._dict))
+                return response
+
+            if _is_coroutine_function(func):
+                wrapper = async_handler_func
+            else:
+                wrapper = sync_handler_func
+            wrapper.cache = cache
+            return wrapper
+        return cache_wrapper
+
+    def cache_stats(self):
+        """Hit/miss statistics for each handler wrapped by :func:`cached`
+
+        :return: `dict` of handler functions' qualified names
+            (*module.qualname*) to :func:`echokit.cache.ResponseCache.stats`
+        """
+        return {name: cache.stats() for name, cache in self._caches.items()}
+
     @staticmethod
-    def slot(*args):
+    def _cached_response(version, body):
+        ctx = _current.get()
+        return Response._from_body(
+            body, ctx.session_attributes if ctx else None, version
+        )
+
+    @staticmethod
+    def slot(*args, **types):
         """Decorator to signal the presence of slots
 
         SLot names are case-sensitive, and will be passed into the
-        handler function as keyword arguments.
+        handler function as keyword arguments. Slots named in *args*
+        are passed in as strings. Slots given as keyword arguments are
+        converted to the given type first (see :mod:`echokit.slots`):
+
+        .. code-block:: python
+
+            from echokit.slots import integer, date
+
+            @app.intent("BookIntent")
+            @app.slot("name", guests=integer, day=date)
+            def book(request, session, name, guests, day):
+                pass
+
+        Missing slots (or slots whose values can't be converted) are
+        passed in as *None*, or the default given by a
+        :class:`echokit.slots.SlotSpec`.
 
         :param args: Slot names
+        :param types: Slot names mapped to a type (any callable taking
+            the slot's value), or a :class:`echokit.slots.SlotSpec`
         :return:
         """
+        # Work out how to extract each slot once, up front
+        extract = compile_slots(args, types)
+
         def slot_checker(func):
+            @wraps(func)
             def handler_func(request_, session_):
-                kwargs = {}
-                for slot_name in args:
-                    slot_ = request_.intent.slots[slot_name]
-                    kwargs[slot_.name] = slot_.value
-                return func(request_, session_, **kwargs)
+                return func(request_, session_,
+                            **extract(request_.intent.slots))
+            if _is_coroutine_function(func):
+                @wraps(func)
+                async def async_handler_func(request_, session_):
+                    return await handler_func(request_, session_)
+                return async_handler_func
             return handler_func
         return slot_checker
 
@@ -106,32 +461,172 @@ class EchoKit:
         In this scenario, the Lambda function would need to be
         configured to use *{your_module}.handler*.
 
+        Handlers may be coroutine functions (``async def``), in which
+        case they're run to completion on an event loop that's created
+        once per thread and reused across (warm) invocations. If you're
+        already running an event loop, use :func:`handle_async` instead.
+
+        Events are checked (see :mod:`echokit.prevalidate`) before they're
+        parsed, raising :exc:`echokit.exc.RequestRejected` for any that
+        are malformed, for another skill or that have no handler.
+        Warm-up pings are answered straight away.
+
+        :param event:
+        :param context:
+        :return:
+        """
+        if not self._initialized:
+            self.initialize()
+        if is_ping(event):
+            return PING_RESPONSE
+        request_handler, ctx = self._dispatch(event, context)
+        token = _current.set(ctx)
+        try:
+            response = request_handler(ctx.request, ctx.session)
+            if isinstance(response, Awaitable):
+                response = self._event_loop().run_until_complete(response)
+        finally:
+            _current.reset(token)
+        return self._respond(response, ctx)
+
+    async def handle_async(self, event, context=None, executor=None):
+        """Coroutine equivalent of :func:`handler`
+
+        For hosts that already run an event loop. Coroutine handlers
+        are awaited on the running loop. Regular handlers are called
+        directly, or run in *executor* if one is given so they don't
+        block the loop.
+
         :param event:
         :param context:
+        :param executor: :class:`concurrent.futures.Executor` to run
+            regular (non-coroutine) handlers in
         :return:
         """
-        self.log.info({'event': event, 'context': context})
-        event_ = ASKRequest(**event)
+        if not self._initialized:
+            self.initialize()
+        if is_ping(event):
+            return PING_RESPONSE
+        request_handler, ctx = self._dispatch(event, context)
+        token = _current.set(ctx)
+        try:
+            if executor is None or _is_coroutine_function(request_handler):
+                response = request_handler(ctx.request, ctx.session)
+            else:
+                import asyncio
+                from contextvars import copy_context
+                response = await asyncio.get_running_loop().run_in_executor(
+                    executor, copy_context().run, request_handler,
+                    ctx.request, ctx.session
+                )
+            if isinstance(response, Awaitable):
+                response = await response
+        finally:
+            _current.reset(token)
+        return self._respond(response, ctx)
+
+    def _dispatch(self, event, context):
+        """Validate and parse an incoming event
+
+        :return: Tuple of the handler function for the request, and
+            the :class:`echokit.context.RequestContext` to call it with
+        :raises echokit.exc.RequestRejected: If the event is rejected
+            before being parsed
+        """
+        started = perf_counter()
+        prevalidator = self._compiled_prevalidator()
+        type_ = prevalidator.verify(event)
+        verified = perf_counter()
+        request_handler = prevalidator.lookup(type_)
+        looked_up = perf_counter()
+        event_ = self._parse(event)
         request = event_.request
         session = event_.session
-
-        # Validate incoming app ID if necessary
-        request_id = session.application.applicationId
-        if self.verify_app_id and (request_id != self.app_id):
-            raise ASKException(f"Application ID mismatch. Expected: "
-                               f"'{self.app_id}' Received: '{request_id}'")
-        type_ = request.type
-        if type_ == 'IntentRequest':
-            type_ = request.intent.name
-        if type_ not in self._handler_functions:
-            raise ASKException(f"No handler defined for request: {type_}")
-        request_handler = self._handler_functions[type_]
-        # Retain any incoming session attributes
-        if session.attributes:
-            self._session_attributes = session.attributes._dict()
+        # Retain any incoming session attributes, shared (rather than
+        # copied) until they're changed
+        attributes = (event.get('session') or {}).get('attributes')
+        if attributes:
+            if self.codec is not None:
+                session_attributes = self.codec.decode(attributes)
+                session.attributes = session_attributes
+            else:
+                session_attributes = SessionAttributes(attributes)
         else:
-            self._session_attributes = {}
-            session.attributes = self._session_attributes
-        response = request_handler(request, session)._dict
-        self.log.info({'response': response})
+            session_attributes = SessionAttributes()
+            session.attributes = session_attributes
+        ctx = RequestContext(self, event, context, request, session,
+                             session_attributes, type_, started)
+        ctx.timings = [perf_counter() - looked_up, verified - started,
+                       looked_up - verified]
+        return request_handler, ctx
+
+    def _compiled_prevalidator(self):
+        """Return the :class:`echokit.prevalidate.Prevalidator`, compiling
+        it on first use and again if handlers or the app ID change
+        """
+        prevalidator = self._prevalidator
+        app_ids = (self.app_id_aliases | {self.app_id}
+                   if self.verify_app_id else None)
+        if prevalidator is None or prevalidator.app_ids != app_ids:
+            prevalidator = self._prevalidator = Prevalidator(
+                self._handler_functions, app_ids
+            )
+        return prevalidator
+
+    def _respond(self, response, ctx):
+        """Serialize the :class:`echokit.response.Response` from a handler"""
+        handled = perf_counter()
+        response = response._dict
+        attributes = response['sessionAttributes']
+        if isinstance(attributes, SessionAttributes):
+            response['sessionAttributes'] = attributes._dict()
+        if self.codec is not None:
+            response['sessionAttributes'] = self.codec.encode(
+                response['sessionAttributes']
+            )
+        if self.size_accountant is not None:
+            self.size_accountant.check(response)
+        finished = perf_counter()
+        if self.metrics is not None:
+            parse, verify, lookup = ctx.timings
+            handler = handled - ctx.started - parse - verify - lookup
+            self.metrics.record(ctx.name, parse, verify, lookup, handler,
+                                finished - handled)
+        self.request_logger.log(ctx.event, ctx.lambda_context, response,
+                                finished - ctx.started)
+        if self.capture is not None:
+            self.capture.capture(ctx.event, response)
+        if self.store is not None:
+            self.store.commit()
         return response
+
+    def _event_loop(self):
+        """Return this thread's event loop for coroutine handlers
+
+        The loop is created on first use and kept open, so warm
+        invocations don't pay to set up a new one each time.
+        """
+        loop = getattr(_loops, 'loop', None)
+        if loop is None or loop.is_closed():
+            import asyncio
+            loop = _loops.loop = asyncio.new_event_loop()
+        return loop
+
+
+# Event loops for coroutine handlers, one per thread
+_loops = threading.local()
+
+
+def _is_coroutine_function(func):
+    """Same as :func:`inspect.iscoroutinefunction`, without importing
+    :mod:`inspect` (which is slow to import) on cold starts
+    """
+    while isinstance(func, partial):
+        func = func.func
+    func = getattr(func, '__func__', func)
+    code = getattr(func, '__code__', None)
+    return code is not None and bool(code.co_flags & _CO_COROUTINE)
+
+
+# inspect.CO_COROUTINE
+_CO_COROUTINE = 0x80
@@ -0,0 +1,277 @@
+"""Replay recorded events through a skill to measure its performance
+
+Streams a JSONL file of recorded Alexa events through a skill's handler,
+without calling Alexa or AWS, and reports throughput, latency percentiles
+per intent, errors grouped by exception and peak memory use:
+
+.. code-block:: bash
+
+    echoreplay events.jsonl session:handler --app-dir samples/session \\
+        --processes 4 --warmup 100
+
+Each line of the file is either an event, or an object with the event
+under an *event* key (as written by :class:`echokit.capture.CaptureSink`).
+Events are replayed as fast as possible unless a target *--rate* (events
+per second) is given.
+"""
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+# Handler being replayed, set per process by `_init_worker`
+_handler = None
+
+
+def load_handler(target):
+    """Import a handler given as *module:attribute*
+
+    If the attribute is omitted, *handler* is used. If the attribute
+    is an :class:`echokit.EchoKit` (or anything else with a *handler*
+    method), its *handler* is returned.
+    """
+    module_name, _, attr = target.partition(':')
+    obj = getattr(importlib.import_module(module_name), attr or 'handler')
+    return getattr(obj, 'handler', obj)
+
+
+def read_events(path, limit=None):
+    """Yield events from a JSONL file
+
+    Files ending in *.gz* or *.zst* (as written by
+    :class:`echokit.capture.CaptureSink`) are decompressed.
+
+    :param path: File to read
+    :param limit: Maximum number of events to read
+    """
+    with _open(path) as f:
+        count = 0
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            event = json.loads(line)
+            if 'event' in event and 'request' not in event:
+                event = event['event']
+            yield event
+            count += 1
+            if limit is not None and count >= limit:
+                return
+
+
+def _open(path):
+    if path.endswith('.gz'):
+        import gzip
+        return gzip.open(path, 'rt', encoding='utf-8')
+    if path.endswith('.zst'):
+        import io
+        import zstandard
+        return io.TextIOWrapper(
+            zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'),
+                                                       closefd=True),
+            encoding='utf-8'
+        )
+    return open(path)
+
+
+def request_name(event):
+    """Intent name, or request type for other requests"""
+    request = event.get('request') or {}
+    if request.get('type') == 'IntentRequest':
+        return (request.get('intent') or {}).get('name')
+    return request.get('type')
+
+
+def _init_worker(target, app_dir):
+    global _handler
+    app_dir = os.path.abspath(app_dir)
+    # Replaying in-process again mustn't add it again
+    if app_dir not in sys.path:
+        sys.path.insert(0, app_dir)
+    _handler = load_handler(target)
+
+
+def _replay_one(event):
+    """Replay a single event through `_handler`
+
+    :return: Tuple of the request name, seconds taken and the error
+        raised (as *ExceptionType: message*), if any
+    """
+    error = None
+    start = time.perf_counter()
+    try:
+        _handler(event, None)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return request_name(event), time.perf_counter() - start, error
+
+
+def _paced(events, rate):
+    """Yield *events* no faster than *rate* per second"""
+    interval = 1 / rate
+    next_at = time.perf_counter()
+    for event in events:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        next_at += interval
+        yield event
+
+
+def percentile(values, q):
+    """Return the *q*-th percentile of an already sorted list"""
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+def replay(path, target, app_dir='.', processes=1, rate=None, warmup=0,
+           limit=None):
+    """Replay events from *path* through the handler *target*
+
+    :param path: JSONL file of events
+    :param target: Handler to replay through, as *module:attribute*
+    :param app_dir: Directory to import the skill from
+    :param processes: Number of worker processes. With 1, events are
+        replayed in this process.
+    :param rate: Target events per second, or *None* for as many as
+        possible
+    :param warmup: Number of events to replay (and discard the results
+        of) before measuring
+    :param limit: Maximum number of events to replay, after the warm-up
+    :return: `dict` report, see :func:`format_report`
+    """
+    events = read_events(path)
+    warmup_events = [e for _, e in zip(range(warmup), events)]
+    if limit is not None:
+        events = (e for _, e in zip(range(limit), events))
+    if rate:
+        events = _paced(events, rate)
+
+    pool = None
+    if processes > 1:
+        import multiprocessing
+        pool = multiprocessing.Pool(processes, _init_worker,
+                                    (target, app_dir))
+
+        def run(it, chunksize):
+            return pool.imap_unordered(_replay_one, it, chunksize)
+    else:
+        _init_worker(target, app_dir)
+
+        def run(it, chunksize):
+            return map(_replay_one, it)
+    try:
+        for _ in run(warmup_events, 1):
+            pass
+        start = time.perf_counter()
+        results = list(run(events, 1 if rate else 16))
+        elapsed = time.perf_counter() - start
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return _report(results, elapsed)
+
+
+def _report(results, elapsed):
+    latencies = defaultdict(list)
+    errors = Counter()
+    for name, latency, error in results:
+        latencies[name].append(latency)
+        if error:
+            errors[error] += 1
+    intents = {}
+    for name, values in sorted(latencies.items(), key=lambda i: str(i[0])):
+        values.sort()
+        intents[name] = {
+            'count': len(values),
+            'p50': percentile(values, 50),
+            'p90': percentile(values, 90),
+            'p99': percentile(values, 99),
+            'max': values[-1],
+        }
+    report = {
+        'events': len(results),
+        'elapsed': elapsed,
+        'throughput': len(results) / elapsed if elapsed else 0.0,
+        'intents': intents,
+        'errors': dict(errors.most_common()),
+    }
+    if resource is not None:
+        # ru_maxrss is in kilobytes on Linux
+        report['peak_rss_kb'] = {
+            'self': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            'children': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+        }
+    return report
+
+
+def format_report(report):
+    """Format a report from :func:`replay` as text"""
+    def ms(s):
+        return f"{s * 1000:>9.3f}"
+
+    lines = [
+        f"Events:      {report['events']}",
+        f"Elapsed:     {report['elapsed']:.3f}s",
+        f"Throughput:  {report['throughput']:.1f} events/s",
+        "",
+        f"{'Intent':<32} {'count':>7} {'p50 ms':>9} {'p90 ms':>9} "
+        f"{'p99 ms':>9} {'max ms':>9}",
+    ]
+    for name, stats in report['intents'].items():
+        lines.append(f"{str(name):<32} {stats['count']:>7} {ms(stats['p50'])} "
+                     f"{ms(stats['p90'])} {ms(stats['p99'])} "
+                     f"{ms(stats['max'])}")
+    if report['errors']:
+        lines += ["", "Errors:"]
+        for error, count in report['errors'].items():
+            lines.append(f"{count:>7}  {error}")
+    if 'peak_rss_kb' in report:
+        rss = report['peak_rss_kb']
+        lines += ["", f"Peak RSS:    {rss['self'] / 1024:.1f} MB "
+                      f"(workers: {rss['children'] / 1024:.1f} MB)"]
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="echoreplay",
+        description="Replay a JSONL file of recorded Alexa events through "
+                    "a skill's handler and report its performance."
+    )
+    parser.add_argument("events", help="JSONL file of recorded events")
+    parser.add_argument("handler", help="Handler to replay through, as "
+                                        "module:attribute (for example, "
+                                        "session:handler)")
+    parser.add_argument("--app-dir", default='.',
+                        help="Directory to import the skill from")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="Worker processes (use 0 for one per core)")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="Target events/second (default: as fast as "
+                             "possible)")
+    parser.add_argument("--warmup", type=int, default=0,
+                        help="Events to replay before measuring")
+    parser.add_argument("--limit", type=int, default=None,
+                        help="Maximum events to replay after warm-up")
+    parser.add_argument("--json", action='store_true',
+                        help="Print the report as JSON")
+    args = parser.parse_args()
+    report = replay(args.events, args.handler, app_dir=args.app_dir,
+                    processes=args.processes or os.cpu_count(),
+                    rate=args.rate, warmup=args.warmup, limit=args.limit)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,24 +1,101 @@
 """Utility to bundle echokit into a lambda function for deployment as ZIP
 
 Deploying an AWS Lambda function using a ZIP archive requires dependencies
-to be included as well. Specifically, this utility copies the specified
-directory tree into a temporary one, adds an *echokit* directory at the
-top level of that structure, copies the current echokit install into that
-directory, and zips it all up.
+to be included as well. Specifically, this utility archives the specified
+directory tree, along with the current echokit install in an *echokit*
+directory at the top level of the archive.
 
 So rather than explicitly creating this directory in a project and possibly
 running into conflicts between that and the version installed via *pip*,
-the installed version will always be copied into the final ZIP.
+the installed version will always be included in the final ZIP (an
+*echokit* directory in the project itself is left out).
+
+Files are read straight from where they are, and compressed on a pool
+of threads. Compressed contents are kept in a :class:`ZipCache` keyed by
+a hash of the file's contents, so files that haven't changed since the
+last build aren't compressed again:
+
+.. code-block:: python
+
+    from echokit.echozip import ZipCache, echozip
+
+    result = echozip("my_skill", output="my_skill.zip",
+                     cache=ZipCache("/tmp/echozip-cache"))
+    print(f"{result.size} bytes, {result.hits} files from the cache")
+
+Archives are reproducible: entries are sorted by name and all have the
+same timestamp and permissions (except for the executable bit), so
+building the same files twice gives byte-for-byte identical archives.
+*__pycache__* directories are left out, since their contents differ from
+one machine (and one run) to the next.
+
+A :class:`Layout` decides what goes in the archive, and how.
+:func:`Layout.cold_start` lays the archive out for fast cold starts: it
+leaves out tests, docs, samples and the like, stores already-compressed
+files (images, archives, ...) without compressing them again, and
+includes bytecode compiled for the target interpreter, so Lambda doesn't
+compile every module on each cold start (its */var/task* is read-only, so
+bytecode it compiles is never saved). Bytecode is written as
+*unchecked-hash* ``.pyc`` files, which don't depend on timestamps and so
+keep the archive reproducible:
+
+.. code-block:: python
+
+    from echokit.echozip import Layout, echozip, report
+
+    result = echozip("my_skill", output="my_skill.zip",
+                     layout=Layout.cold_start(exclude=('fixtures/',)))
+    print(report(result, handler="my_skill.handler"))
+
+Given a *handler*, a layout only includes the modules and data files
+reachable from it (see :mod:`echokit.importgraph`).
 """
-import argparse
-import zipfile
 import echokit
-from os import getcwd, chdir, path, walk
-from shutil import copytree, rmtree
-from datetime import datetime
+import os
+import stat
+import struct
+import threading
+import zlib
+from fnmatch import fnmatchcase
+from os import path
+from .exc import ASKException
+
+#: Timestamp given to every entry (the earliest a ZIP file can hold)
+DATE_TIME = (1980, 1, 1, 0, 0, 0)
+#: Directories left out of the archive
+SKIP_DIRS = frozenset(['__pycache__'])
+#: Patterns left out of cold start bundles (see :class:`Layout`)
+COLD_START_EXCLUDE = (
+    'tests/', 'test/', 'docs/', 'doc/', 'samples/', 'examples/',
+    'test_*.py', '*_test.py', 'conftest.py', '*.pyc', '*.pyo', '.*/', '.*',
+    '*.md', '*.rst', 'setup.py', 'setup.cfg', 'pyproject.toml', 'tox.ini',
+    'requirements*.txt',
+)
+#: Suffixes of files which are already compressed, and are stored in cold
+#: start bundles as they are
+STORE_SUFFIXES = (
+    '.zip', '.gz', '.tgz', '.bz2', '.xz', '.zst', '.whl', '.jar', '.png',
+    '.jpg', '.jpeg', '.gif', '.webp', '.mp3', '.mp4', '.m4a', '.ogg',
+    '.woff', '.woff2', '.pdf',
+)
+
+STORED = 0
+DEFLATED = 8
+
+_DOS_TIME = (DATE_TIME[3] << 11) | (DATE_TIME[4] << 5) | (DATE_TIME[5] // 2)
+_DOS_DATE = ((DATE_TIME[0] - 1980) << 9) | (DATE_TIME[1] << 5) | DATE_TIME[2]
+# UTF-8 entry names
+_FLAGS = 0x800
+# Made by: Unix, ZIP 2.0 (so external attributes are Unix permissions)
+_MADE_BY = (3 << 8) | 20
+_VERSION = 20
+_LIMIT = 0xFFFFFFFF
 
 
 def main():
+    # Imported here rather than at the top of the module, so importing
+    # echokit.echozip stays cheap
+    import argparse
     parser = argparse.ArgumentParser(
         prog="echozip",
         description="Bundles a specified directory and echokit into a ZIP "
@@ -29,50 +106,695 @@ def main():
                "be created in the current working directory."
     )
     parser.add_argument("directory", help='Directory containing your project')
+    parser.add_argument("-o", "--output",
+                        help="Path of the ZIP file to create (default: "
+                             "{directory}_{timestamp}.zip)")
+    parser.add_argument("--cache", default=default_cache_dir(),
+                        help="Directory to cache compressed files in "
+                             "(default: %(default)s)")
+    parser.add_argument("--no-cache", action='store_true',
+                        help="Compress every file, without using the cache")
+    parser.add_argument("-j", "--workers", type=int,
+                        help="Number of files to compress at once "
+                             "(default: number of CPUs)")
+    parser.add_argument("--level", type=int, default=6,
+                        help="Compression level, 0-9 (default: 6)")
+    parser.add_argument("--cold-start", action='store_true',
+                        help="Leave out tests, docs, samples and the like, "
+                             "store compressed files as they are and "
+                             "include bytecode")
+    parser.add_argument("--exclude", action='append', default=[],
+                        metavar='PATTERN', help="Leave out matching files")
+    parser.add_argument("--include", action='append', default=[],
+                        metavar='PATTERN',
+                        help="Keep matching files, even if excluded")
+    parser.add_argument("--python",
+                        help="Interpreter to compile bytecode for, matching "
+                             "the Lambda runtime (default: this one)")
+    parser.add_argument("--optimize", type=int, default=0, choices=(0, 1, 2),
+                        help="Bytecode optimization level (default: 0)")
+    parser.add_argument("--no-sources", action='store_true',
+                        help="Replace compiled .py files with their bytecode")
+    parser.add_argument("--report", action='store_true',
+                        help="Report sizes and import time (always done "
+                             "with --cold-start)")
+    parser.add_argument("--handler",
+                        help="Lambda handler, e.g. session.handler, to "
+                             "time importing for the report (and to start "
+                             "from with --shake)")
+    parser.add_argument("--shake", action='store_true',
+                        help="Only include the modules and data files "
+                             "reachable from --handler, writing a manifest "
+                             "of why each was included")
+    parser.add_argument("--allow", action='append', default=[],
+                        metavar='PATTERN',
+                        help="Include matching modules (or files) with "
+                             "--shake, e.g. for dynamic imports")
     args = parser.parse_args()
-    echozip(args.directory)
+    if args.shake and not args.handler:
+        parser.error("--shake requires --handler")
+    cache = None if args.no_cache else ZipCache(args.cache)
+    options = dict(exclude=args.exclude, include=args.include,
+                   python=args.python, optimize=args.optimize,
+                   sources=not args.no_sources,
+                   handler=args.handler if args.shake else None,
+                   allow=args.allow)
+    # --no-sources only makes sense with bytecode to replace them
+    layout = (Layout.cold_start(**options) if args.cold_start else
+              Layout(precompile=args.no_sources, **options))
+    result = echozip(args.directory, output=args.output, cache=cache,
+                     workers=args.workers, level=args.level, layout=layout)
+    print(f"Created ZIP archive: {result.path} ({len(result.entries)} "
+          f"files, {result.size} bytes, {result.hits} from cache, "
+          f"{result.elapsed:.2f}s)")
+    if result.manifest is not None:
+        print(f"Manifest: {path.splitext(result.path)[0]}.manifest.json")
+        for dynamic in result.manifest.dynamic:
+            print(f"  not followed (see --allow): {dynamic}")
+    if args.cold_start or args.report:
+        print(report(result, args.handler, args.python))
+
+
+def default_cache_dir():
+    """*$XDG_CACHE_HOME/echozip*, or *~/.cache/echozip*"""
+    base = os.environ.get('XDG_CACHE_HOME') or path.join(
+        path.expanduser('~'), '.cache'
+    )
+    return path.join(base, 'echozip')
+
+
+class ZipCache:
+    """Compressed file contents, keyed by a hash of the contents and the
+    compression level
+
+    Entries are kept in memory, and in *directory* (if given) so later
+    builds can reuse them.
+    """
+    def __init__(self, directory=None):
+        """
+
+        :param directory: Directory to keep entries in, created if needed
+        """
+        self.directory = directory
+        #: Number of lookups which found (or didn't find) an entry
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(data, level):
+        """Cache key for the contents of a file"""
+        import hashlib
+        return f"{hashlib.sha256(data).hexdigest()}-{level}"
+
+    def _path(self, key):
+        return path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        """Return a cached entry
+
+        :return: Tuple of the compression method and compressed data, or
+            *None*
+        """
+        entry = self._entries.get(key)
+        if entry is None and self.directory is not None:
+            try:
+                with open(self._path(key), 'rb') as f:
+                    data = f.read()
+            except OSError:
+                pass
+            else:
+                if data:
+                    entry = (data[0], data[1:])
+                    self._entries[key] = entry
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def put(self, key, method, data):
+        """Cache a compressed entry
+
+        :param method: :data:`STORED` or :data:`DEFLATED`
+        :param data: Compressed data (ignored for stored entries, whose
+            data is the file itself)
+        """
+        if method == STORED:
+            data = b''
+        self._entries[key] = (method, data)
+        if self.directory is None:
+            return
+        file_path = self._path(key)
+        os.makedirs(path.dirname(file_path), exist_ok=True)
+        # Write to a temporary file first, so other builds never see a
+        # partly written entry
+        temp = f"{file_path}.{os.getpid()}.{threading.get_ident()}"
+        with open(temp, 'wb') as f:
+            f.write(bytes([method]) + data)
+        os.replace(temp, file_path)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class Entry:
+    """A file in the archive"""
+    __slots__ = ('name', 'mode', 'method', 'crc', 'size',
+                 'compressed_size', 'data')
+
+    def __init__(self, name, mode, method, crc, size, data):
+        #: Name in the archive
+        self.name = name
+        #: Unix permissions
+        self.mode = mode
+        #: :data:`STORED` or :data:`DEFLATED`
+        self.method = method
+        self.crc = crc
+        #: Uncompressed size
+        self.size = size
+        self.compressed_size = len(data)
+        #: Data as written to the archive (*None* once written)
+        self.data = data
+
+
+def compress(name, source, level=6, cache=None, store=()):
+    """Read and compress a file
+
+    Data that doesn't get any smaller is stored uncompressed.
+
+    :param name: Name in the archive
+    :param source: Path of the file
+    :param level: Compression level, 0-9
+    :param cache: :class:`ZipCache` to look compressed data up in (and
+        add it to)
+    :param store: Suffixes of files to store without trying to compress
+        them, such as :data:`STORE_SUFFIXES`
+    :return: :class:`Entry`
+    """
+    with open(source, 'rb') as f:
+        mode = os.fstat(f.fileno()).st_mode
+        raw = f.read()
+    mode = 0o755 if mode & 0o111 else 0o644
+    if store and name.lower().endswith(tuple(store)):
+        return Entry(name, mode, STORED, zlib.crc32(raw), len(raw), raw)
+    key = None if cache is None else cache.key(raw, level)
+    cached = None if key is None else cache.get(key)
+    if cached is not None:
+        method, data = cached
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        data = compressor.compress(raw) + compressor.flush()
+        method = DEFLATED
+        if len(data) >= len(raw):
+            method = STORED
+        if key is not None:
+            cache.put(key, method, data)
+    if method == STORED:
+        data = raw
+    return Entry(name, mode, method, zlib.crc32(raw), len(raw), data)
+
+
+class ZipWriter:
+    """Writes entries which are already compressed to a ZIP file
+
+    :mod:`zipfile` compresses whatever it's given, so it can't reuse
+    cached data. Entries are written exactly as given, with the same
+    timestamp (:data:`DATE_TIME`).
+    """
+    def __init__(self, file):
+        """
+
+        :param file: Binary file object to write to
+        """
+        self._file = file
+        self._offset = 0
+        self._central = []
+
+    def add(self, entry):
+        """Write an :class:`Entry`"""
+        name = entry.name.encode('utf-8')
+        if (len(self._central) >= 0xFFFF or self._offset > _LIMIT or
+                entry.size > _LIMIT):
+            raise ASKException("Archive too large (ZIP64 isn't supported)")
+        header = struct.pack(
+            '<4s5H3L2H', b'PK\x03\x04', _VERSION, _FLAGS, entry.method,
+            _DOS_TIME, _DOS_DATE, entry.crc, len(entry.data), entry.size,
+            len(name), 0
+        )
+        self._central.append(struct.pack(
+            '<4s6H3L5H2L', b'PK\x01\x02', _MADE_BY, _VERSION, _FLAGS,
+            entry.method, _DOS_TIME, _DOS_DATE, entry.crc, len(entry.data),
+            entry.size, len(name), 0, 0, 0, 0,
+            (stat.S_IFREG | entry.mode) << 16, self._offset
+        ) + name)
+        self._file.write(header)
+        self._file.write(name)
+        self._file.write(entry.data)
+        self._offset += len(header) + len(name) + len(entry.data)
+
+    def close(self):
+        """Write the central directory"""
+        central = b''.join(self._central)
+        if self._offset > _LIMIT:
+            raise ASKException("Archive too large (ZIP64 isn't supported)")
+        self._file.write(central)
+        self._file.write(struct.pack(
+            '<4s4H2LH', b'PK\x05\x06', 0, 0, len(self._central),
+            len(self._central), len(central), self._offset, 0
+        ))
+
+
+class Layout:
+    """Which files go in the archive, and how
+
+    Patterns are matched against names in the archive (such as
+    ``echokit/echokit.py``). Patterns ending in ``/`` match directories at
+    any depth (``tests/``), those containing a ``/`` match whole names
+    (``data/*.csv``), and the rest match file names (``*.md``).
+    """
+    def __init__(self, exclude=(), include=(), store=(), precompile=False,
+                 python=None, optimize=0, sources=True, handler=None,
+                 allow=()):
+        """
+
+        :param exclude: Patterns of files to leave out
+        :param include: Patterns of files to keep, even if they match an
+            *exclude* pattern
+        :param store: Suffixes of files to store without compressing them
+        :param precompile: *True* to include bytecode for every ``.py``
+            file
+        :param python: Path of the interpreter to compile bytecode for,
+            matching the Lambda runtime. Defaults to the current one.
+        :param optimize: Optimization level to compile with (*0*, *1* for
+            ``-O`` or *2* for ``-OO``). Lambda only loads optimized
+            bytecode if *PYTHONOPTIMIZE* is set in its environment.
+        :param sources: *False* to leave out ``.py`` files which were
+            compiled, putting the bytecode in their place. Smaller, but
+            tracebacks won't include source lines.
+        :param handler: Lambda handler (such as *session.handler*) to keep
+            only the files reachable from, found by
+            :func:`echokit.importgraph.shake`
+        :param allow: Patterns of modules and files to keep along with
+            those reachable from *handler*, such as modules it imports
+            dynamically
+        """
+        self.exclude = tuple(exclude)
+        self.include = tuple(include)
+        self.store = tuple(store)
+        self.precompile = precompile
+        self.python = python
+        self.optimize = optimize
+        self.sources = sources
+        self.handler = handler
+        self.allow = tuple(allow)
+
+    @classmethod
+    def cold_start(cls, exclude=(), include=(), **kwargs):
+        """Layout for fast cold starts: leaves out
+        :data:`COLD_START_EXCLUDE` (as well as *exclude*), stores
+        :data:`STORE_SUFFIXES` as they are and precompiles bytecode
 
+        :param kwargs: Other :class:`Layout` arguments
+        """
+        kwargs.setdefault('store', STORE_SUFFIXES)
+        kwargs.setdefault('precompile', True)
+        return cls(exclude=COLD_START_EXCLUDE + tuple(exclude),
+                   include=include, **kwargs)
 
-def echozip(directory):
+    def excluded(self, name):
+        """*True* if a file should be left out of the archive
+
+        :param name: Name in the archive
+        """
+        parts = name.split('/')
+        return (any(_match(pattern, name, parts) for pattern in self.exclude)
+                and not any(_match(pattern, name, parts)
+                            for pattern in self.include))
+
+
+def _match(pattern, name, parts):
+    if pattern.endswith('/'):
+        return any(fnmatchcase(part, pattern[:-1]) for part in parts[:-1])
+    if '/' in pattern:
+        return fnmatchcase(name, pattern)
+    return fnmatchcase(parts[-1], pattern)
+
+
+#: Run by the target interpreter to compile sources: reads the files
+#: (name, source path, output path) and optimization level as JSON, and
+#: writes its cache tag and the files which couldn't be compiled
+_COMPILE = """
+import json, py_compile, sys
+files, optimize = json.load(sys.stdin)
+failed = []
+for name, source, output in files:
+    try:
+        py_compile.compile(
+            source, output, dfile=name, doraise=True, optimize=optimize,
+            invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH
+        )
+    except py_compile.PyCompileError as e:
+        failed.append([name, e.msg.strip()])
+json.dump([sys.implementation.cache_tag, failed], sys.stdout)
+"""
+
+
+def precompile(files, directory, python=None, optimize=0, sources=True):
+    """Compile the ``.py`` files to archive to bytecode
+
+    Bytecode is compiled by the target interpreter into *unchecked-hash*
+    ``.pyc`` files, which are loaded without checking that they match
+    their sources (the archive is never modified once deployed).
+
+    :param files: (name in the archive, path) tuples
+    :param directory: Directory to write bytecode to
+    :param python: Path of the interpreter to compile for (defaults to
+        the current one)
+    :param optimize: Optimization level
+    :param sources: *False* to replace sources with their bytecode,
+        rather than adding it in *__pycache__*
+    :return: Tuple of the sorted files, with bytecode added, and a `list`
+        of (name, error) tuples for sources which couldn't be compiled
+    """
+    import json
+    import subprocess
+    import sys
+    modules = [(name, source, path.join(directory, f"{i}.pyc"))
+               for i, (name, source) in enumerate(files)
+               if name.endswith('.py')]
+    if not modules:
+        return sorted(files), []
+    process = subprocess.run(
+        [python or sys.executable, '-I', '-c', _COMPILE],
+        input=json.dumps([modules, optimize]), capture_output=True,
+        text=True
+    )
+    if process.returncode:
+        raise ASKException(f"Couldn't compile bytecode: "
+                           f"{process.stderr.strip()}")
+    tag, failed = json.loads(process.stdout)
+    failed = [tuple(f) for f in failed]
+    skip = {name for name, error in failed}
+    suffix = f".{tag}.opt-{optimize}.pyc" if optimize else f".{tag}.pyc"
+    compiled = {}
+    for name, source, output in modules:
+        if name in skip:
+            continue
+        base, _, module = name.rpartition('/')
+        base = f"{base}/" if base else ''
+        if sources:
+            compiled[f"{base}__pycache__/{module[:-3]}{suffix}"] = output
+        else:
+            compiled[f"{name}c"] = output
+    if not sources:
+        files = [(name, source) for name, source in files
+                 if f"{name}c" not in compiled]
+    return sorted(files + list(compiled.items())), failed
+
+
+class BuildResult:
+    """What :func:`build` wrote"""
+    def __init__(self, path, entries, hits, misses, elapsed):
+        #: Path of the archive
+        self.path = path
+        #: :class:`Entry` for each file, without their data
+        self.entries = entries
+        #: Number of files found in (or missing from) the cache
+        self.hits = hits
+        self.misses = misses
+        #: Seconds taken
+        self.elapsed = elapsed
+        #: (name, error) tuples for sources which couldn't be compiled
+        #: (see :class:`Layout`)
+        self.failed = []
+        #: :class:`echokit.importgraph.Manifest` of why each file was
+        #: included, if the layout has a *handler*
+        self.manifest = None
+
+    @property
+    def size(self):
+        """Size of the archive in bytes"""
+        return path.getsize(self.path)
+
+    def __repr__(self):
+        return (f"BuildResult({self.path!r}, files={len(self.entries)}, "
+                f"hits={self.hits}, misses={self.misses})")
+
+
+def collect(directory, layout=None):
+    """List the files to archive for a project
+
+    :param directory: Project/skill directory
+    :param layout: :class:`Layout` deciding which files to leave out
+    :return: Sorted `list` of (name in the archive, path) tuples
+    """
+    package = path.dirname(path.abspath(echokit.__file__))
+    files = _walk(directory, '', skip=('echokit',))
+    files.extend(_walk(package, 'echokit/'))
+    if layout is not None and layout.exclude:
+        files = [f for f in files if not layout.excluded(f[0])]
+    return sorted(files)
+
+
+def _walk(directory, prefix, skip=()):
+    files = []
+    for root, dirs, names in os.walk(directory):
+        relative = path.relpath(root, directory)
+        base = prefix if relative == '.' else (
+            f"{prefix}{relative.replace(os.sep, '/')}/"
+        )
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS and
+                   not (relative == '.' and d in skip)]
+        files.extend((base + name, path.join(root, name)) for name in names)
+    return files
+
+
+def build(files, output, cache=None, workers=None, level=6, store=()):
+    """Write files to a ZIP archive
+
+    Files are compressed on a pool of threads and written in the order
+    given.
+
+    :param files: (name in the archive, path) tuples, as returned by
+        :func:`collect`
+    :param output: Path of the ZIP file to create
+    :param cache: :class:`ZipCache` to reuse compressed files from
+    :param workers: Number of threads (default: number of CPUs)
+    :param level: Compression level, 0-9
+    :param store: Suffixes of files to store without compressing them
+    :return: :class:`BuildResult`
+    """
+    from collections import deque
+    from concurrent.futures import ThreadPoolExecutor
+    from time import perf_counter
+    started = perf_counter()
+    workers = workers or os.cpu_count() or 1
+    hits, misses = (cache.hits, cache.misses) if cache else (0, 0)
+    entries = []
+    temp = f"{output}.tmp"
+    try:
+        with open(temp, 'wb') as f, ThreadPoolExecutor(workers) as pool:
+            writer = ZipWriter(f)
+            pending = deque()
+            for name, source in files:
+                pending.append(pool.submit(compress, name, source, level,
+                                           cache, store))
+                # Only keep a few compressed files in memory at once
+                if len(pending) >= workers * 4:
+                    entries.append(_write(writer, pending.popleft()))
+            while pending:
+                entries.append(_write(writer, pending.popleft()))
+            writer.close()
+        os.replace(temp, output)
+    finally:
+        if path.exists(temp):
+            os.remove(temp)
+    if cache is not None:
+        hits, misses = cache.hits - hits, cache.misses - misses
+    return BuildResult(output, entries, hits, misses,
+                       perf_counter() - started)
+
+
+def _write(writer, future):
+    entry = future.result()
+    writer.add(entry)
+    entry.data = None
+    return entry
+
+
+def echozip(directory, output=None, cache=None, workers=None, level=6,
+            layout=None):
     """Create ZIP file packaged with echokit
 
     :param directory: Project/skill directory
-    :return:
+    :param output: Path of the ZIP file to create. Defaults to
+        *{directory}_{timestamp}.zip* in the current directory.
+    :param cache: :class:`ZipCache` to reuse compressed files from
+    :param workers: Number of threads to compress files on
+    :param level: Compression level, 0-9
+    :param layout: :class:`Layout` of the archive, such as
+        :func:`Layout.cold_start`. By default, everything in the project
+        is included. With a *handler*, only the files it needs are, and
+        a manifest of why is written next to the archive, to
+        *{output}.manifest.json* (without the *.zip*).
+    :return: :class:`BuildResult`
     """
     if not path.isdir(directory):
         raise NotADirectoryError(f"Invalid path: {directory}")
-    cwd = getcwd()
-    proj_dir = path.basename(path.abspath(directory))
-    timestamp = datetime.now().strftime("%d-%m-%y-%H%M%S")
-    proj_base = f"{proj_dir}_{timestamp}"
-    zip_dir = path.join(cwd, proj_base)
-    zip_file_path = path.join(cwd, f"{proj_base}.zip")
-
-    if path.exists(zip_dir):
-        raise IsADirectoryError(f"Directory already exists! {zip_dir}")
-    if path.exists(zip_file_path):
-        raise FileExistsError(f"File exists!: {zip_file_path}")
-
-    # Copy the full project directory tree into the temporary directory
-    print(f"Copying project to temporary directory: {zip_dir}")
-    copytree(directory, zip_dir)
-    copytree(path.dirname(echokit.__file__), path.join(zip_dir, 'echokit'))
-
-    # Create the ZIP archive, cd into the temporary directory, then
-    # recursively add the entire tree to the ZIP
-    print(f"Creating: {zip_file_path}")
-    zip_file = zipfile.ZipFile(zip_file_path, 'w', zipfile.ZIP_DEFLATED)
-    chdir(zip_dir)
-    for root, dirs, files in walk(zip_dir):
-        for file in files:
-            out_path = path.join(path.relpath(path.join(root), getcwd()), file)
-            print(f"Writing: {out_path}")
-            zip_file.write(out_path)
-    zip_file.close()
-    print(f"Cleaning up, removing temporary directory: {zip_dir}")
-    chdir(cwd)
-    rmtree(zip_dir)
-    print("Done! Created ZIP archive: {zip_file_path}")
+    if output is None:
+        from datetime import datetime
+        proj_dir = path.basename(path.abspath(directory))
+        timestamp = datetime.now().strftime("%d-%m-%y-%H%M%S")
+        output = path.join(os.getcwd(), f"{proj_dir}_{timestamp}.zip")
+    if path.exists(output):
+        raise FileExistsError(f"File exists!: {output}")
+    layout = layout or Layout()
+    files = collect(directory, layout)
+    manifest = None
+    if layout.handler:
+        from .importgraph import shake
+        manifest = shake(files, layout.handler, layout.allow)
+        files = manifest.select(files)
+    from tempfile import TemporaryDirectory
+    with TemporaryDirectory(prefix='echozip-') as temp:
+        failed = []
+        if layout.precompile:
+            files, failed = precompile(files, temp, layout.python,
+                                       layout.optimize, layout.sources)
+        result = build(files, output, cache=cache, workers=workers,
+                       level=level, store=layout.store)
+    result.failed = failed
+    if manifest is not None:
+        _add_bytecode(manifest, [name for name, source in files])
+        manifest.write(f"{path.splitext(output)[0]}.manifest.json")
+        result.manifest = manifest
+    return result
+
+
+def _add_bytecode(manifest, names):
+    """Add the bytecode added by :func:`precompile` to a manifest"""
+    included = set(names)
+    for name in names:
+        if name in manifest.files or not name.endswith('.pyc'):
+            continue
+        directory, _, module = name.rpartition('/')
+        if directory.endswith('__pycache__'):
+            directory = directory[:-len('__pycache__')]
+            source = f"{directory}{module.partition('.')[0]}.py"
+        else:
+            source = name[:-1]
+        reasons = [f"bytecode of {source}"]
+        if source not in included:
+            # Replaced by its bytecode
+            reasons.extend(manifest.files.pop(source, []))
+        manifest.files[name] = reasons
+
+
+#: Run by the target interpreter in an extracted archive: imports the
+#: handler's module and prints how long that took (in ms)
+_IMPORT = """
+import sys
+from importlib import import_module
+from time import perf_counter
+sys.path.insert(0, sys.argv[1])
+started = perf_counter()
+module = import_module(sys.argv[2])
+elapsed = perf_counter() - started
+if sys.argv[3]:
+    getattr(module, sys.argv[3])
+print(elapsed * 1e3)
+"""
+
+
+class Report:
+    """Sizes of an archive, and how long its handler takes to import"""
+    def __init__(self, result, module, import_times):
+        #: :class:`BuildResult` measured
+        self.result = result
+        #: Size of the archive in bytes
+        self.size = result.size
+        #: Total size of the files in it, uncompressed
+        self.uncompressed = sum(entry.size for entry in result.entries)
+        #: Number of ``.pyc`` files
+        self.bytecode = sum(entry.name.endswith('.pyc')
+                            for entry in result.entries)
+        #: `dict` of top-level files and directories to the bytes they
+        #: take up in the archive
+        self.sizes = {}
+        for entry in result.entries:
+            top, slash, _ = entry.name.partition('/')
+            key = top + slash
+            self.sizes[key] = self.sizes.get(key, 0) + entry.compressed_size
+        #: Module imported
+        self.module = module
+        #: Milliseconds taken to import it, for each run
+        self.import_times = import_times
+
+    @property
+    def import_ms(self):
+        """Median milliseconds taken to import the handler's module"""
+        import statistics
+        return statistics.median(self.import_times)
+
+    def __str__(self):
+        lines = [f"{self.result.path}: {len(self.result.entries)} files, "
+                 f"{_kb(self.size)} ({_kb(self.uncompressed)} uncompressed)",
+                 f"  bytecode: {self.bytecode} .pyc files"]
+        lines.extend(f"  couldn't compile {name}: {error}"
+                     for name, error in self.result.failed)
+        largest = sorted(self.sizes.items(), key=lambda i: (-i[1], i[0]))
+        width = max(len(name) for name, size in largest[:5])
+        lines.extend(f"  {name:<{width}} {_kb(size):>10}"
+                     for name, size in largest[:5])
+        lines.append(f"  import {self.module}: {self.import_ms:.2f} ms "
+                     f"(median of {len(self.import_times)} runs)")
+        return '\n'.join(lines)
+
+
+def _kb(size):
+    return f"{size / 1024:.1f} KB"
+
+
+def report(result, handler=None, python=None, runs=5):
+    """Measure an archive built by :func:`echozip`
+
+    The archive is extracted to a temporary directory, and the module of
+    its handler imported there by *runs* fresh interpreters, which don't
+    write bytecode (much like Lambda, whose */var/task* is read-only).
+
+    :param result: :class:`BuildResult`
+    :param handler: Handler as given to Lambda, such as
+        *session.handler*. Defaults to timing ``import echokit``.
+    :param python: Path of the interpreter to import with (defaults to
+        the current one)
+    :param runs: Number of imports to take the median of
+    :return: :class:`Report`
+    """
+    import subprocess
+    import sys
+    import zipfile
+    from tempfile import TemporaryDirectory
+    if handler:
+        module, _, attribute = handler.rpartition('.')
+    else:
+        module, attribute = 'echokit', ''
+    times = []
+    with TemporaryDirectory(prefix='echozip-') as temp:
+        with zipfile.ZipFile(result.path) as archive:
+            archive.extractall(temp)
+        for _ in range(runs):
+            process = subprocess.run(
+                [python or sys.executable, '-I', '-B', '-c', _IMPORT, temp,
+                 module, attribute], cwd=temp, capture_output=True, text=True
+            )
+            if process.returncode:
+                raise ASKException(f"Couldn't import {handler or module}: "
+                                   f"{process.stderr.strip()}")
+            times.append(float(process.stdout))
+    return Report(result, module, times)
 
 
 if __name__ == '__main__':
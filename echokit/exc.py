@@ -4,3 +4,23 @@
 class ASKException(Exception):
     """General echokit exception"""
     pass
+
+
+class RequestRejected(ASKException):
+    """An incoming event was rejected before being parsed or handled"""
+    #: Event is missing fields needed to dispatch it
+    MALFORMED = 'malformed'
+    #: Event is for another application ID
+    APP_ID = 'app_id'
+    #: No handler is registered for the request
+    UNHANDLED = 'unhandled'
+
+    def __init__(self, code, message):
+        """
+
+        :param code: Why the event was rejected: :attr:`MALFORMED`,
+            :attr:`APP_ID` or :attr:`UNHANDLED`
+        :param message:
+        """
+        super().__init__(message)
+        self.code = code
@@ -0,0 +1,239 @@
+"""Calling several backends in parallel, within a deadline
+
+:func:`echokit.EchoKit.fan_out` runs a set of calls at once on a shared
+thread pool (created on first use and reused by warm invocations), and
+waits for them until a deadline: the time left in the Lambda invocation
+(less a safety margin), or a fixed budget outside Lambda. Calls which
+haven't finished by then are abandoned, so the handler can still answer
+in time with whatever did finish:
+
+.. code-block:: python
+
+    @app.intent("BriefingIntent")
+    def briefing(request, session):
+        result = app.fan_out(
+            {'weather': weather.today, 'news': news.headlines},
+            fallback=lambda result: app.response("Sorry, try again later"),
+        )
+        if result.response is not None:
+            return result.response
+        return app.response(f"{result['weather']} {result['news']}")
+
+Python threads can't be stopped, so calls which are already running
+when the deadline passes carry on in the background (their results are
+discarded), while those that haven't started are cancelled. Calls can
+check :func:`current_deadline` to give up early, or pass its
+:func:`Deadline.remaining` on as a timeout to their own clients. So
+that calls which hang don't take up the shared pool for good, it's
+replaced with a new one once too few of its threads are free.
+
+:func:`fan_out` blocks while it waits. Async handlers should await
+:func:`fan_out_async` (:func:`echokit.EchoKit.fan_out_async`) instead,
+which leaves the event loop free.
+"""
+import threading
+from contextvars import ContextVar, copy_context
+from time import monotonic
+
+#: Number of threads in the shared pool
+WORKERS = 16
+
+_executor = None
+_executor_lock = threading.Lock()
+# Calls the shared pool's threads are stuck in, past their deadline
+_stuck = set()
+_deadline = ContextVar('echokit_fan_out_deadline', default=None)
+
+
+def executor():
+    """Return the shared :class:`concurrent.futures.ThreadPoolExecutor`"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+                _executor = ThreadPoolExecutor(
+                    WORKERS, thread_name_prefix='echokit-fan-out'
+                )
+    return _executor
+
+
+def _shared_executor(calls):
+    """Return the shared pool, replacing it first if too many of its
+    threads are stuck in abandoned calls to run *calls* calls at once
+    """
+    global _executor
+    with _executor_lock:
+        if _stuck and WORKERS - len(_stuck) < min(calls, WORKERS):
+            # The old pool's threads exit as their calls finish
+            _executor.shutdown(wait=False)
+            _executor = None
+            _stuck.clear()
+    return executor()
+
+
+def _abandon(future, pool):
+    """Note a call left running past its deadline"""
+    if pool is not _executor:
+        return
+    with _executor_lock:
+        if pool is _executor and not future.done():
+            _stuck.add(future)
+    future.add_done_callback(_stuck.discard)
+
+
+class Deadline:
+    """When calls made by :func:`fan_out` have to finish by"""
+    __slots__ = ('expires', '_cancelled')
+
+    def __init__(self, timeout):
+        """
+
+        :param timeout: Seconds from now
+        """
+        self.expires = monotonic() + max(timeout, 0)
+        self._cancelled = threading.Event()
+
+    def remaining(self):
+        """Seconds left before the deadline (never negative)"""
+        return max(self.expires - monotonic(), 0.0)
+
+    @property
+    def cancelled(self):
+        """*True* once the deadline has passed and results are no
+        longer wanted
+        """
+        return self._cancelled.is_set() or monotonic() >= self.expires
+
+    def cancel(self):
+        self._cancelled.set()
+
+
+def current_deadline():
+    """Return the :class:`Deadline` of the fan-out the current call is
+    part of, or *None* outside of one
+    """
+    return _deadline.get()
+
+
+class FanOutResult:
+    """Results of the calls made by :func:`fan_out`
+
+    Index it by call name to get a result (raising :exc:`KeyError` for
+    calls that failed or didn't finish in time).
+    """
+    def __init__(self, results, errors, timed_out, elapsed):
+        #: `dict` of call names to results, for calls that succeeded
+        self.results = results
+        #: `dict` of call names to the exceptions they raised
+        self.errors = errors
+        #: Names of calls which didn't finish in time
+        self.timed_out = frozenset(timed_out)
+        #: Seconds spent waiting for the calls
+        self.elapsed = elapsed
+        #: Response from the *fallback* given to :func:`fan_out`, if it
+        #: was used
+        self.response = None
+
+    @property
+    def complete(self):
+        """*True* if every call succeeded in time"""
+        return not self.errors and not self.timed_out
+
+    def __getitem__(self, name):
+        return self.results[name]
+
+    def __contains__(self, name):
+        return name in self.results
+
+    def get(self, name, default=None):
+        return self.results.get(name, default)
+
+    def __repr__(self):
+        return (f"FanOutResult(results={sorted(self.results)}, "
+                f"errors={sorted(self.errors)}, "
+                f"timed_out={sorted(self.timed_out)})")
+
+
+def fan_out(calls, timeout, required=None, fallback=None, pool=None):
+    """Run calls concurrently, waiting for them until a deadline
+
+    Blocks until the calls finish or the deadline passes, so don't call
+    it from a coroutine (an async handler, under
+    :func:`echokit.EchoKit.handle_async` or ``echoserve``): that stalls
+    the event loop. Await :func:`fan_out_async` there instead.
+
+    :param calls: `dict` of names to callables taking no arguments
+    :param timeout: Seconds to wait for the calls
+    :param required: Names of the calls the response can't do without.
+        Defaults to all of them.
+    :param fallback: Function called with the :class:`FanOutResult` if
+        any required call failed or timed out, returning a
+        :class:`echokit.response.Response` to answer with instead. Its
+        return value is set as :attr:`FanOutResult.response`.
+    :param pool: :class:`concurrent.futures.Executor` to run the calls
+        in, instead of the shared pool
+    :return: :class:`FanOutResult`
+    """
+    from concurrent.futures import wait
+    started = monotonic()
+    deadline, pool, futures = _submit(calls, timeout, pool)
+    # Calls still running at the deadline have timed out, even if they
+    # finish while the results are being gathered
+    _, late = wait(futures.values(), timeout=deadline.remaining())
+    return _gather(futures, late, deadline, pool, started, required, fallback)
+
+
+async def fan_out_async(calls, timeout, required=None, fallback=None,
+                        pool=None):
+    """Coroutine equivalent of :func:`fan_out`, for async handlers
+
+    The calls still run on the thread pool, but the event loop is free
+    to run other requests while they're awaited.
+    """
+    import asyncio
+    started = monotonic()
+    deadline, pool, futures = _submit(calls, timeout, pool)
+    late = set()
+    if futures:
+        awaited = {asyncio.wrap_future(future): future
+                   for future in futures.values()}
+        _, pending = await asyncio.wait(awaited, timeout=deadline.remaining())
+        late = {awaited[future] for future in pending}
+    return _gather(futures, late, deadline, pool, started, required, fallback)
+
+
+def _submit(calls, timeout, pool):
+    deadline = Deadline(timeout)
+    pool = pool or _shared_executor(len(calls))
+    futures = {}
+    for name, call in calls.items():
+        # Each call gets a copy of the current context, so handlers'
+        # request context (and the deadline) are available to it
+        context = copy_context()
+        context.run(_deadline.set, deadline)
+        futures[name] = pool.submit(context.run, call)
+    return deadline, pool, futures
+
+
+def _gather(futures, late, deadline, pool, started, required, fallback):
+    deadline.cancel()
+    results = {}
+    errors = {}
+    timed_out = []
+    for name, future in futures.items():
+        if future in late:
+            if not future.cancel():
+                _abandon(future, pool)
+            timed_out.append(name)
+        elif future.cancelled():
+            timed_out.append(name)
+        elif future.exception() is not None:
+            errors[name] = future.exception()
+        else:
+            results[name] = future.result()
+    result = FanOutResult(results, errors, timed_out, monotonic() - started)
+    required = futures if required is None else required
+    if fallback is not None and any(name not in results for name in required):
+        result.response = fallback(result)
+    return result
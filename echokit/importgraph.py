@@ -0,0 +1,424 @@
+"""Finding the files a skill's handler needs
+
+:func:`shake` follows imports statically (with :mod:`ast`, without
+running anything) from the module of a Lambda handler, such as
+*session.handler* for *samples/session*, through the files to be
+bundled. Only the modules it reaches are kept, along with data files
+those modules use, and a :class:`Manifest` records why each file was
+kept:
+
+.. code-block:: python
+
+    from echokit.echozip import collect
+    from echokit.importgraph import shake
+
+    manifest = shake(collect("samples/session"), "session.handler")
+    for name, reasons in manifest.files.items():
+        print(name, reasons[0])
+
+Imports are followed wherever they are, including inside functions and
+``if`` blocks, as are ``importlib.import_module()`` and ``__import__()``
+calls with literal module names. Lazily loaded names in a package's
+``__init__.py`` (a module ``__getattr__``, with a `dict` of names to
+the submodules defining them, like echokit's own) are followed too:
+the submodule for each name imported with ``from package import name``,
+and all of them if the package itself is imported (``import package``),
+since any of them may then be used as attributes.
+Other dynamic imports can't be followed: they're listed in
+:attr:`Manifest.dynamic`, and the modules they load need to be given in
+*allow*.
+
+Data files are kept if they're in a package (a directory with an
+``__init__.py``) that's kept, or if a kept module mentions their name
+(or the name of a directory containing them) in a string, relative to
+the module's directory or to the top of the bundle, such as
+``path.join(path.dirname(__file__), "messages")``.
+"""
+import ast
+from collections import deque
+from fnmatch import fnmatchcase
+
+#: Functions whose first (literal) argument is the name of a module to
+#: import
+IMPORT_FUNCTIONS = frozenset(['import_module', '__import__'])
+
+
+class Manifest:
+    """Files kept by :func:`shake`, and why"""
+    def __init__(self, entry):
+        #: Handler the analysis started from
+        self.entry = entry
+        #: `dict` of file names to a `list` of reasons they were kept
+        self.files = {}
+        #: Top-level modules imported but not in the bundle (the standard
+        #: library, or packages installed in the Lambda runtime)
+        self.external = set()
+        #: Dynamic imports which couldn't be followed
+        self.dynamic = []
+
+    def add(self, name, reason):
+        """Keep a file
+
+        :return: *True* if it wasn't already kept
+        """
+        reasons = self.files.get(name)
+        if reasons is None:
+            self.files[name] = [reason]
+            return True
+        if reason not in reasons:
+            reasons.append(reason)
+        return False
+
+    def select(self, files):
+        """Return the (name, path) tuples for the files kept"""
+        return [(name, source) for name, source in files
+                if name in self.files]
+
+    def as_dict(self):
+        return {
+            'entry': self.entry,
+            'files': {name: self.files[name] for name in sorted(self.files)},
+            'external': sorted(self.external),
+            'dynamic': self.dynamic,
+        }
+
+    def write(self, file_path):
+        """Write the manifest as JSON"""
+        import json
+        with open(file_path, 'w') as f:
+            json.dump(self.as_dict(), f, indent=2)
+            f.write('\n')
+
+    def __repr__(self):
+        return (f"Manifest({self.entry!r}, files={len(self.files)}, "
+                f"dynamic={len(self.dynamic)})")
+
+
+class ImportGraph:
+    """Modules and data files among the files to be bundled"""
+    def __init__(self, files):
+        """
+
+        :param files: (name in the archive, path) tuples
+        """
+        self.files = dict(files)
+        #: `dict` of module names to file names
+        self.modules = {}
+        #: Names of packages' directories (with a trailing */*)
+        self.packages = set()
+        for name in self.files:
+            module = module_name(name)
+            if module:
+                self.modules[module] = name
+                if name.endswith('/__init__.py'):
+                    self.packages.add(name[:-len('__init__.py')])
+        self._parsed = {}
+
+    def parse(self, name):
+        """Imports, lazily loaded names and strings in a module
+
+        :param name: File name of the module
+        :return: Tuple of a `list` of (module, line, detail) imports,
+            a `dict` of lazily loaded names to modules, and a `list` of
+            (string, line) tuples
+        """
+        parsed = self._parsed.get(name)
+        if parsed is None:
+            parsed = self._parsed[name] = self._parse(name)
+        return parsed
+
+    def _parse(self, name):
+        with open(self.files[name], 'rb') as f:
+            try:
+                tree = ast.parse(f.read(), name)
+            except (SyntaxError, ValueError):
+                return [], {}, []
+        module = module_name(name)
+        package = module if name.endswith('__init__.py') else (
+            module.rpartition('.')[0]
+        )
+        lazy = _lazy_names(tree, package)
+        imports = []
+        strings = []
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                imports.extend((alias.name, node.lineno, 'import')
+                               for alias in node.names)
+            elif isinstance(node, ast.ImportFrom):
+                base = _resolve(node.module or '', node.level, package)
+                if base is None:
+                    continue
+                imports.append((base, node.lineno, None))
+                for alias in node.names:
+                    if alias.name != '*':
+                        imports.append((f"{base}.{alias.name}" if base else
+                                        alias.name, node.lineno, 'from'))
+            elif isinstance(node, ast.Call) and _is_import_call(node):
+                target = _import_call_target(node, module, package)
+                if target is not None:
+                    imports.append((target, node.lineno, 'call'))
+                elif lazy:
+                    imports.append((None, node.lineno,
+                                    f"{_source(node)} (its lazily loaded "
+                                    f"names are followed)"))
+                else:
+                    imports.append((None, node.lineno, _source(node)))
+            elif _is_str(node):
+                strings.append((_string(node), getattr(node, 'lineno', 0)))
+        return imports, lazy, strings
+
+    def data_files(self, name, strings):
+        """Data files mentioned by a module's strings
+
+        :return: `list` of (file name, string, line) tuples
+        """
+        directory = name.rpartition('/')[0]
+        found = []
+        for value, line in strings:
+            value = value.replace('\\', '/').strip().strip('/')
+            if value.startswith('./'):
+                value = value[2:]
+            if not value or not any(c.isalnum() for c in value) or \
+                    '\n' in value or len(value) > 255:
+                continue
+            candidates = [value]
+            if directory:
+                candidates.insert(0, f"{directory}/{value}")
+            for candidate in candidates:
+                found.extend((match, value, line)
+                             for match in self._data_under(candidate))
+        return found
+
+    def _data_under(self, candidate):
+        if candidate in self.files:
+            return [] if candidate.endswith('.py') else [candidate]
+        prefix = f"{candidate}/"
+        if prefix in self.packages:
+            return []
+        return [name for name in self.files if name.startswith(prefix) and
+                not name.endswith('.py')]
+
+    def package_data(self, name):
+        """Data files in a package's directory (and its directories which
+        aren't packages themselves)
+        """
+        directory = name[:-len('__init__.py')]
+        found = []
+        for other in self.files:
+            if other.startswith(directory) and not other.endswith('.py'):
+                # Skip files belonging to a subpackage
+                parent = other.rpartition('/')[0] + '/'
+                while parent != directory and parent not in self.packages:
+                    parent = parent[:-1].rpartition('/')[0] + '/'
+                if parent == directory:
+                    found.append(other)
+        return found
+
+
+def module_name(name):
+    """Module name for a file name in the archive, or *None*
+
+    >>> module_name('echokit/echokit.py')
+    'echokit.echokit'
+    """
+    if not name.endswith('.py'):
+        return None
+    parts = name[:-3].split('/')
+    if parts[-1] == '__init__':
+        parts.pop()
+    if not parts or not all(part.isidentifier() for part in parts):
+        return None
+    return '.'.join(parts)
+
+
+def _resolve(module, level, package):
+    """Absolute name of a (possibly relative) import, or *None*"""
+    if not level:
+        return module
+    parts = package.split('.') if package else []
+    if level - 1 > len(parts):
+        return None
+    base = parts[:len(parts) - (level - 1)]
+    return '.'.join(base + ([module] if module else []))
+
+
+def _is_import_call(node):
+    func = node.func
+    name = func.attr if isinstance(func, ast.Attribute) else (
+        func.id if isinstance(func, ast.Name) else None
+    )
+    return name in IMPORT_FUNCTIONS
+
+
+def _import_call_target(node, module, package):
+    """Module imported by an import_module()/__import__() call, if it's
+    given literally
+    """
+    if not node.args or not _is_str(node.args[0]):
+        return None
+    target = _string(node.args[0])
+    if not target.startswith('.'):
+        return target
+    anchor = node.args[1] if len(node.args) > 1 else next(
+        (k.value for k in node.keywords if k.arg == 'package'), None
+    )
+    if _is_str(anchor):
+        anchor = _string(anchor)
+    elif isinstance(anchor, ast.Name) and anchor.id == '__name__':
+        anchor = module
+    elif isinstance(anchor, ast.Name) and anchor.id == '__package__':
+        anchor = package
+    else:
+        return None
+    level = len(target) - len(target.lstrip('.'))
+    return _resolve(target[level:], level, anchor)
+
+
+def _source(node):
+    """Source code of a call, for the manifest"""
+    if hasattr(ast, 'unparse'):
+        return ast.unparse(node)
+    func = node.func
+    return f"{func.attr if isinstance(func, ast.Attribute) else func.id}(...)"
+
+
+def _string(node):
+    """Value of a string literal, or *None*
+
+    Python 3.7 parses string literals as ``ast.Str`` (with the value in
+    *s*), later versions as ``ast.Constant``.
+    """
+    if isinstance(node, ast.Constant):
+        value = node.value
+    elif type(node).__name__ == 'Str':
+        value = node.s
+    else:
+        return None
+    return value if isinstance(value, str) else None
+
+
+def _is_str(node):
+    return _string(node) is not None
+
+
+def _lazy_names(tree, package):
+    """Names a package loads lazily through a module ``__getattr__``
+
+    :return: `dict` of names to the modules defining them
+    """
+    body = tree.body
+    if not any(isinstance(node, ast.FunctionDef) and
+               node.name == '__getattr__' for node in body):
+        return {}
+    lazy = {}
+    for node in body:
+        if isinstance(node, ast.Assign) and isinstance(node.value, ast.Dict):
+            items = list(zip(node.value.keys, node.value.values))
+            if items and all(_is_str(k) and _is_str(v) for k, v in items):
+                for key, value in items:
+                    value = _string(value).lstrip('.')
+                    lazy[_string(key)] = (f"{package}.{value}" if package
+                                       else value)
+    return lazy
+
+
+def shake(files, entry, allow=()):
+    """Find the files reachable from a handler
+
+    :param files: (name in the archive, path) tuples, as returned by
+        :func:`echokit.echozip.collect`
+    :param entry: Handler as given to Lambda (*session.handler*), or just
+        its module
+    :param allow: Patterns of module names (``echokit.server``,
+        ``skill.plugins.*``) or file names (``data/*.json``) to keep
+        regardless, for modules imported dynamically and data files
+        found some other way. Modules kept are followed like the rest.
+    :return: :class:`Manifest`
+    """
+    graph = ImportGraph(files)
+    manifest = Manifest(entry)
+    module = entry if entry in graph.modules else entry.rpartition('.')[0]
+    if module not in graph.modules:
+        from .exc import ASKException
+        raise ASKException(f"Handler module not found: {module!r}")
+    queue = deque()
+
+    def keep(module, reason):
+        name = graph.modules[module]
+        if manifest.add(name, reason):
+            queue.append(name)
+            # Importing a module imports its parent packages first
+            parent = module.rpartition('.')[0]
+            while parent:
+                if parent in graph.modules:
+                    if graph.modules[parent] not in manifest.files:
+                        keep(parent, f"parent package of {name}")
+                    break
+                parent = parent.rpartition('.')[0]
+
+    keep(module, f"entry point ({entry})")
+    for pattern in allow:
+        for allowed in sorted(graph.modules):
+            if fnmatchcase(allowed, pattern):
+                keep(allowed, f"allowed ({pattern})")
+        for name in sorted(graph.files):
+            if not name.endswith('.py') and fnmatchcase(name, pattern):
+                manifest.add(name, f"allowed ({pattern})")
+
+    while queue:
+        name = queue.popleft()
+        imports, _, strings = graph.parse(name)
+        for target, line, detail in imports:
+            where = f"{name}:{line}"
+            if target is None:
+                manifest.dynamic.append(f"{where}: {detail}")
+                continue
+            if detail == 'import':
+                # The imported packages are bound to names, so any of
+                # their lazily loaded names may be used as attributes
+                package = ''
+                for part in target.split('.'):
+                    package = f"{package}.{part}" if package else part
+                    for attribute, lazy in sorted(
+                            _lazy_of(graph, package).items()):
+                        if lazy in graph.modules:
+                            keep(lazy, f"loaded lazily as {package}."
+                                       f"{attribute}, {package} being "
+                                       f"imported by {where}")
+            if target in graph.modules:
+                reason = f"imported by {where}"
+                if detail == 'call':
+                    reason += " (dynamically, with a literal name)"
+                keep(target, reason)
+            elif detail == 'from':
+                # A name imported from a module, rather than a submodule
+                base, _, attribute = target.rpartition('.')
+                lazy = _lazy_of(graph, base)
+                if lazy.get(attribute) in graph.modules:
+                    keep(lazy[attribute], f"imported by {where} "
+                                          f"({target}, loaded lazily)")
+            else:
+                # Importing a name which isn't a module of its own (such
+                # as os.path) imports the module it's in
+                parent = target.rpartition('.')[0]
+                while parent and parent not in graph.modules:
+                    parent = parent.rpartition('.')[0]
+                if parent:
+                    keep(parent, f"imported by {where}")
+                elif not any(m.startswith(f"{target.partition('.')[0]}.")
+                             for m in graph.modules):
+                    manifest.external.add(target.partition('.')[0])
+        if name.endswith('__init__.py'):
+            for data in graph.package_data(name):
+                manifest.add(data, f"data file of package "
+                                   f"{module_name(name)}")
+        for data, value, line in graph.data_files(name, strings):
+            manifest.add(data, f"mentioned by {name}:{line} ({value!r})")
+    return manifest
+
+
+def _lazy_of(graph, module):
+    """Names a module in the graph loads lazily"""
+    if module not in graph.modules:
+        return {}
+    return graph.parse(graph.modules[module])[1]
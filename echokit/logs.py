@@ -0,0 +1,130 @@
+"""Structured logging of requests and responses
+
+:class:`RequestLogger` writes one compact JSON line per request handled
+by :class:`echokit.EchoKit`. Nothing is serialized unless the record
+will actually be emitted: if the logger isn't enabled for the level, or
+the request isn't sampled, logging costs a level check and (at most) a
+random number.
+
+For example, to log a summary of 10% of requests:
+
+.. code-block:: python
+
+    import logging
+    from echokit import EchoKit
+    from echokit.logs import RequestLogger
+
+    logging.getLogger('echokit').setLevel(logging.INFO)
+    app = EchoKit("my_app_id",
+                  request_logger=RequestLogger(sample_rate=0.1, summary=True))
+"""
+import json
+import logging
+
+#: Fields redacted by default, as dotted paths into the logged record
+DEFAULT_REDACT = (
+    'event.session.user.accessToken',
+    'event.context.System.apiAccessToken',
+    'event.context.System.user.accessToken',
+    'event.context.System.user.permissions.consentToken',
+)
+
+#: Value logged in place of redacted fields
+REDACTED = '[REDACTED]'
+
+
+def _random():
+    # Imported on first use, since most apps don't sample
+    from random import random
+    return random()
+
+
+class RequestLogger:
+    """Logs requests handled by :class:`echokit.EchoKit` as JSON lines"""
+    def __init__(self, logger=None, level=logging.INFO, sample_rate=1.0,
+                 summary=False, redact=DEFAULT_REDACT):
+        """
+
+        :param logger: :class:`logging.Logger` to write to. Defaults
+            to the *echokit.echokit* logger.
+        :param level: Level to log records at
+        :param sample_rate: Fraction (0 to 1) of requests to log
+        :type sample_rate: float
+        :param summary: If *True*, only log the request ID, request
+            type, intent name and latency. If *False*, also include
+            the full event and response.
+        :type summary: bool
+        :param redact: Dotted paths of fields to redact from the full
+            record, such as *event.context.System.apiAccessToken*. Paths
+            start with *event* or *response*.
+        """
+        self.logger = logger or logging.getLogger('echokit.echokit')
+        self.level = level
+        self.sample_rate = sample_rate
+        self.summary = summary
+        self.redact = [p.split('.') for p in redact]
+
+    def log(self, event, context, response, latency):
+        """Log a handled request, if enabled and sampled
+
+        :param event: The raw incoming event
+        :param context: Context object passed to the Lambda handler
+        :param response: The serialized response
+        :type response: dict
+        :param latency: Seconds taken to handle the request
+        :type latency: float
+        """
+        if not self.logger.isEnabledFor(self.level):
+            return
+        if self.sample_rate < 1 and _random() >= self.sample_rate:
+            return
+        self.logger.log(self.level, '%s',
+                        _Record(self, event, context, response, latency))
+
+    def record(self, event, context, response, latency):
+        """Build the `dict` that gets logged for a request"""
+        request = event.get('request') or {}
+        record = {
+            'requestId': request.get('requestId'),
+            'type': request.get('type'),
+            'intent': (request.get('intent') or {}).get('name'),
+            'latencyMs': round(latency * 1000, 3),
+        }
+        if self.summary:
+            return record
+        record['awsRequestId'] = getattr(context, 'aws_request_id', None)
+        record['event'] = event
+        record['response'] = response
+        for path in self.redact:
+            record = _redact(record, path)
+        return record
+
+
+class _Record:
+    """Log message which is only serialized if it's emitted"""
+    __slots__ = ('logger', 'args')
+
+    def __init__(self, logger, *args):
+        self.logger = logger
+        self.args = args
+
+    def __str__(self):
+        return json.dumps(self.logger.record(*self.args),
+                          separators=(',', ':'), default=str)
+
+
+def _redact(obj, path):
+    """Return *obj* with the field at *path* replaced by :data:`REDACTED`
+
+    Only the objects along *path* are copied, everything else is shared
+    with the original, so the incoming event is never modified.
+    """
+    key = path[0]
+    if not isinstance(obj, dict) or key not in obj:
+        return obj
+    obj = dict(obj)
+    if len(path) == 1:
+        obj[key] = REDACTED
+    else:
+        obj[key] = _redact(obj[key], path[1:])
+    return obj
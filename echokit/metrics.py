@@ -0,0 +1,217 @@
+"""Per-phase latency metrics for handled requests
+
+:class:`echokit.EchoKit` times each phase of handling a request with
+:func:`time.perf_counter`:
+
+* *parse*: reading the incoming event, including its session attributes
+* *verify*: checking the raw event's application ID and request type
+  before it's parsed, see :mod:`echokit.prevalidate`
+* *lookup*: finding the handler for the request
+* *handler*: your handler function
+* *serialize*: building the response `dict`
+
+Timings are aggregated into a :class:`Histogram` per request type or
+intent name and phase, which can be exported as CloudWatch Embedded
+Metric Format (EMF) lines or Prometheus text. Hooks registered with
+:func:`Metrics.add_hook` are called with the raw timings of every request.
+
+.. code-block:: python
+
+    app = EchoKit("my_app_id")
+
+    @app.metrics.add_hook
+    def on_request(name, timings):
+        if timings['handler'] > 0.5:
+            print(f"Slow handler for {name}")
+
+    # Write aggregated metrics to CloudWatch, via stdout
+    app.metrics.export_emf()
+"""
+import json
+import sys
+import threading
+import time
+from bisect import bisect_left
+
+#: Phases timed for each request, in order
+PHASES = ('parse', 'verify', 'lookup', 'handler', 'serialize')
+
+#: Upper bounds (in seconds) of :class:`Histogram` buckets, from 1us up
+#: to about 8s. Anything slower goes in a final overflow bucket.
+BUCKETS = tuple(1e-6 * 2 ** i for i in range(24))
+
+
+class Histogram:
+    """Counts of observed durations in exponentially sized buckets"""
+    __slots__ = ('counts', 'count', 'sum')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        """Record a duration (in seconds)"""
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def percentile(self, q):
+        """Estimate a percentile from the bucket counts
+
+        :param q: Percentile, from 0 to 100
+        :return: Upper bound (in seconds) of the bucket the percentile
+            falls in, or *None* if nothing has been observed. Durations
+            in the overflow bucket give the last finite bound, so the
+            estimate is always a number JSON can hold.
+        """
+        if not self.count:
+            return None
+        rank = max(1, q / 100 * self.count)
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return BUCKETS[min(i, len(BUCKETS) - 1)]
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+
+class Metrics:
+    """Aggregated request timings, by request/intent name and phase"""
+    def __init__(self):
+        self._histograms = {}
+        self._hooks = []
+        self._lock = threading.Lock()
+
+    def add_hook(self, func):
+        """Register a function to call with the timings of each request
+
+        Hooks are called as *func(name, timings)*, where *name* is the
+        intent name (or request type, if not an *IntentRequest*) and
+        *timings* a `dict` of seconds taken by each phase. Can also be
+        used as a decorator.
+        """
+        self._hooks.append(func)
+        return func
+
+    def record(self, name, *durations):
+        """Record the duration of each phase of a request
+
+        :param name: Intent name, or request type
+        :param durations: Seconds taken by each of :data:`PHASES`
+        """
+        with self._lock:
+            histograms = self._histograms.get(name)
+            if histograms is None:
+                histograms = self._histograms[name] = tuple(
+                    Histogram() for _ in PHASES
+                )
+            for histogram, duration in zip(histograms, durations):
+                histogram.observe(duration)
+        if self._hooks:
+            timings = dict(zip(PHASES, durations))
+            for hook in self._hooks:
+                hook(name, timings)
+
+    def histogram(self, name, phase):
+        """Return the :class:`Histogram` for a request/intent and phase
+
+        :return: :class:`Histogram`, or *None* if there's no data
+        """
+        histograms = self._histograms.get(name)
+        if histograms is not None:
+            return histograms[PHASES.index(phase)]
+
+    def names(self):
+        """Intent names/request types with recorded timings"""
+        return list(self._histograms)
+
+    def reset(self):
+        """Discard all recorded timings"""
+        with self._lock:
+            self._histograms = {}
+
+    def emf(self, namespace='echokit', reset=False):
+        """Build CloudWatch Embedded Metric Format lines
+
+        One line is built per intent name/request type, with an
+        *Intent* dimension. For each phase it includes the mean and
+        99th percentile latency (in milliseconds) along with a
+        *Requests* count.
+
+        :param namespace: CloudWatch namespace for the metrics
+        :param reset: If *True*, discard the timings once exported
+        :return: List of JSON strings
+        """
+        with self._lock:
+            histograms = self._histograms
+            if reset:
+                self._histograms = {}
+        timestamp = int(time.time() * 1000)
+        lines = []
+        for name, phases in histograms.items():
+            metrics = [{'Name': 'Requests', 'Unit': 'Count'}]
+            record = {'Intent': name, 'Requests': phases[0].count}
+            for phase, histogram in zip(PHASES, phases):
+                for suffix, value in (('', histogram.mean),
+                                      ('P99', histogram.percentile(99))):
+                    metric = f"{phase}{suffix}"
+                    metrics.append({'Name': metric, 'Unit': 'Milliseconds'})
+                    record[metric] = value * 1000
+            record['_aws'] = {
+                'Timestamp': timestamp,
+                'CloudWatchMetrics': [{
+                    'Namespace': namespace,
+                    'Dimensions': [['Intent']],
+                    'Metrics': metrics,
+                }],
+            }
+            lines.append(json.dumps(record, separators=(',', ':')))
+        return lines
+
+    def export_emf(self, stream=None, namespace='echokit', reset=True):
+        """Write :func:`emf` lines to *stream* (default: stdout)
+
+        In AWS Lambda, anything written to stdout in EMF is picked up
+        as CloudWatch metrics.
+        """
+        stream = stream or sys.stdout
+        for line in self.emf(namespace=namespace, reset=reset):
+            stream.write(line + '\n')
+
+    def prometheus(self, prefix='echokit', labels=None):
+        """Build Prometheus text exposition of the timings
+
+        :param prefix: Prefix for metric names
+        :param labels: Extra labels to add to every sample
+        :type labels: dict
+        :return: str
+        """
+        extra = ''.join(f'{key}="{_escape(value)}",'
+                        for key, value in (labels or {}).items())
+        metric = f"{prefix}_phase_duration_seconds"
+        lines = [f"# HELP {metric} Time spent in each phase of handling "
+                 f"a request", f"# TYPE {metric} histogram"]
+        with self._lock:
+            histograms = dict(self._histograms)
+        for name, phases in histograms.items():
+            for phase, histogram in zip(PHASES, phases):
+                labels = f'{extra}intent="{_escape(name)}",phase="{phase}"'
+                cumulative = 0
+                for bound, count in zip(BUCKETS, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{{labels},le="{bound:g}"}} '
+                                 f'{cumulative}')
+                lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} '
+                             f'{histogram.count}')
+                lines.append(f'{metric}_sum{{{labels}}} {histogram.sum}')
+                lines.append(f'{metric}_count{{{labels}}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')\
+        .replace('\n', '\\n')
@@ -0,0 +1,322 @@
+"""Persistent per-user attributes
+
+Session attributes travel in every request and response, and are gone
+once the session ends. State that should outlive a session (or is too
+large to send back and forth on every turn) can instead be kept in a
+:class:`SessionStore`, keyed by the user's ID:
+
+.. code-block:: python
+
+    from echokit.persistence import SessionStore, SQLiteBackend
+
+    app = EchoKit("my_app_id",
+                  store=SessionStore(SQLiteBackend("/tmp/skill.db")))
+
+    @app.intent("MyColorIsIntent")
+    @app.slot("color")
+    def my_color_is(request, session, color):
+        app.persistent['color'] = color
+        return app.response(f"I'll remember {color}")
+
+Each user's attributes are loaded from the backend the first time they're
+needed and kept in an LRU cache, so warm invocations don't read them
+again. Only keys that were changed are written, and writes can be
+batched: they're sent to the backend once *batch_size* users have
+changes waiting or *interval* seconds have passed since the last write
+(checked at the end of each request), when changed users are evicted
+from the cache, and at interpreter exit. Call :func:`SessionStore.flush`
+to write them immediately.
+
+Batching trades durability for fewer writes: changes waiting in memory
+are lost if the process dies. In AWS Lambda that's routine, since an
+environment can be frozen after any invocation and reclaimed without
+running :mod:`atexit` handlers. So in Lambda (when
+*AWS_LAMBDA_FUNCTION_NAME* is set), *interval* defaults to *0*, writing
+changes at the end of every invocation that made them. Elsewhere (under
+``echoserve``, say) it defaults to 5 seconds. Only pass a longer
+*interval* in Lambda if losing the last few seconds of changes is
+acceptable.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from contextlib import nullcontext
+from .exc import ASKException
+
+#: Default :class:`SessionStore` *interval*: in Lambda, where waiting
+#: changes are lost when an environment is reclaimed, changes are
+#: written at the end of every invocation
+DEFAULT_INTERVAL = 0.0 if 'AWS_LAMBDA_FUNCTION_NAME' in os.environ else 5.0
+
+
+class MemoryBackend:
+    """Backend keeping attributes in a `dict`, for tests and local runs"""
+    def __init__(self):
+        self.data = {}
+        #: Number of times :func:`write` has been called
+        self.writes = 0
+
+    def load(self, user_id):
+        """Return the stored attributes for a user
+
+        :return: `dict` of attributes (empty for unknown users)
+        """
+        return dict(self.data.get(user_id, {}))
+
+    def write(self, changes):
+        """Write a batch of changes
+
+        :param changes: `dict` of user IDs to a tuple of the changed
+            attributes (`dict`) and the names of deleted attributes
+        """
+        self.writes += 1
+        for user_id, (updated, deleted) in changes.items():
+            attributes = self.data.setdefault(user_id, {})
+            attributes.update(updated)
+            for key in deleted:
+                attributes.pop(key, None)
+
+
+class SQLiteBackend:
+    """Backend storing attributes in SQLite, one row per user and key
+
+    Values are stored as JSON.
+    """
+    def __init__(self, database, table='echokit_attributes'):
+        """
+
+        :param database: Path of the database file (or *:memory:*)
+        :param table: Name of the table to use, created if necessary
+        """
+        import sqlite3
+        if not table.isidentifier():
+            raise ASKException(f"Invalid table name: {table!r}")
+        self.table = table
+        self._connection = sqlite3.connect(database, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                f"user_id TEXT NOT NULL, key TEXT NOT NULL, value TEXT, "
+                f"PRIMARY KEY (user_id, key))"
+            )
+
+    def load(self, user_id):
+        """Return the stored attributes for a user"""
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT key, value FROM {self.table} WHERE user_id = ?",
+                (user_id,)
+            ).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def write(self, changes):
+        """Write a batch of changes in a single transaction"""
+        upserts = []
+        deletes = []
+        for user_id, (updated, deleted) in changes.items():
+            upserts.extend((user_id, key, json.dumps(value))
+                           for key, value in updated.items())
+            deletes.extend((user_id, key) for key in deleted)
+        with self._lock, self._connection:
+            if upserts:
+                self._connection.executemany(
+                    f"INSERT OR REPLACE INTO {self.table} "
+                    f"(user_id, key, value) VALUES (?, ?, ?)", upserts
+                )
+            if deletes:
+                self._connection.executemany(
+                    f"DELETE FROM {self.table} WHERE user_id = ? AND key = ?",
+                    deletes
+                )
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class PersistentAttributes(MutableMapping):
+    """A user's attributes, tracking which keys have changed
+
+    Values are tracked by key: after changing a nested value in place,
+    assign it again (``attributes['cart'] = cart``) so it's written.
+    """
+    __slots__ = ('user_id', '_data', '_updated', '_deleted', '_store')
+
+    def __init__(self, user_id, data, store=None):
+        self.user_id = user_id
+        self._data = data
+        self._updated = set()
+        self._deleted = set()
+        self._store = store
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __setitem__(self, key, value):
+        with self._lock():
+            self._data[key] = value
+            self._updated.add(key)
+            self._deleted.discard(key)
+            self._changed()
+
+    def __delitem__(self, key):
+        with self._lock():
+            del self._data[key]
+            self._updated.discard(key)
+            self._deleted.add(key)
+            self._changed()
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return f"PersistentAttributes({self.user_id!r}, {self._data!r})"
+
+    def _lock(self):
+        # Changes are recorded under the store's lock, which is also held
+        # while they're taken to be written, so none are lost in between
+        if self._store is not None:
+            return self._store._lock
+        return nullcontext()
+
+    def _changed(self):
+        if self._store is not None:
+            self._store._mark(self)
+
+    @property
+    def dirty(self):
+        """*True* if there are changes which haven't been written"""
+        return bool(self._updated or self._deleted)
+
+    def _take_changes(self):
+        """Return (and forget) the changes waiting to be written"""
+        with self._lock():
+            changes = ({key: self._data[key] for key in self._updated},
+                       frozenset(self._deleted))
+            self._updated = set()
+            self._deleted = set()
+        return changes
+
+
+class SessionStore:
+    """LRU cache of per-user attributes in front of a backend"""
+    def __init__(self, backend, maxsize=1024, batch_size=32,
+                 interval=DEFAULT_INTERVAL):
+        """
+
+        :param backend: :class:`MemoryBackend`, :class:`SQLiteBackend`
+            or any object with the same *load* and *write* methods
+        :param maxsize: Maximum number of users to keep cached. Changes
+            for evicted users are written first.
+        :param batch_size: Number of users with changes to wait for
+            before writing them. *1* writes after every request that
+            changes something.
+        :param interval: Maximum seconds to hold on to changes before
+            writing them, or *None* to only write full batches. Defaults
+            to :data:`DEFAULT_INTERVAL` (*0* in Lambda, see above).
+        """
+        self.backend = backend
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.interval = interval
+        self._entries = OrderedDict()
+        self._dirty = {}
+        self._last_flush = time.monotonic()
+        self._lock = threading.RLock()
+        # Held while writing to the backend (without holding _lock), so
+        # batches are written in the order their changes were taken
+        self._write_lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def get(self, user_id):
+        """Return the :class:`PersistentAttributes` for a user
+
+        Loaded from the backend on first use, then cached.
+        """
+        with self._lock:
+            attributes = self._entries.get(user_id)
+            if attributes is not None:
+                self._entries.move_to_end(user_id)
+                return attributes
+        # Load outside the lock so other users aren't held up
+        data = self.backend.load(user_id)
+        with self._lock:
+            attributes = self._entries.get(user_id)
+            if attributes is None:
+                attributes = PersistentAttributes(user_id, data, self)
+                self._entries[user_id] = attributes
+                self._evict()
+            return attributes
+
+    def _mark(self, attributes):
+        with self._lock:
+            self._dirty[attributes.user_id] = attributes
+
+    def _evict(self):
+        evicted = {}
+        while len(self._entries) > self.maxsize:
+            user_id, attributes = self._entries.popitem(last=False)
+            if attributes.dirty:
+                evicted[user_id] = attributes._take_changes()
+                self._dirty.pop(user_id, None)
+        if evicted:
+            self.backend.write(evicted)
+
+    def commit(self):
+        """Write waiting changes, if a batch is full or due
+
+        Called by :class:`echokit.EchoKit` after each request.
+
+        :return: *True* if changes were written
+        """
+        if not self._dirty:
+            return False
+        if len(self._dirty) >= self.batch_size or (
+                self.interval is not None and
+                time.monotonic() - self._last_flush >= self.interval):
+            self.flush()
+            return True
+        return False
+
+    def flush(self):
+        """Write all waiting changes to the backend in one batch
+
+        Other requests can carry on changing attributes while the batch
+        is written.
+        """
+        with self._write_lock:
+            with self._lock:
+                changes = {user_id: attributes._take_changes()
+                           for user_id, attributes in self._dirty.items()
+                           if attributes.dirty}
+                self._dirty.clear()
+                self._last_flush = time.monotonic()
+            if changes:
+                self.backend.write(changes)
+
+    def clear(self):
+        """Write waiting changes, then empty the cache"""
+        self.flush()
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def user_id(event):
+    """Return the user ID of a raw incoming event, or *None*"""
+    session = event.get('session') or {}
+    user = session.get('user')
+    if user is None:
+        system = (event.get('context') or {}).get('System') or {}
+        user = system.get('user') or {}
+    return user.get('userId')
@@ -0,0 +1,124 @@
+"""Cheap checks on raw events, before they're parsed
+
+Before an event is parsed, :class:`Prevalidator` reads the handful of
+fields needed to dispatch it straight from the raw event: the request
+type, the intent name and the application ID. Events which are
+malformed, meant for another skill or which no handler is registered
+for are rejected with :exc:`echokit.exc.RequestRejected`, whose *code*
+says why, without paying to parse them. :class:`echokit.EchoKit` builds
+one from its registered handlers when the first event comes in.
+
+Scheduled warm-up events (from CloudWatch/EventBridge schedules or
+*serverless-plugin-warmup*, or any event with a true *warmup* field)
+are recognized by :func:`is_ping` and answered with
+:data:`PING_RESPONSE`, without being dispatched at all.
+"""
+from .exc import RequestRejected
+
+#: Response to warm-up events
+PING_RESPONSE = {'warm': True}
+#: *source* of events sent to keep functions warm
+PING_SOURCES = frozenset(('aws.events', 'serverless-plugin-warmup'))
+
+
+def is_ping(event):
+    """Return *True* if an event is a warm-up ping rather than a request"""
+    return type(event) is dict and 'request' not in event and (
+        event.get('source') in PING_SOURCES or bool(event.get('warmup'))
+    )
+
+
+def application_id(event):
+    """Read the application ID from a raw event, without parsing it
+
+    Taken from *session.application*, or *context.System.application*
+    for requests sent outside of a session.
+
+    :return: Application ID, or *None*
+    """
+    try:
+        return event['session']['application']['applicationId']
+    except (KeyError, TypeError):
+        pass
+    try:
+        return event['context']['System']['application']['applicationId']
+    except (KeyError, TypeError):
+        return None
+
+
+def request_name(event):
+    """Read the intent name (or request type) from a raw event
+
+    :raises echokit.exc.RequestRejected: If the event is malformed
+    """
+    try:
+        request = event['request']
+        type_ = request['type']
+        if type_ == 'IntentRequest':
+            type_ = request['intent']['name']
+    except (KeyError, TypeError):
+        raise RequestRejected(RequestRejected.MALFORMED,
+                              "Event has no request type or intent name") \
+            from None
+    if type(type_) is not str:
+        raise RequestRejected(RequestRejected.MALFORMED,
+                              f"Invalid request type: {type_!r}")
+    return type_
+
+
+class Prevalidator:
+    """Checks compiled from the handlers and application ID of an app"""
+    __slots__ = ('app_ids', 'handlers')
+
+    def __init__(self, handlers, app_id=None):
+        """
+
+        :param handlers: `dict` of intent names (or request types) to
+            handler functions
+        :param app_id: Expected application ID (or a collection of
+            accepted IDs), or *None* to accept any
+        """
+        self.handlers = dict(handlers)
+        if isinstance(app_id, str):
+            app_id = (app_id,)
+        #: `frozenset` of accepted application IDs, or *None*
+        self.app_ids = None if app_id is None else frozenset(app_id)
+
+    def check(self, event):
+        """Check a raw event
+
+        :return: Tuple of the intent name (or request type) and its
+            handler function
+        :raises echokit.exc.RequestRejected: If the event is rejected
+        """
+        name = self.verify(event)
+        return name, self.lookup(name)
+
+    def verify(self, event):
+        """Check a raw event's request type/intent name and application ID
+
+        :return: The intent name (or request type)
+        :raises echokit.exc.RequestRejected: If the event is rejected
+        """
+        name = request_name(event)
+        if self.app_ids is not None:
+            received = application_id(event)
+            if received not in self.app_ids:
+                expected = "', '".join(sorted(self.app_ids))
+                raise RequestRejected(
+                    RequestRejected.APP_ID,
+                    f"Application ID mismatch. Expected: '{expected}' "
+                    f"Received: '{received}'"
+                )
+        return name
+
+    def lookup(self, name):
+        """Return the handler function for an intent name/request type
+
+        :raises echokit.exc.RequestRejected: If there's no handler for it
+        """
+        handler = self.handlers.get(name)
+        if handler is None:
+            raise RequestRejected(RequestRejected.UNHANDLED,
+                                  f"No handler defined for request: {name}")
+        return handler
@@ -43,6 +43,9 @@ class ASKRequest(dict):
         for k, v in dict(d).items():
             if isinstance(v, ASKRequest):
                 d[k] = v._dict()
+            elif isinstance(v, dict):
+                # Nested objects a lazy request hasn't wrapped yet
+                d[k] = _without_none(v)
             elif v is None:
                 del d[k]
         return d
@@ -52,3 +55,319 @@ class ASKRequest(dict):
 
     def __getattr__(self, attr):
         return self.get(attr)
+
+
+class LazyASKRequest(ASKRequest):
+    """:class:`ASKRequest` which defers wrapping nested objects
+
+    The incoming event is kept as-is. Nested objects are only wrapped
+    in another :class:`LazyASKRequest` the first time they're accessed
+    (via dot notation, indexing or :func:`get`), after which the
+    wrapper is cached in place of the original value.
+
+    Dispatch only reads a handful of fields from each request, so
+    large events (context, system, device, viewport, ...) don't pay
+    to convert objects nobody looks at. Note that iterating over
+    :func:`values` or :func:`items` returns nested objects as they
+    currently are, which may still be plain `dict` objects.
+    """
+    def __init__(self, **kwargs):
+        dict.__init__(self, kwargs)
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        if type(value) is dict:
+            value = LazyASKRequest(**value)
+            dict.__setitem__(self, key, value)
+        return value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+def _without_none(d):
+    """Recursively copy a plain `dict`, dropping `None` values"""
+    out = {}
+    for k, v in d.items():
+        if isinstance(v, ASKRequest):
+            out[k] = v._dict()
+        elif isinstance(v, dict):
+            out[k] = _without_none(v)
+        elif v is not None:
+            out[k] = v
+    return out
+
+
+class _View:
+    """Base for typed views over a raw request object
+
+    Views read straight from the incoming event (no copying) and only
+    define attributes for the fields echokit reads on every request.
+    Any other field is still reachable via dot notation: unknown
+    attributes fall back to the raw object, with nested objects wrapped
+    in :class:`LazyASKRequest`, and missing fields returning *None*
+    the same as they would with :class:`ASKRequest`. Each wrapper is
+    kept by the view, so changes made through it last (and show up in
+    :func:`_dict`) without changing the incoming event.
+    """
+    __slots__ = ('_raw', '_children')
+
+    def __init__(self, raw):
+        self._raw = raw if raw is not None else {}
+        self._children = None
+
+    def __getattr__(self, attr):
+        if attr.startswith('__'):
+            raise AttributeError(attr)
+        value = self._raw.get(attr)
+        if type(value) is dict:
+            children = self._children
+            if children is None:
+                children = self._children = {}
+            child = children.get(attr)
+            if child is None:
+                child = children[attr] = LazyASKRequest(**value)
+            return child
+        return value
+
+    def __getitem__(self, key):
+        if key not in self._raw:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self._raw
+
+    def get(self, key, default=None):
+        if key not in self._raw:
+            return default
+        return getattr(self, key)
+
+    def _dict(self):
+        """Return the underlying object as a `dict`
+
+        Removes any attribute whose value is `None`, the same as
+        :func:`ASKRequest._dict`
+        """
+        d = _without_none(self._raw)
+        if self._children:
+            for key, child in self._children.items():
+                d[key] = child._dict()
+        return d
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self._raw!r})"
+
+
+class Application(_View):
+    """View of *session.application*"""
+    __slots__ = ()
+
+    @property
+    def applicationId(self):
+        return self._raw.get('applicationId')
+
+
+class Session(_View):
+    """View of *session*"""
+    __slots__ = ('_application', '_attributes')
+
+    def __init__(self, raw):
+        super().__init__(raw)
+        self._application = None
+        self._attributes = None
+
+    @property
+    def new(self):
+        return self._raw.get('new')
+
+    @property
+    def sessionId(self):
+        return self._raw.get('sessionId')
+
+    @property
+    def application(self):
+        if self._application is None:
+            self._application = Application(self._raw.get('application'))
+        return self._application
+
+    @property
+    def attributes(self):
+        """Session attributes, wrapped in :class:`LazyASKRequest`"""
+        if self._attributes is None:
+            attributes = self._raw.get('attributes')
+            if type(attributes) is dict:
+                attributes = LazyASKRequest(**attributes)
+            self._attributes = attributes
+        return self._attributes
+
+    @attributes.setter
+    def attributes(self, attributes):
+        # Only the view changes: the incoming event is left as it was
+        self._attributes = attributes
+
+    def __contains__(self, key):
+        return key in self._raw or (key == 'attributes' and
+                                    self._attributes is not None)
+
+    def _dict(self):
+        d = super()._dict()
+        if self._attributes is not None:
+            attributes = self._attributes
+            d['attributes'] = (attributes._dict()
+                               if hasattr(attributes, '_dict') else
+                               dict(attributes))
+        return d
+
+
+class Slot(_View):
+    """View of a single slot in *request.intent.slots*"""
+    __slots__ = ()
+
+    @property
+    def name(self):
+        return self._raw.get('name')
+
+    @property
+    def value(self):
+        return self._raw.get('value')
+
+
+class Slots(_View):
+    """View of *request.intent.slots*: each slot, by name, is a
+    :class:`Slot`
+
+    Slots are reachable via dot notation (*slots.color*, *None* if the
+    slot wasn't sent) or indexing, and iterating works as it does for a
+    `dict`.
+    """
+    __slots__ = ('_slots',)
+
+    def __init__(self, raw):
+        super().__init__(raw)
+        self._slots = {}
+
+    def __getattr__(self, attr):
+        if attr.startswith('__'):
+            raise AttributeError(attr)
+        return self.get(attr)
+
+    def __getitem__(self, key):
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._slots[key] = Slot(self._raw[key])
+        return slot
+
+    def get(self, key, default=None):
+        if key not in self._raw:
+            return default
+        return self[key]
+
+    def __iter__(self):
+        return iter(self._raw)
+
+    def __len__(self):
+        return len(self._raw)
+
+    def keys(self):
+        return self._raw.keys()
+
+    def values(self):
+        return [self[key] for key in self._raw]
+
+    def items(self):
+        return [(key, self[key]) for key in self._raw]
+
+
+class Intent(_View):
+    """View of *request.intent*"""
+    __slots__ = ('_slots',)
+
+    def __init__(self, raw):
+        super().__init__(raw)
+        self._slots = None
+
+    @property
+    def name(self):
+        return self._raw.get('name')
+
+    @property
+    def slots(self):
+        """:class:`Slots` by name"""
+        if self._slots is None:
+            self._slots = Slots(self._raw.get('slots') or {})
+        return self._slots
+
+
+class Request(_View):
+    """View of *request*, for any request type"""
+    __slots__ = ()
+
+    @property
+    def type(self):
+        return self._raw.get('type')
+
+    @property
+    def requestId(self):
+        return self._raw.get('requestId')
+
+    @property
+    def timestamp(self):
+        return self._raw.get('timestamp')
+
+    @property
+    def locale(self):
+        return self._raw.get('locale')
+
+
+class IntentRequest(Request):
+    """View of *request* for an *IntentRequest*"""
+    __slots__ = ('_intent',)
+
+    def __init__(self, raw):
+        super().__init__(raw)
+        self._intent = None
+
+    @property
+    def intent(self):
+        if self._intent is None:
+            self._intent = Intent(self._raw.get('intent'))
+        return self._intent
+
+
+class Envelope(_View):
+    """View of an entire incoming event
+
+    A cheaper alternative to :class:`ASKRequest` for the fields read
+    during dispatch. *request* is an :class:`IntentRequest` for intent
+    requests, and a :class:`Request` otherwise.
+    """
+    __slots__ = ('_request', '_session')
+
+    def __init__(self, raw):
+        super().__init__(raw)
+        self._request = None
+        self._session = None
+
+    @property
+    def version(self):
+        return self._raw.get('version')
+
+    @property
+    def request(self):
+        if self._request is None:
+            raw = self._raw.get('request') or {}
+            if raw.get('type') == 'IntentRequest':
+                self._request = IntentRequest(raw)
+            else:
+                self._request = Request(raw)
+        return self._request
+
+    @property
+    def session(self):
+        if self._session is None:
+            self._session = Session(self._raw.get('session'))
+        return self._session
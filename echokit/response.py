@@ -1,4 +1,6 @@
 """Module to build responses to requests"""
+from .exc import ASKException
+from .ssml import SSML
 
 
 class Response:
@@ -20,7 +22,8 @@ class Response:
                  session_attributes=None, version='1.0'):
         """
 
-        :param speech: Speech to include with the response
+        :param speech: Speech to include with the response, or an
+            :class:`echokit.ssml.SSML` builder
         :param speech_type: *PlainText* or *SSML*, defining the content
             type passed to :attr:`speech`
         :param end_session: *True* if this response should end the session,
@@ -41,6 +44,27 @@ class Response:
         else:
             self._dict['sessionAttributes'] = {}
 
+    @classmethod
+    def _from_body(cls, body, session_attributes=None, version='1.0'):
+        """Create a response around an already built *response* body
+
+        *body* isn't copied, so (for example) cached bodies can be shared
+        between responses. Don't modify responses created this way.
+
+        :param body: The *response* object of a serialized response
+        :type body: dict
+        :param session_attributes: Session attributes to persist
+        :type session_attributes: dict
+        :param version:
+        """
+        response = cls.__new__(cls)
+        response._dict = {
+            'version': version,
+            'response': body,
+            'sessionAttributes': session_attributes or {}
+        }
+        return response
+
     @property
     def end_session(self):
         """The *shouldEndSession* attribute of the response"""
@@ -59,26 +83,30 @@ class Response:
     def _speech(self, speech, speech_type):
         """Include speech with the response
 
-        :param speech: Speech text
+        :param speech: Speech text, or an :class:`echokit.ssml.SSML`
+            builder (in which case *speech_type* is ignored)
         :type speech: str
         :param speech_type: *PlainText* or *SSML* (if passing a
             string with SSML)
         :return:
         """
+        if isinstance(speech, SSML):
+            return {'type': 'SSML', 'ssml': speech.build()}
         d = {'type': speech_type}
         if speech_type == 'PlainText':
             d['text'] = speech
         elif speech_type == 'SSML':
             d['ssml'] = speech
         else:
-            # TODO exception
-            raise Exception('')
+            raise ASKException(f"Invalid speech type: {speech_type!r}, "
+                               f"expected 'PlainText' or 'SSML'")
         return d
 
     def speech(self, speech, speech_type='PlainText'):
         """Sets *outputSpeech* for the response
 
-        :param speech: Speech text
+        :param speech: Speech text, or an :class:`echokit.ssml.SSML`
+            builder
         :param speech_type: *PlainText* or *SSML*
         :return:
         """
@@ -88,7 +116,8 @@ class Response:
     def reprompt(self, speech, speech_type='PlainText'):
         """Include a reprompt in the response
 
-        :param speech: Speech text
+        :param speech: Speech text, or an :class:`echokit.ssml.SSML`
+            builder
         :param speech_type: *PlainText* or *SSML*
         :return:
         """
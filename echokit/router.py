@@ -0,0 +1,127 @@
+"""Hosting several skills in one process
+
+A :class:`Router` dispatches each incoming event to the
+:class:`echokit.EchoKit` app registered for its application ID, so one
+Lambda function (or one ``echoserve`` process) can serve many skills:
+
+.. code-block:: python
+
+    from echokit.router import Router
+    from skills import colors, facts, trivia
+
+    router = Router(colors.app, facts.app, trivia.app)
+    handler = router.handler
+
+The application ID is read straight from the raw event and looked up in
+a `dict`, so events for unknown skills are rejected before any of the
+event is parsed. Each app keeps its own :attr:`echokit.EchoKit.metrics`.
+"""
+import threading
+from .exc import ASKException, RequestRejected
+from .prevalidate import PING_RESPONSE, application_id, is_ping
+
+
+class Router:
+    """Dispatches events to skills by application ID"""
+    def __init__(self, *apps):
+        """
+
+        :param apps: :class:`echokit.EchoKit` apps to route to, by their
+            :attr:`echokit.EchoKit.app_id`
+        """
+        self._apps = {}
+        #: Number of events routed to each application ID
+        self.counts = {}
+        #: Number of events rejected for unknown application IDs
+        self.rejected = 0
+        self._lock = threading.Lock()
+        for app in apps:
+            self.add(app)
+
+    def add(self, app, *app_ids):
+        """Route events for an app
+
+        :param app: :class:`echokit.EchoKit`
+        :param app_ids: Application IDs to route to *app*. Defaults to
+            its :attr:`echokit.EchoKit.app_id`. IDs other than that are
+            added to its :attr:`echokit.EchoKit.app_id_aliases`, so the
+            app accepts them too.
+        :raises echokit.exc.ASKException: If an ID is already routed to
+            another app
+        """
+        app_ids = app_ids or (app.app_id,)
+        for app_id in app_ids:
+            existing = self._apps.get(app_id)
+            if existing is not None and existing is not app:
+                raise ASKException(f"Application ID already routed: "
+                                   f"{app_id!r}")
+        for app_id in app_ids:
+            self._apps[app_id] = app
+            self.counts.setdefault(app_id, 0)
+        app.app_id_aliases |= set(app_ids) - {app.app_id}
+        return app
+
+    @property
+    def apps(self):
+        """`dict` of application IDs to apps"""
+        return dict(self._apps)
+
+    def route(self, event):
+        """Return the app for an incoming event
+
+        :param event: The raw incoming event
+        :return: :class:`echokit.EchoKit`
+        :raises echokit.exc.RequestRejected: If the event's application
+            ID isn't routed to any app
+        """
+        app_id = application_id(event)
+        app = self._apps.get(app_id)
+        with self._lock:
+            if app is None:
+                self.rejected += 1
+            else:
+                self.counts[app_id] += 1
+        if app is None:
+            raise RequestRejected(RequestRejected.APP_ID,
+                                  f"No skill for application ID: {app_id!r}")
+        return app
+
+    def handler(self, event, context):
+        """Handler to specify in your Lambda function configuration
+
+        Same as :func:`echokit.EchoKit.handler`, for whichever app the
+        event is for. Warm-up pings are answered without being routed.
+        """
+        if is_ping(event):
+            return PING_RESPONSE
+        return self.route(event).handler(event, context)
+
+    async def handle_async(self, event, context=None, executor=None):
+        """Coroutine equivalent of :func:`handler`, for
+        :class:`echokit.server.Server`
+        """
+        if is_ping(event):
+            return PING_RESPONSE
+        return await self.route(event).handle_async(event, context, executor)
+
+    def metrics(self):
+        """:class:`echokit.metrics.Metrics` for each app
+
+        :return: `dict` of application IDs to metrics (for apps with
+            metrics enabled)
+        """
+        return {app_id: app.metrics for app_id, app in self._apps.items()
+                if app.metrics is not None}
+
+    def prometheus(self, prefix='echokit'):
+        """Prometheus text exposition of every app's timings, labelled
+        with an *app* label
+
+        :return: str
+        """
+        lines = []
+        for app_id, metrics in self.metrics().items():
+            text = metrics.prometheus(prefix, labels={'app': app_id})
+            # Only include the HELP/TYPE header once
+            lines.extend(text.splitlines()[2 if lines else 0:])
+        return '\n'.join(lines) + '\n' if lines else ''
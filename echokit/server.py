@@ -0,0 +1,281 @@
+"""HTTP hosting for skills outside of AWS Lambda
+
+Serves a skill over HTTP so it can run behind a load balancer, taking the
+same JSON Alexa sends to Lambda as the body of a *POST* request and
+returning the response JSON. Requests are dispatched through the same
+handlers registered on :class:`echokit.EchoKit`:
+
+.. code-block:: bash
+
+    echoserve session:app --port 8080 --workers 16 --processes 4
+
+The server is built on :mod:`asyncio` and supports HTTP/1.1 keep-alive.
+Coroutine handlers run on the event loop, while regular handlers run in
+a bounded thread pool so they can't block it. With *processes* greater
+than one, a listening socket is shared between several forked worker
+processes to make use of every core.
+
+This server doesn't verify the signatures Alexa includes with each
+request, so it should sit behind something that does.
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import os
+import socket
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from .exc import ASKException, RequestRejected
+
+log = logging.getLogger(__name__)
+
+
+class Server:
+    """Asynchronous HTTP server for a skill
+
+    For example:
+
+    .. code-block:: python
+
+        from echokit.server import Server
+        from session import app
+
+        Server(app, port=8080).run(processes=4)
+    """
+    def __init__(self, app, host='127.0.0.1', port=8080, workers=None,
+                 keep_alive_timeout=75, max_body_size=1024 * 1024):
+        """
+
+        :param app: :class:`echokit.EchoKit` (or anything else with a
+            *handle_async* coroutine, or a plain *handler(event, context)*
+            function) to dispatch requests to
+        :param host: Address to listen on
+        :param port: Port to listen on
+        :param workers: Maximum number of threads to run regular
+            (non-coroutine) handlers in, per process
+        :type workers: int
+        :param keep_alive_timeout: Seconds to keep an idle connection
+            open waiting for another request
+        :param max_body_size: Largest request body (in bytes) accepted
+        """
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.keep_alive_timeout = keep_alive_timeout
+        self.max_body_size = max_body_size
+        self._executor = None
+
+    def bind(self):
+        """Create and bind a listening socket
+
+        :return: :class:`socket.socket`
+        """
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(1024)
+        sock.setblocking(False)
+        self.port = sock.getsockname()[1]
+        return sock
+
+    def run(self, processes=1):
+        """Serve requests until interrupted
+
+        :param processes: Number of worker processes. Each runs its own
+            event loop and thread pool, accepting connections from a
+            shared listening socket.
+        :type processes: int
+        """
+        sock = self.bind()
+        log.info(f"Listening on http://{self.host}:{self.port} "
+                 f"({processes} process(es))")
+        if processes <= 1:
+            self._run_forever(sock)
+            return
+        import multiprocessing
+        ctx = multiprocessing.get_context('fork')
+        children = [ctx.Process(target=self._run_forever, args=(sock,),
+                                daemon=True)
+                    for _ in range(processes)]
+        for child in children:
+            child.start()
+        try:
+            for child in children:
+                child.join()
+        except KeyboardInterrupt:
+            for child in children:
+                child.terminate()
+        finally:
+            sock.close()
+
+    def _run_forever(self, sock):
+        try:
+            asyncio.run(self.serve(sock))
+        except KeyboardInterrupt:
+            pass
+
+    async def serve(self, sock=None):
+        """Serve requests on the running event loop until cancelled
+
+        :param sock: Listening socket from :func:`bind`. If *None*, one
+            is created.
+        """
+        if sock is None:
+            sock = self.bind()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        server = await asyncio.start_server(self._connection, sock=sock)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self._executor.shutdown(wait=False)
+
+    async def _connection(self, reader, writer):
+        """Handle requests on a single (keep-alive) connection"""
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(
+                        reader.readuntil(b'\r\n\r\n'), self.keep_alive_timeout
+                    )
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError,
+                        asyncio.LimitOverrunError, ConnectionError):
+                    break
+                try:
+                    method, version, headers = _parse_head(head)
+                except ValueError:
+                    self._write(writer, HTTPStatus.BAD_REQUEST,
+                                {'error': 'Malformed request'}, False)
+                    break
+                keep_alive = _keep_alive(version, headers)
+                length = int(headers.get('content-length') or 0)
+                if length > self.max_body_size:
+                    self._write(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                {'error': 'Request body too large'}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                status, payload = await self._dispatch(method, body)
+                self._write(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method, body):
+        """Dispatch a request body to the app
+
+        :return: Tuple of :class:`http.HTTPStatus` and the response body
+        """
+        if method == 'GET':
+            # Health check
+            return HTTPStatus.OK, {'status': 'ok'}
+        if method != 'POST':
+            return HTTPStatus.METHOD_NOT_ALLOWED, {'error': 'POST only'}
+        try:
+            event = json.loads(body)
+        except ValueError:
+            return HTTPStatus.BAD_REQUEST, {'error': 'Invalid JSON'}
+        try:
+            handle_async = getattr(self.app, 'handle_async', None)
+            if handle_async is not None:
+                response = await handle_async(event, None, self._executor)
+            else:
+                response = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, self.app, event, None
+                )
+        except RequestRejected as e:
+            return HTTPStatus.BAD_REQUEST, {'error': str(e), 'code': e.code}
+        except ASKException as e:
+            return HTTPStatus.BAD_REQUEST, {'error': str(e)}
+        except Exception:
+            log.exception("Unhandled exception handling request")
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {'error': 'Internal error'}
+        return HTTPStatus.OK, response
+
+    @staticmethod
+    def _write(writer, status, payload, keep_alive):
+        body = json.dumps(payload, separators=(',', ':')).encode()
+        writer.write(
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            f"\r\n".encode('latin-1') + body
+        )
+
+
+def _parse_head(head):
+    """Parse the request line and headers of an HTTP request
+
+    :return: Tuple of the method, HTTP version and a `dict` of headers
+        (with lower-cased names)
+    :raises ValueError: If the request is malformed or unsupported
+    """
+    lines = head.decode('latin-1').split('\r\n')
+    method, _, version = lines[0].split(' ', 2)
+    headers = {}
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        raise ValueError('Chunked requests are not supported')
+    length = headers.get('content-length', '')
+    # int() would also take signs, spaces and underscores
+    if length and not (length.isascii() and length.isdigit()):
+        raise ValueError(f'Invalid Content-Length: {length!r}')
+    return method.upper(), version, headers
+
+
+def _keep_alive(version, headers):
+    connection = headers.get('connection', '').lower()
+    if version == 'HTTP/1.0':
+        return connection == 'keep-alive'
+    return connection != 'close'
+
+
+def load_app(target):
+    """Import an app given as *module:attribute*
+
+    If the attribute is omitted, *app* is used.
+    """
+    module_name, _, attr = target.partition(':')
+    module = importlib.import_module(module_name)
+    return getattr(module, attr or 'app')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="echoserve",
+        description="Serve a skill over HTTP, dispatching Alexa request "
+                    "JSON through the skill's EchoKit handlers."
+    )
+    parser.add_argument("app", help="Skill to serve, as module:attribute "
+                                    "(for example, session:app)")
+    parser.add_argument("--host", default='127.0.0.1')
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Threads per process for regular handlers")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="Worker processes (use 0 for one per core)")
+    parser.add_argument("--app-dir", default='.',
+                        help="Directory to import the skill from")
+    args = parser.parse_args()
+    logging.basicConfig()
+    log.setLevel(logging.INFO)
+    sys.path.insert(0, os.path.abspath(args.app_dir))
+    server = Server(load_app(args.app), host=args.host, port=args.port,
+                    workers=args.workers)
+    server.run(processes=args.processes or os.cpu_count())
+
+
+if __name__ == '__main__':
+    main()
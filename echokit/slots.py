@@ -0,0 +1,202 @@
+"""Slot extraction and type coercion for :func:`echokit.EchoKit.slot`
+
+Slots are passed to handlers as raw strings by default. Giving a slot a
+type converts its value before it's passed in:
+
+.. code-block:: python
+
+    from echokit.slots import SlotSpec, date, duration, enum, integer
+
+    @app.intent("BookIntent")
+    @app.slot("name", guests=integer, day=date, length=duration,
+              room=SlotSpec(enum("single", "double"), default="single"),
+              city=SlotSpec(canonical=True))
+    def book(request, session, name, guests, day, length, room, city):
+        ...
+
+A type is any callable taking the slot's string value. If a slot is
+missing, has no value, or its value can't be converted (the callable
+raises :exc:`ValueError`), the slot's default is passed in instead.
+Conversions are memoized per value, so they should return immutable
+objects.
+"""
+import re
+from functools import lru_cache
+
+#: Number of converted values memoized per slot
+CACHE_SIZE = 256
+
+
+class SlotSpec:
+    """How to extract and convert a single slot"""
+    __slots__ = ('type', 'default', 'canonical', '_convert')
+
+    def __init__(self, type=None, default=None, canonical=False):
+        """
+
+        :param type: Callable to convert the slot's value with, such as
+            :func:`integer` or :func:`date`. If *None*, the value is
+            passed in as a string.
+        :param default: Value to pass in if the slot is missing, has
+            no value, or its value couldn't be converted
+        :param canonical: If *True*, use the canonical value from entity
+            resolution (for custom slot types with synonyms) when there's
+            a match, rather than what the user actually said
+        :type canonical: bool
+        """
+        self.type = type
+        self.default = default
+        self.canonical = canonical
+        self._convert = lru_cache(maxsize=CACHE_SIZE)(type) if type else None
+
+    def extract(self, slot):
+        """Return the value to pass to a handler for *slot*
+
+        :param slot: Slot from *request.intent.slots*, or *None* if it
+            wasn't included in the request
+        """
+        if slot is None:
+            return self.default
+        value = None
+        if self.canonical:
+            value = resolved_value(slot)
+        if value is None:
+            value = slot.get('value')
+        if value is None:
+            return self.default
+        if self._convert is not None:
+            try:
+                return self._convert(value)
+            except ValueError:
+                return self.default
+        return value
+
+
+def compile_slots(names, types):
+    """Build a function extracting slots for a handler
+
+    The extraction plan is built once (when the handler is decorated)
+    rather than on every request.
+
+    :param names: Names of slots to pass in as strings
+    :param types: `dict` of slot names to a :class:`SlotSpec`, or a
+        callable to convert the slot's value with
+    :return: Function taking *request.intent.slots* and returning a
+        `dict` of keyword arguments for the handler
+    """
+    # (slot name, spec) pairs: the same spec may be shared by several
+    # slots and handlers, so it isn't given a name itself
+    plan = [(name, SlotSpec()) for name in names]
+    for name, spec in types.items():
+        if not isinstance(spec, SlotSpec):
+            spec = SlotSpec(spec)
+        plan.append((name, spec))
+    plan = tuple(plan)
+
+    def extract(slots):
+        get = slots.get if slots else (lambda name: None)
+        return {name: spec.extract(get(name)) for name, spec in plan}
+    return extract
+
+
+def resolved_value(slot):
+    """Return the first canonical value matched by entity resolution
+
+    :param slot: Slot from *request.intent.slots*
+    :return: The matched value's name, or *None* if there was no match
+    """
+    resolutions = slot.get('resolutions')
+    if not resolutions:
+        return None
+    for authority in resolutions.get('resolutionsPerAuthority') or ():
+        status = authority.get('status') or {}
+        if status.get('code') != 'ER_SUCCESS_MATCH':
+            continue
+        for value in authority.get('values') or ():
+            name = (value.get('value') or {}).get('name')
+            if name is not None:
+                return name
+    return None
+
+
+def integer(value):
+    """Convert an *AMAZON.NUMBER* value to `int`
+
+    Alexa sends *?* for numbers it couldn't understand, which (like
+    anything else that isn't a number) raises :exc:`ValueError`.
+    """
+    return int(value)
+
+
+def date(value):
+    """Convert an *AMAZON.DATE* value to :class:`datetime.date`
+
+    Handles specific dates (*2017-10-08*), weeks (*2017-W41*, the
+    Monday), weekends (*2017-W41-WE*, the Saturday), months (*2017-10*,
+    the first) and years (*2017*, January 1st). Other values, such as
+    decades or seasons, raise :exc:`ValueError`.
+    """
+    import datetime
+    match = _WEEK.match(value)
+    if match:
+        year, week, weekend = match.groups()
+        day = 6 if weekend else 1
+        return datetime.datetime.strptime(f"{year}-{week}-{day}",
+                                          "%G-%V-%u").date()
+    for fmt in ('%Y-%m-%d', '%Y-%m', '%Y'):
+        try:
+            return datetime.datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Unsupported date: {value}")
+
+
+_WEEK = re.compile(r'^(\d{4})-W(\d{1,2})(-WE)?$')
+
+_DURATION = re.compile(
+    r'^P(?:(?P<years>\d+(?:\.\d+)?)Y)?(?:(?P<months>\d+(?:\.\d+)?)M)?'
+    r'(?:(?P<weeks>\d+(?:\.\d+)?)W)?(?:(?P<days>\d+(?:\.\d+)?)D)?'
+    r'(?:T(?:(?P<hours>\d+(?:\.\d+)?)H)?(?:(?P<minutes>\d+(?:\.\d+)?)M)?'
+    r'(?:(?P<seconds>\d+(?:\.\d+)?)S)?)?$'
+)
+
+
+def duration(value):
+    """Convert an *AMAZON.DURATION* value to :class:`datetime.timedelta`
+
+    Values are ISO-8601 durations such as *PT10M* or *P2DT3H*. Years
+    and months don't have a fixed length, so they're treated as 365 and
+    30 days respectively.
+    """
+    import datetime
+    match = _DURATION.match(value)
+    if not match or value in ('P', 'PT'):
+        raise ValueError(f"Unsupported duration: {value}")
+    parts = {k: float(v) for k, v in match.groupdict().items() if v}
+    days = parts.pop('years', 0) * 365 + parts.pop('months', 0) * 30
+    return datetime.timedelta(days=days + parts.pop('days', 0), **parts)
+
+
+def enum(*values):
+    """Build a type that matches a value against a fixed set of choices
+
+    Matching is case-insensitive. Pass either the choices themselves
+    (the matching choice is returned), or a single :class:`enum.Enum`
+    subclass (the member with a matching name or value is returned).
+    Anything else raises :exc:`ValueError`.
+    """
+    if len(values) == 1 and isinstance(values[0], type):
+        enum_type = values[0]
+        choices = {}
+        for member in enum_type:
+            choices[str(member.value).lower()] = member
+            choices[member.name.lower()] = member
+    else:
+        choices = {str(v).lower(): v for v in values}
+
+    def convert(value):
+        try:
+            return choices[value.lower()]
+        except KeyError:
+            raise ValueError(f"Unexpected value: {value}") from None
+    return convert
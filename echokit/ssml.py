@@ -0,0 +1,281 @@
+"""Building validated SSML
+
+:class:`SSML` builds Speech Synthesis Markup Language for responses one
+element at a time. Attribute values are checked as each element is
+added, raising :exc:`echokit.exc.ASKException` for anything Alexa would
+reject, and text is escaped. Tags for elements without any text (like
+breaks and audio) are cached, and a builder's markup is only built once
+until something else is added to it, so fixed fragments are best built
+once at import time and reused:
+
+.. code-block:: python
+
+    from echokit.ssml import SSML
+
+    WELCOME = SSML().text("Welcome back.").pause("500ms")
+
+    @app.launch
+    def launch(request, session):
+        speech = SSML(WELCOME).say_as("3", "ordinal").text("visit!")
+        return app.response(speech)
+
+Builders can be passed straight to :func:`echokit.EchoKit.response`,
+:func:`echokit.response.Response.speech` and
+:func:`echokit.response.Response.reprompt`.
+"""
+import re
+from functools import lru_cache
+from .exc import ASKException
+
+_ESCAPES = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;',
+                          '"': '&quot;', "'": '&apos;'})
+
+#: Values accepted by each element attribute (*None* for free text)
+INTERPRET_AS = frozenset((
+    'characters', 'spell-out', 'cardinal', 'number', 'ordinal', 'digits',
+    'fraction', 'unit', 'date', 'time', 'telephone', 'address',
+    'interjection', 'expletive',
+))
+BREAK_STRENGTHS = frozenset(('none', 'x-weak', 'weak', 'medium', 'strong',
+                             'x-strong'))
+EMPHASIS_LEVELS = frozenset(('strong', 'moderate', 'reduced'))
+RATES = frozenset(('x-slow', 'slow', 'medium', 'fast', 'x-fast'))
+PITCHES = frozenset(('x-low', 'low', 'medium', 'high', 'x-high'))
+VOLUMES = frozenset(('silent', 'x-soft', 'soft', 'medium', 'loud', 'x-loud'))
+ALPHABETS = frozenset(('ipa', 'x-sampa'))
+EFFECTS = frozenset(('whispered',))
+
+#: Elements allowed in SSML for Alexa
+TAGS = frozenset((
+    'speak', 'amazon:effect', 'amazon:emotion', 'amazon:domain', 'audio',
+    'break', 'emphasis', 'lang', 'p', 'phoneme', 'prosody', 's', 'say-as',
+    'sub', 'voice', 'w', 'mark',
+))
+
+_TIME = re.compile(r'^(\d+(\.\d+)?)(ms|s)$')
+_PERCENT = re.compile(r'^[+-]?\d+(\.\d+)?%$')
+_DECIBELS = re.compile(r'^[+-]\d+(\.\d+)?dB$')
+# Maximum duration of a <break>, in milliseconds
+_MAX_BREAK = 10000
+
+
+def escape(text):
+    """Escape text for inclusion in SSML, in a single pass"""
+    return str(text).translate(_ESCAPES)
+
+
+class SSML:
+    """Builder for SSML markup"""
+    __slots__ = ('_parts', '_markup')
+
+    def __init__(self, *content):
+        """
+
+        :param content: Initial content: text (which is escaped), or
+            other :class:`SSML` builders
+        """
+        self._parts = []
+        self._markup = None
+        for item in content:
+            self._append(_content(item))
+
+    def _append(self, fragment):
+        self._parts.append(fragment)
+        self._markup = None
+        return self
+
+    def text(self, text):
+        """Add text (escaped) or another :class:`SSML` builder"""
+        return self._append(_content(text))
+
+    def pause(self, time=None, strength=None):
+        """Add a *<break>*
+
+        :param time: Duration, such as *500ms* or *2s* (up to 10s)
+        :param strength: One of :data:`BREAK_STRENGTHS`
+        """
+        return self._append(_break_tag(time, strength))
+
+    def audio(self, src):
+        """Add an *<audio>* clip
+
+        :param src: HTTPS URL of the audio file
+        """
+        return self._append(_audio_tag(src))
+
+    def say_as(self, text, interpret_as, format=None):
+        """Add text to be interpreted as a particular type
+
+        :param interpret_as: One of :data:`INTERPRET_AS`
+        :param format: Date format (such as *mdy*), for *date*
+        """
+        _check('interpret-as', interpret_as, INTERPRET_AS)
+        return self._element('say-as', text, (('interpret-as', interpret_as),
+                                              ('format', format)))
+
+    def emphasis(self, text, level='moderate'):
+        """Add emphasized text
+
+        :param level: One of :data:`EMPHASIS_LEVELS`
+        """
+        _check('level', level, EMPHASIS_LEVELS)
+        return self._element('emphasis', text, (('level', level),))
+
+    def prosody(self, text, rate=None, pitch=None, volume=None):
+        """Add text with a modified rate, pitch and/or volume
+
+        :param rate: One of :data:`RATES`, or a percentage (at least 20%)
+        :param pitch: One of :data:`PITCHES`, or a relative percentage
+            (between -33.3% and +50%)
+        :param volume: One of :data:`VOLUMES`, or relative decibels (such
+            as *+6dB*)
+        """
+        if rate is not None and rate not in RATES:
+            if not _PERCENT.match(rate) or float(rate[:-1]) < 20:
+                raise ASKException(f"Invalid prosody rate: {rate!r}")
+        if pitch is not None and pitch not in PITCHES:
+            if not _PERCENT.match(pitch) or \
+                    not -33.3 <= float(pitch[:-1]) <= 50:
+                raise ASKException(f"Invalid prosody pitch: {pitch!r}")
+        if volume is not None and volume not in VOLUMES \
+                and not _DECIBELS.match(volume):
+            raise ASKException(f"Invalid prosody volume: {volume!r}")
+        if rate is None and pitch is None and volume is None:
+            raise ASKException("prosody needs a rate, pitch or volume")
+        return self._element('prosody', text, (('rate', rate),
+                                               ('pitch', pitch),
+                                               ('volume', volume)))
+
+    def sub(self, text, alias):
+        """Add text to be pronounced as *alias*"""
+        return self._element('sub', text, (('alias', alias),))
+
+    def phoneme(self, text, ph, alphabet='ipa'):
+        """Add text with a phonetic pronunciation
+
+        :param ph: Pronunciation
+        :param alphabet: One of :data:`ALPHABETS`
+        """
+        _check('alphabet', alphabet, ALPHABETS)
+        return self._element('phoneme', text, (('alphabet', alphabet),
+                                               ('ph', ph)))
+
+    def lang(self, text, lang):
+        """Add text in another language, such as *fr-FR*"""
+        return self._element('lang', text, (('xml:lang', lang),))
+
+    def voice(self, text, name):
+        """Add text spoken by an Amazon Polly voice, such as *Kendra*"""
+        return self._element('voice', text, (('name', name),))
+
+    def effect(self, text, name='whispered'):
+        """Add text with an *<amazon:effect>*
+
+        :param name: One of :data:`EFFECTS`
+        """
+        _check('name', name, EFFECTS)
+        return self._element('amazon:effect', text, (('name', name),))
+
+    def paragraph(self, text):
+        """Add a paragraph (*<p>*)"""
+        return self._element('p', text, ())
+
+    def sentence(self, text):
+        """Add a sentence (*<s>*)"""
+        return self._element('s', text, ())
+
+    def _element(self, tag, text, attributes):
+        attributes = tuple((k, v) for k, v in attributes if v is not None)
+        return self._append(f"{_open_tag(tag, attributes)}{_content(text)}"
+                            f"</{tag}>")
+
+    @property
+    def fragment(self):
+        """Markup without the enclosing *<speak>* element"""
+        if self._markup is None:
+            self._markup = ''.join(self._parts)
+        return self._markup
+
+    def build(self):
+        """Return the complete markup, enclosed in *<speak>*
+
+        :return: str
+        """
+        return f"<speak>{self.fragment}</speak>"
+
+    __str__ = build
+
+    def __repr__(self):
+        return f"SSML({self.fragment!r})"
+
+
+def _content(item):
+    if isinstance(item, SSML):
+        return item.fragment
+    return escape(item)
+
+
+def _check(name, value, allowed):
+    if value not in allowed:
+        raise ASKException(f"Invalid {name}: {value!r}, expected one of "
+                           f"{sorted(allowed)}")
+
+
+@lru_cache(maxsize=512)
+def _open_tag(tag, attributes):
+    attrs = ''.join(f' {k}="{escape(v)}"' for k, v in attributes)
+    return f"<{tag}{attrs}>"
+
+
+@lru_cache(maxsize=256)
+def _break_tag(time, strength):
+    if time is None and strength is None:
+        return '<break/>'
+    attrs = ''
+    if time is not None:
+        match = _TIME.match(time)
+        if not match:
+            raise ASKException(f"Invalid break time: {time!r}, use "
+                               f"milliseconds (500ms) or seconds (2s)")
+        ms = float(match.group(1)) * (1 if match.group(3) == 'ms' else 1000)
+        if ms > _MAX_BREAK:
+            raise ASKException(f"Break time is too long: {time!r} (max 10s)")
+        attrs += f' time="{time}"'
+    if strength is not None:
+        _check('strength', strength, BREAK_STRENGTHS)
+        attrs += f' strength="{strength}"'
+    return f"<break{attrs}/>"
+
+
+@lru_cache(maxsize=256)
+def _audio_tag(src):
+    if not isinstance(src, str) or not src.startswith('https://'):
+        raise ASKException(f"Audio must be served over HTTPS: {src!r}")
+    return f'<audio src="{escape(src)}"/>'
+
+
+def validate(markup):
+    """Check raw SSML markup
+
+    Checks the markup is well formed, enclosed in *<speak>* and only
+    uses elements Alexa supports. Meant for checking fixed markup once
+    (at import time, say), rather than on every request.
+
+    :param markup: SSML markup
+    :type markup: str
+    :raises echokit.exc.ASKException: If the markup is invalid
+    """
+    from xml.etree import ElementTree
+    # Declare the amazon: prefix so amazon:effect/etc. can be parsed
+    wrapped = f'<_ xmlns:amazon="amazon">{markup}</_>'
+    try:
+        root = ElementTree.fromstring(wrapped)
+    except ElementTree.ParseError as e:
+        raise ASKException(f"Malformed SSML: {e}")
+    if len(root) != 1 or root[0].tag != 'speak' or \
+            (root.text or '').strip() or (root[0].tail or '').strip():
+        raise ASKException("SSML must be enclosed in a single <speak> element")
+    for element in root[0].iter():
+        tag = element.tag.replace('{amazon}', 'amazon:')
+        if tag not in TAGS:
+            raise ASKException(f"Unsupported SSML element: <{tag}>")
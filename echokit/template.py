@@ -0,0 +1,297 @@
+"""Precompiled response templates
+
+A :class:`ResponseTemplate` describes the shape of a response (speech,
+reprompt, card and whether to end the session) with named placeholders,
+and is compiled once, typically at import time. Mistakes in a template
+raise :exc:`echokit.exc.ASKException` when it's created rather than when
+a request comes in, and rendering only fills in the placeholders:
+
+.. code-block:: python
+
+    from echokit.template import ResponseTemplate
+
+    COLOR_SET = ResponseTemplate(
+        "I now know that your favorite color is {color}.",
+        reprompt="You can ask me your favorite color by saying, "
+                 "what's my favorite color?",
+        card={'type': 'Simple', 'title': 'Your favorite color',
+              'content': '{color}'},
+        end_session=False,
+    )
+
+    @app.intent('MyColorIsIntent')
+    @app.slot('color')
+    def my_color_is_intent(request, session, color):
+        return app.render(COLOR_SET, color=color)
+
+Parts of a template without placeholders are built once and shared by
+every response rendered from it, so don't modify them in place. The
+*response* body itself is new for each response, so setting
+:attr:`echokit.response.Response.end_session` or adding a reprompt or
+card to a rendered response doesn't affect later ones.
+"""
+from string import Formatter
+from .exc import ASKException
+from .response import Response
+from .ssml import escape, validate
+
+_SPEECH_TYPES = ('PlainText', 'SSML')
+
+#: Fields each card type may include, and which of them are required
+_CARD_FIELDS = {
+    'Simple': (('title', 'content'), ('title', 'content')),
+    'Standard': (('title', 'text', 'image'), ('title', 'text')),
+    'LinkAccount': (('content',), ()),
+}
+
+
+class _Text:
+    """A compiled template string"""
+    __slots__ = ('template', 'parts', 'fields', 'escape')
+
+    def __init__(self, template, ssml=False, reserved=('session_attributes',)):
+        if not isinstance(template, str):
+            raise ASKException(f"Template text must be a string: "
+                               f"{template!r}")
+        parts = []
+        try:
+            parsed = list(Formatter().parse(template))
+        except ValueError as e:
+            raise ASKException(f"Invalid template {template!r}: {e}")
+        for literal, field, spec, conversion in parsed:
+            if literal:
+                parts.append((literal, None))
+            if field is None:
+                continue
+            if not field.isidentifier():
+                raise ASKException(f"Invalid placeholder {{{field}}} in "
+                                   f"{template!r}, use {{name}}")
+            if spec or conversion:
+                raise ASKException(f"Format specs and conversions aren't "
+                                   f"supported: {template!r}")
+            if field in reserved:
+                raise ASKException(f"{field!r} can't be used as a "
+                                   f"placeholder")
+            parts.append((None, field))
+        self.template = template
+        self.parts = tuple(parts)
+        self.fields = frozenset(f for _, f in parts if f)
+        self.escape = ssml
+
+    def source(self, namespace):
+        """Compile into the source of an f-string building the text
+
+        Literal text is added to *namespace* rather than the source, so
+        it never needs quoting.
+        """
+        if self.escape:
+            namespace['_escape'] = escape
+        pieces = []
+        for literal, field in self.parts:
+            if field is None:
+                name = f"_{len(namespace)}"
+                namespace[name] = literal
+                pieces.append(f"{{{name}}}")
+            elif self.escape:
+                pieces.append(f"{{_escape(values['{field}'])}}")
+            else:
+                pieces.append(f"{{values['{field}']}}")
+        return 'f"' + ''.join(pieces) + '"'
+
+
+def _fields(shape):
+    if isinstance(shape, _Text):
+        return shape.fields
+    if isinstance(shape, dict):
+        return frozenset().union(*(_fields(v) for v in shape.values()))
+    return frozenset()
+
+
+def _source(shape, namespace):
+    """Compile part of a response body into Python source
+
+    *shape* is a `dict` whose leaves may be :class:`_Text`. Anything
+    without placeholders is built once and added to *namespace*, so the
+    same object is included in every rendered response. Texts with
+    placeholders become f-strings.
+
+    :return: Source for an expression building the part from *values*
+    """
+    name = f"_{len(namespace)}"
+    if not _fields(shape):
+        namespace[name] = _constant(shape)
+        return name
+    if isinstance(shape, _Text):
+        return shape.source(namespace)
+    items = ', '.join(f"{key!r}: {_source(value, namespace)}"
+                      for key, value in shape.items())
+    return f"{{{items}}}"
+
+
+def _compile(shape):
+    """Compile a response body into a function rendering it from values"""
+    namespace = {}
+    if isinstance(shape, dict):
+        # Always build the top level afresh: Response's setters replace
+        # its keys, which mustn't change the shared constant
+        items = ', '.join(f"{key!r}: {_source(value, namespace)}"
+                          for key, value in shape.items())
+        expression = f"{{{items}}}"
+    else:
+        expression = _source(shape, namespace)
+    source = (f"def render(values):\n"
+              f"    return {expression}\n")
+    exec(source, namespace)
+    return namespace['render']
+
+
+def _constant(shape):
+    if isinstance(shape, _Text):
+        # Resolves any escaped braces
+        return ''.join(literal for literal, _ in shape.parts)
+    if isinstance(shape, dict):
+        return {k: _constant(v) for k, v in shape.items()}
+    return shape
+
+
+def _speech(text, speech_type):
+    if speech_type not in _SPEECH_TYPES:
+        raise ASKException(f"Invalid speech type: {speech_type!r}, "
+                           f"expected one of {_SPEECH_TYPES}")
+    if speech_type == 'PlainText':
+        return {'type': speech_type, 'text': _Text(text)}
+    compiled = _Text(text, ssml=True)
+    _validate(compiled)
+    return {'type': speech_type, 'ssml': compiled}
+
+
+def _validate(text):
+    """Check the markup of an SSML :class:`_Text`
+
+    Values are escaped as they're filled in, so they can't change the
+    markup: it's checked once, with each placeholder standing in for its
+    value.
+    """
+    validate(''.join(literal if field is None else field
+                     for literal, field in text.parts))
+
+
+def _card(card):
+    card = dict(card)
+    type_ = card.pop('type', None)
+    if type_ not in _CARD_FIELDS:
+        raise ASKException(f"Invalid card type: {type_!r}, expected one "
+                           f"of {tuple(_CARD_FIELDS)}")
+    allowed, required = _CARD_FIELDS[type_]
+    unknown = set(card) - set(allowed)
+    if unknown:
+        raise ASKException(f"Unexpected fields for {type_} card: "
+                           f"{sorted(unknown)}")
+    missing = set(required) - set(card)
+    if missing:
+        raise ASKException(f"Missing fields for {type_} card: "
+                           f"{sorted(missing)}")
+    shape = {'type': type_}
+    for field, value in card.items():
+        if field == 'image':
+            shape[field] = {k: _Text(v) for k, v in value.items()}
+        else:
+            shape[field] = _Text(value)
+    return shape
+
+
+class ResponseTemplate:
+    """A response shape, compiled once and rendered per request"""
+    def __init__(self, speech, speech_type='PlainText', reprompt=None,
+                 reprompt_type=None, card=None, end_session=True,
+                 version='1.0'):
+        """
+
+        :param speech: Speech text, with *{name}* placeholders
+        :param speech_type: *PlainText* or *SSML*. SSML markup is
+            checked with :func:`echokit.ssml.validate`, and values filled
+            into it are escaped.
+        :param reprompt: Reprompt text, with *{name}* placeholders
+        :param reprompt_type: *PlainText* or *SSML*, defaulting to
+            *speech_type*
+        :param card: Card to include, as a `dict` shaped like the *card*
+            in a response. For example, *{'type': 'Simple', 'title':
+            '...', 'content': '...'}*. Text (and image URLs) may include
+            placeholders.
+        :type card: dict
+        :param end_session: *True* if responses should end the session
+        :param version:
+        :raises echokit.exc.ASKException: If the template is invalid
+        """
+        shape = {'shouldEndSession': end_session,
+                 'outputSpeech': _speech(speech, speech_type)}
+        if reprompt is not None:
+            shape['reprompt'] = {'outputSpeech': _speech(
+                reprompt, reprompt_type or speech_type
+            )}
+        if card is not None:
+            shape['card'] = _card(card)
+        self._render = _compile(shape)
+        #: *True* if responses end the session
+        self.end_session = end_session
+        self.version = version
+        #: Names of all placeholders in the template
+        self.fields = _fields(shape)
+
+    def render(self, session_attributes=None, **values):
+        """Create a :class:`echokit.response.Response` from the template
+
+        :param session_attributes: Session attributes to persist
+        :type session_attributes: dict
+        :param values: Values for the template's placeholders
+        :return: :class:`echokit.response.Response`
+        :raises echokit.exc.ASKException: If a placeholder has no value
+        """
+        try:
+            body = self._render(values)
+        except KeyError as e:
+            raise ASKException(f"Missing template value: {e}") from None
+        return Response._from_body(body, session_attributes, self.version)
+
+
+class TextTemplate:
+    """A single text with named placeholders, compiled once
+
+    .. code-block:: python
+
+        GREETING = TextTemplate("Hello {name}")
+        GREETING.render(name="Bob")  # 'Hello Bob'
+    """
+    __slots__ = ('text', 'ssml', 'fields', '_render')
+
+    def __init__(self, text, ssml=False, reserved=()):
+        """
+
+        :param text: Text, with *{name}* placeholders
+        :param ssml: If *True*, values are escaped for SSML
+        :param reserved: Names which can't be used as placeholders
+        :raises echokit.exc.ASKException: If the text is invalid
+        """
+        compiled = _Text(text, ssml=ssml, reserved=reserved)
+        self.text = text
+        self.ssml = ssml
+        #: Names of all placeholders in the text
+        self.fields = compiled.fields
+        self._render = _compile(compiled)
+
+    def validate(self):
+        """Check the text is valid SSML, with :func:`echokit.ssml.validate`
+
+        :raises echokit.exc.ASKException: If the markup is invalid
+        """
+        _validate(_Text(self.text, ssml=True))
+
+    def render(self, **values):
+        """Fill in the placeholders
+
+        :raises echokit.exc.ASKException: If a placeholder has no value
+        """
+        try:
+            return self._render(values)
+        except KeyError as e:
+            raise ASKException(f"Missing template value: {e}") from None
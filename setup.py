@@ -6,12 +6,17 @@ setup(
     version='0.4',
     author='Edward Wells',
     author_email='git@edward.sh',
-    description="Alexa Skills Kit SDK for Python 3.6",
+    description="Alexa Skills Kit SDK for Python 3.7+",
     license='MIT',
-    keywords='Amazon AWS Alexa Skills Kit ASK py3 python3.6 lambda',
+    keywords='Amazon AWS Alexa Skills Kit ASK py3 python3.7 lambda',
     url='https://github.com/arcward/echokit',
     packages=['echokit'],
+    python_requires='>=3.7',
     entry_points={
-        'console_scripts': ['echozip=echokit.echozip:main']
+        'console_scripts': [
+            'echozip=echokit.echozip:main',
+            'echoserve=echokit.server:main',
+            'echoreplay=echokit.echoreplay:main',
+        ]
     }
 )
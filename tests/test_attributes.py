@@ -0,0 +1,92 @@
+import copy
+import json
+import pytest
+import echokit
+from os import path
+from echokit.attributes import SessionAttributes
+
+
+@pytest.fixture
+def set_color_intent_request():
+    request_path = path.join(path.dirname(__file__), "requests",
+                             "set_color_intent.txt")
+    with open(request_path) as f:
+        return json.load(f)
+
+
+def _original():
+    return {"color": "red", "cart": ["apple"], "profile": {"name": "Bob"}}
+
+
+def test_shared_until_changed():
+    original = _original()
+    attributes = SessionAttributes(original)
+    assert attributes == original
+    assert not attributes.modified
+    assert attributes._dict() is original
+    assert dict.__getitem__(attributes, "cart") is original["cart"]
+
+
+def test_nested_copied_on_read():
+    original = _original()
+    attributes = SessionAttributes(original)
+    attributes["cart"].append("pear")
+    assert original["cart"] == ["apple"]
+    assert attributes.changed == {"cart": ["apple", "pear"]}
+    # Read but not changed
+    assert attributes["profile"]["name"] == "Bob"
+    assert "profile" not in attributes.changed
+    result = attributes._dict()
+    assert result is not original
+    assert result == {"color": "red", "cart": ["apple", "pear"],
+                      "profile": {"name": "Bob"}}
+
+
+def test_writes_and_removals():
+    attributes = SessionAttributes(_original())
+    attributes["turns"] = 1
+    attributes.update(color="blue")
+    attributes.setdefault("color", "green")
+    del attributes["profile"]
+    assert attributes.pop("missing", None) is None
+    assert attributes.changed == {"turns": 1, "color": "blue"}
+    assert attributes.removed == {"profile"}
+    assert attributes.modified
+    attributes.clear()
+    assert attributes.removed == {"color", "cart", "profile"}
+    assert attributes.changed == {}
+    assert attributes._dict() == {}
+
+
+def test_app_shares_incoming(set_color_intent_request):
+    app = echokit.EchoKit("")
+    seen = []
+
+    @app.intent("MyColorIsIntent")
+    def my_color_is(request, session):
+        response = app.response("Hi")
+        seen.append(response.session_attributes.changed)
+        return response
+
+    attributes = _original()
+    set_color_intent_request["session"]["attributes"] = attributes
+    response = app.handler(set_color_intent_request, {})
+    assert seen == [{}]
+    assert response["sessionAttributes"] is attributes
+    assert type(response["sessionAttributes"]) is dict
+
+
+def test_app_changes(set_color_intent_request):
+    app = echokit.EchoKit("")
+
+    @app.intent("MyColorIsIntent")
+    def my_color_is(request, session):
+        response = app.response("Hi")
+        response.session_attributes["cart"].append("pear")
+        return response
+
+    request = copy.deepcopy(set_color_intent_request)
+    request["session"]["attributes"] = _original()
+    response = app.handler(request, {})
+    assert request["session"]["attributes"]["cart"] == ["apple"]
+    assert response["sessionAttributes"]["cart"] == ["apple", "pear"]
@@ -0,0 +1,122 @@
+import copy
+import json
+import pytest
+import echokit
+from os import path
+from echokit.cache import ResponseCache
+
+
+@pytest.fixture
+def set_color_intent_request():
+    request_path = path.join(path.dirname(__file__), "requests",
+                             "set_color_intent.txt")
+    with open(request_path) as f:
+        return json.load(f)
+
+
+def _with(request, color=None, locale=None, attributes=None):
+    request = copy.deepcopy(request)
+    if color is not None:
+        request["request"]["intent"]["slots"]["color"]["value"] = color
+    if locale is not None:
+        request["request"]["locale"] = locale
+    if attributes is not None:
+        request["session"]["attributes"] = attributes
+    return request
+
+
+def _app(**cache_kwargs):
+    app = echokit.EchoKit("")
+    calls = []
+
+    @app.intent("MyColorIsIntent")
+    @app.cached(**cache_kwargs)
+    @app.slot("color")
+    def my_color_is(request, session, color):
+        calls.append(color)
+        return app.response(f"Your color is {color}")
+    return app, my_color_is, calls
+
+
+def test_hits_and_misses(set_color_intent_request):
+    app, handler, calls = _app()
+    for color in ("red", " RED ", "blue", "red"):
+        response = app.handler(_with(set_color_intent_request, color), {})
+    assert calls == ["red", "blue"]
+    assert response["response"]["outputSpeech"]["text"] == "Your color is red"
+    stats = app.cache_stats()[f"{__name__}._app.<locals>.my_color_is"]
+    assert stats["hits"] == 2
+    assert stats["misses"] == 2
+    assert stats["size"] == 2
+    assert handler.cache.stats() == stats
+
+
+def test_stats_by_qualified_name():
+    app = echokit.EchoKit("")
+
+    class Colors:
+        @app.cached()
+        def on_help(request, session):
+            return app.response("Colors")
+
+    class Sizes:
+        @app.cached()
+        def on_help(request, session):
+            return app.response("Sizes")
+    assert sorted(app.cache_stats()) == [
+        f"{__name__}.test_stats_by_qualified_name.<locals>.Colors.on_help",
+        f"{__name__}.test_stats_by_qualified_name.<locals>.Sizes.on_help",
+    ]
+
+
+def test_locale_in_key(set_color_intent_request):
+    app, _, calls = _app()
+    app.handler(_with(set_color_intent_request, locale="en-US"), {})
+    app.handler(_with(set_color_intent_request, locale="en-GB"), {})
+    assert len(calls) == 2
+
+
+def test_session_attributes_per_request(set_color_intent_request):
+    app, _, calls = _app()
+    first = app.handler(_with(set_color_intent_request,
+                              attributes={"user": "a"}), {})
+    second = app.handler(_with(set_color_intent_request,
+                               attributes={"user": "b"}), {})
+    assert len(calls) == 1
+    assert first["sessionAttributes"] == {"user": "a"}
+    assert second["sessionAttributes"] == {"user": "b"}
+    assert second["response"] == first["response"]
+
+
+def test_ttl(set_color_intent_request):
+    app, _, calls = _app(ttl=0)
+    app.handler(set_color_intent_request, {})
+    app.handler(set_color_intent_request, {})
+    assert len(calls) == 2
+
+
+def test_lru_eviction():
+    cache = ResponseCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_async_handler(set_color_intent_request):
+    app = echokit.EchoKit("")
+    calls = []
+
+    @app.intent("MyColorIsIntent")
+    @app.cached()
+    async def my_color_is(request, session):
+        calls.append(1)
+        return app.response("Hi")
+
+    for _ in range(3):
+        response = app.handler(set_color_intent_request, {})
+    assert response["response"]["outputSpeech"]["text"] == "Hi"
+    assert len(calls) == 1
@@ -0,0 +1,153 @@
+import gzip
+import json
+import threading
+import pytest
+import echokit
+from os import path
+from echokit.capture import CaptureSink
+from echokit.echoreplay import read_events
+from echokit.exc import ASKException
+from echokit.logs import REDACTED
+
+
+@pytest.fixture
+def set_color_intent_request():
+    request_path = path.join(path.dirname(__file__), "requests",
+                             "set_color_intent.txt")
+    with open(request_path) as f:
+        return json.load(f)
+
+
+def _lines(file_path):
+    with gzip.open(file_path, "rt") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_app_capture(tmp_path, set_color_intent_request):
+    sink = CaptureSink(str(tmp_path))
+    app = echokit.EchoKit("", capture=sink)
+
+    @app.intent("MyColorIsIntent")
+    def my_color_is(request, session):
+        return app.response("Hi")
+
+    set_color_intent_request["context"]["System"]["apiAccessToken"] = "secret"
+    for _ in range(3):
+        app.handler(set_color_intent_request, {})
+    assert sink.flush()
+    assert sink.stats()["written"] == 3
+    records = _lines(sink.files[0])
+    assert len(records) == 3
+    assert records[0]["response"]["response"]["outputSpeech"]["text"] == "Hi"
+    assert records[0]["event"]["context"]["System"]["apiAccessToken"] == \
+        REDACTED
+    # The event itself isn't modified
+    assert set_color_intent_request["context"]["System"]["apiAccessToken"] \
+        == "secret"
+    # Captured files can be replayed
+    events = list(read_events(sink.files[0]))
+    assert events[0]["request"]["intent"]["name"] == "MyColorIsIntent"
+    sink.close()
+
+
+def test_snapshot(tmp_path):
+    sink = CaptureSink(str(tmp_path), compression=None, redact=())
+    event = {"n": 1, "attributes": {"color": "red"}}
+    sink.capture(event, {"speech": "Hi"})
+    # Changes made after capturing aren't recorded
+    event["attributes"]["color"] = "blue"
+    assert sink.flush()
+    sink.close()
+    with open(sink.files[0]) as f:
+        assert json.loads(f.read()) == {
+            "event": {"n": 1, "attributes": {"color": "red"}},
+            "response": {"speech": "Hi"},
+        }
+
+
+def test_writer_survives_errors(tmp_path):
+    blocker = tmp_path / "not_a_directory"
+    blocker.write_text("")
+    sink = CaptureSink(str(blocker), compression=None)
+    sink.capture({"n": 1}, {})
+    # The file can't be opened: the record is dropped, quickly
+    assert sink.flush(timeout=2)
+    assert sink.stats()["errors"] == 1
+    assert sink.stats()["dropped"] == 1
+    # The writer is still running, and writes once it can
+    sink.directory = str(tmp_path / "capture")
+    sink.capture({"n": 2}, {})
+    assert sink.flush(timeout=2)
+    sink.close()
+    assert sink.stats()["written"] == 1
+
+
+def test_rotation(tmp_path):
+    sink = CaptureSink(str(tmp_path), compression=None, max_bytes=100,
+                       batch_size=1)
+    for i in range(3):
+        sink.capture({"n": i, "padding": "x" * 100}, {})
+        assert sink.flush()
+    sink.close()
+    assert len(sink.files) == 3
+    assert all(f.endswith(".jsonl") for f in sink.files)
+
+
+def _blocked_sink(tmp_path, **kwargs):
+    """Sink whose writer is stuck until the returned event is set"""
+    sink = CaptureSink(str(tmp_path), queue_size=2, batch_size=100,
+                       flush_interval=60, **kwargs)
+    release = threading.Event()
+    write = sink._write
+
+    def slow_write(batch):
+        release.wait()
+        return write(batch)
+    sink._write = slow_write
+    return sink, release
+
+
+@pytest.mark.parametrize("policy, expected", [
+    ("drop_newest", [0, 1]),
+    ("drop_oldest", [2, 3]),
+    ("block", [0, 1]),
+])
+def test_policies(tmp_path, policy, expected):
+    sink, release = _blocked_sink(tmp_path, policy=policy,
+                                  block_timeout=0.01)
+    queued = [sink.capture({"n": i}, {}) for i in range(4)]
+    assert sink.stats()["dropped"] == 2
+    assert queued == ([True] * 4 if policy == "drop_oldest" else
+                      [True, True, False, False])
+    release.set()
+    assert sink.flush()
+    assert [r["event"]["n"] for r in _lines(sink.files[0])] == expected
+    sink.close()
+
+
+def test_sampling_and_close(tmp_path):
+    sink = CaptureSink(str(tmp_path), sample_rate=0)
+    assert not sink.capture({}, {})
+    sink.sample_rate = 1
+    assert sink.capture({}, {})
+    sink.close()
+    assert sink.stats()["written"] == 1
+    assert not sink.capture({}, {})
+
+
+def test_invalid_options(tmp_path):
+    with pytest.raises(ASKException):
+        CaptureSink(str(tmp_path), policy="wait_forever")
+    with pytest.raises(ASKException):
+        CaptureSink(str(tmp_path), compression="lzma")
+
+
+def test_zstd(tmp_path):
+    pytest.importorskip("zstandard")
+    sink = CaptureSink(str(tmp_path), compression="zstd")
+    sink.capture({"request": {"type": "LaunchRequest"}}, {})
+    assert sink.flush()
+    assert sink.files[0].endswith(".jsonl.zst")
+    assert list(read_events(sink.files[0])) == \
+        [{"request": {"type": "LaunchRequest"}}]
+    sink.close()
@@ -0,0 +1,91 @@
+import json
+import pytest
+import echokit
+from os import path
+from echokit import catalog as catalog_module
+from echokit.catalog import MessageCatalog
+from echokit.exc import ASKException
+
+MESSAGES = path.join(path.dirname(__file__), "messages")
+
+
+@pytest.fixture
+def set_color_intent_request():
+    request_path = path.join(path.dirname(__file__), "requests",
+                             "set_color_intent.txt")
+    with open(request_path) as f:
+        return json.load(f)
+
+
+@pytest.fixture(autouse=True)
+def clear_index():
+    catalog_module._index.clear()
+
+
+def test_lazy_loading():
+    catalog = MessageCatalog(MESSAGES)
+    assert catalog_module._index == {}
+    assert catalog.format("welcome", "en-US", name="Bob") == "Welcome, Bob!"
+    assert list(catalog_module._index) == [(catalog.directory, "en-US")]
+
+
+def test_fallback():
+    catalog = MessageCatalog(MESSAGES)
+    assert catalog.format("welcome", "de-DE", name="Bob") == \
+        "Willkommen, Bob!"
+    assert catalog.format("welcome", "fr-FR", name="Bob") == "Welcome, Bob!"
+    # The fallback is remembered for the requested locale
+    assert catalog_module._index[(catalog.directory, "fr-FR")] is \
+        catalog.messages("en-US")
+
+
+def test_key_fallback():
+    catalog = MessageCatalog(MESSAGES)
+    # de.json has no goodbye message, so en-US's is used
+    assert catalog.format("goodbye", "de-DE", name="Bob") == \
+        '<speak>Goodbye, Bob!<break time="300ms"/></speak>'
+    assert catalog.get("goodbye", "de") is catalog.get("goodbye", "en-US")
+    assert catalog.format("welcome", "de-DE", name="Bob") == \
+        "Willkommen, Bob!"
+    with pytest.raises(ASKException):
+        catalog.get("not_a_message", "de-DE")
+
+
+def test_shared_index():
+    first = MessageCatalog(MESSAGES).messages("en-US")
+    assert MessageCatalog(MESSAGES).messages("en-US") is first
+
+
+def test_errors(tmp_path):
+    catalog = MessageCatalog(MESSAGES)
+    with pytest.raises(ASKException):
+        catalog.format("not_a_message")
+    with pytest.raises(ASKException):
+        catalog.format("welcome")
+    with pytest.raises(ASKException):
+        MessageCatalog(str(tmp_path)).messages("en-US")
+    (tmp_path / "en-US.json").write_text('{"bad": "Hi {key}"}')
+    with pytest.raises(ASKException):
+        MessageCatalog(str(tmp_path)).messages("en-US")
+    # Invalid SSML fails when the locale is loaded
+    (tmp_path / "de.json").write_text('{"bad": "<speak>Hi {name}"}')
+    with pytest.raises(ASKException, match="Invalid SSML for 'bad'"):
+        MessageCatalog(str(tmp_path)).messages("de")
+
+
+def test_app_response(set_color_intent_request):
+    app = echokit.EchoKit("", catalog=MessageCatalog(MESSAGES))
+
+    @app.intent("MyColorIsIntent")
+    @app.slot("color")
+    def my_color_is(request, session, color):
+        return app.response(key="goodbye", name=color) \
+            .reprompt(app.message("welcome", name="<you>"))
+
+    set_color_intent_request["request"]["locale"] = "en-GB"
+    body = app.handler(set_color_intent_request, {})["response"]
+    assert body["outputSpeech"] == {
+        "type": "SSML",
+        "ssml": '<speak>Goodbye, red!<break time="300ms"/></speak>'
+    }
+    assert body["reprompt"]["outputSpeech"]["text"] == "Welcome, <you>!"
@@ -0,0 +1,87 @@
+import copy
+import json
+import pytest
+import echokit
+from os import path
+from echokit.codec import (AttributeCodec, LazyAttributes, SizeAccountant,
+                           PREFIX)
+from echokit.exc import ASKException
+
+HISTORY = [{"turn": i, "said": "what's my favorite color"} for i in range(50)]
+
+
+@pytest.fixture
+def set_color_intent_request():
+    request_path = path.join(path.dirname(__file__), "requests",
+                             "set_color_intent.txt")
+    with open(request_path) as f:
+        return json.load(f)
+
+
+def test_round_trip():
+    codec = AttributeCodec(threshold=100)
+    encoded = codec.encode({"history": HISTORY, "color": "red"})
+    assert encoded["color"] == "red"
+    assert encoded["history"].startswith(PREFIX)
+    assert len(encoded["history"]) < len(json.dumps(HISTORY))
+    assert codec.decode_value(encoded["history"]) == HISTORY
+    with pytest.raises(ASKException):
+        codec.decode_value(PREFIX + "not encoded")
+
+
+def test_lazy_decoding():
+    codec = AttributeCodec(threshold=100)
+    attributes = codec.decode(codec.encode({"history": HISTORY,
+                                            "color": "red"}))
+    assert dict.__getitem__(attributes, "history").startswith(PREFIX)
+    assert attributes == {"history": HISTORY, "color": "red"}
+    assert attributes.get("history") == HISTORY
+    assert dict.__getitem__(attributes, "history") == HISTORY
+    assert attributes.pop("history") == HISTORY
+    assert attributes.copy() == {"color": "red"}
+
+
+def test_untouched_values_pass_through():
+    codec = AttributeCodec(threshold=100)
+    encoded = codec.encode({"history": HISTORY})
+    attributes = LazyAttributes(encoded, codec)
+    attributes["color"] = "red"
+    assert codec.encode(attributes)["history"] is encoded["history"]
+
+
+def test_app(set_color_intent_request):
+    codec = AttributeCodec(threshold=100)
+    app = echokit.EchoKit("", codec=codec)
+
+    @app.intent("MyColorIsIntent")
+    @app.slot("color")
+    def my_color_is(request, session, color):
+        assert session.attributes["history"] == HISTORY
+        session.attributes["history"].append({"turn": 50, "said": color})
+        return app.response(f"Turn {len(session.attributes['history'])}")
+
+    request = copy.deepcopy(set_color_intent_request)
+    request["session"]["attributes"] = codec.encode({"history": HISTORY})
+    encoded = copy.deepcopy(request["session"]["attributes"])
+    response = app.handler(request, {})
+    # The incoming event keeps its encoded attributes
+    assert request["session"]["attributes"] == encoded
+    assert response["response"]["outputSpeech"]["text"] == "Turn 51"
+    attributes = response["sessionAttributes"]
+    assert type(attributes) is dict
+    assert codec.decode_value(attributes["history"])[-1] == \
+        {"turn": 50, "said": "red"}
+
+
+def test_size_accountant(caplog):
+    accountant = SizeAccountant(limit=200, warn_ratio=0.5)
+    assert accountant.check({"response": {}}) < 100
+    assert not caplog.records
+    accountant.check({"response": {}, "sessionAttributes": {"a": "x" * 100}})
+    assert "nearing" in caplog.records[-1].getMessage()
+    too_big = {"response": {}, "sessionAttributes": {"a": "x" * 300}}
+    with pytest.raises(ASKException) as e:
+        accountant.check(too_big)
+    assert "'a': 302" in str(e.value)
+    SizeAccountant(limit=200, strict=False).check(too_big)
+    assert "over the 200 byte limit" in caplog.records[-1].getMessage()
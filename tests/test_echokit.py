@@ -1,6 +1,7 @@
 import pytest
 import echokit
 import json
+import threading
 
 
 @pytest.fixture(scope="module")
@@ -36,3 +37,203 @@ def test_verify_app_id(set_color_intent_request):
         app.handler(set_color_intent_request, {})
 
 
+def test_event_untouched(set_color_intent_request):
+    import copy
+    app = echokit.EchoKit("")
+
+    @app.intent("MyColorIsIntent")
+    def tmp_handler(request, session):
+        session.attributes["color"] = "red"
+        assert session.attributes["color"] == "red"
+        assert session._dict()["attributes"] == {"color": "red"}
+        return app.response("Hi")
+
+    request = copy.deepcopy(set_color_intent_request)
+    request["session"].pop("attributes", None)
+    original = copy.deepcopy(request)
+    response = app.handler(request, {})
+    assert response["sessionAttributes"] == {"color": "red"}
+    assert request == original
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"typed": False},
+                                    {"typed": False, "lazy": True}])
+def test_slot_dispatch(set_color_intent_request, kwargs):
+    app = echokit.EchoKit("", **kwargs)
+
+    @app.intent("MyColorIsIntent")
+    @app.slot("color")
+    def tmp_handler(request, session, color):
+        return app.response(f"Your color is {color}")
+
+    response = app.handler(set_color_intent_request, {})
+    assert response["response"]["outputSpeech"]["text"] == "Your color is red"
+
+
+def test_concurrent_sessions(set_color_intent_request):
+    import copy
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from echokit.context import current_context
+    app = echokit.EchoKit("")
+
+    @app.intent("MyColorIsIntent")
+    @app.slot("color")
+    def tmp_handler(request, session, color):
+        # Yield to other threads between reading the session and
+        # creating the response to encourage interleaving
+        time.sleep(0)
+        assert current_context().session is session
+        response = app.response(color)
+        response.session_attributes["turns"] += 1
+        return response
+
+    def run_session(n):
+        event = copy.deepcopy(set_color_intent_request)
+        event["request"]["intent"]["slots"]["color"]["value"] = f"color_{n}"
+        attributes = {"session": n, "turns": 0}
+        for _ in range(3):
+            event["session"]["attributes"] = attributes
+            response = app.handler(event, {})
+            attributes = response["sessionAttributes"]
+            assert response["response"]["outputSpeech"]["text"] == f"color_{n}"
+        return attributes
+
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        results = list(pool.map(run_session, range(2000)))
+    assert results == [{"session": n, "turns": 3} for n in range(2000)]
+    assert current_context() is None
+
+
+class TestAsyncHandlers:
+    @staticmethod
+    def _app():
+        import asyncio
+        app = echokit.EchoKit("")
+
+        @app.intent("MyColorIsIntent")
+        @app.slot("color")
+        async def tmp_handler(request, session, color):
+            await asyncio.sleep(0)
+            return app.response(f"Your color is {color}")
+        return app
+
+    def test_handler(self, set_color_intent_request):
+        app = self._app()
+        response = app.handler(set_color_intent_request, {})
+        assert response["response"]["outputSpeech"]["text"] == \
+            "Your color is red"
+
+    def test_loop_reused(self, set_color_intent_request):
+        app = self._app()
+        app.handler(set_color_intent_request, {})
+        loop = app._event_loop()
+        app.handler(set_color_intent_request, {})
+        assert app._event_loop() is loop
+        assert not loop.is_closed()
+
+    def test_handle_async(self, set_color_intent_request):
+        import asyncio
+        app = self._app()
+
+        async def main():
+            return await asyncio.gather(*(
+                app.handle_async(set_color_intent_request, {})
+                for _ in range(10)))
+
+        for response in asyncio.run(main()):
+            assert response["response"]["outputSpeech"]["text"] == \
+                "Your color is red"
+
+
+def test_on_init(set_color_intent_request):
+    app = echokit.EchoKit("")
+    calls = []
+
+    @app.intent("MyColorIsIntent")
+    def my_color_is(request, session):
+        return app.response("Hi")
+
+    app.on_init(lambda: calls.append("first"))
+    app.handler(set_color_intent_request, {})
+    app.handler(set_color_intent_request, {})
+    assert calls == ["first"]
+    # Registered after initializing, so run straight away
+    app.on_init(lambda: calls.append("second"))
+    assert calls == ["first", "second"]
+    assert app.initialize() is app
+    assert calls == ["first", "second"]
+
+
+def test_on_init_reentrant(set_color_intent_request):
+    app = echokit.EchoKit("")
+    calls = []
+
+    @app.intent("MyColorIsIntent")
+    def my_color_is(request, session):
+        return app.response("Hi")
+
+    @app.on_init
+    def warm_up():
+        # Handling a request and registering a hook from a hook
+        calls.append(app.handler(set_color_intent_request, {}))
+        app.on_init(lambda: calls.append("nested"))
+
+    thread = threading.Thread(target=app.initialize, daemon=True)
+    thread.start()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert calls[0]["response"]["outputSpeech"]["text"] == "Hi"
+    assert calls[1:] == ["nested"]
+
+
+def test_on_init_failure_retried():
+    app = echokit.EchoKit("")
+    attempts = []
+
+    @app.on_init
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("not yet")
+
+    with pytest.raises(RuntimeError):
+        app.initialize()
+    app.initialize()
+    assert len(attempts) == 2
+
+
+def test_lazy_imports():
+    import subprocess
+    import sys
+    from os import path
+    script = ("import sys, echokit\n"
+              "heavy = {'inspect', 'sqlite3', 'datetime', 'random', 'asyncio',"
+              " 'xml.etree.ElementTree', 'echokit.router'}\n"
+              "print(sorted(heavy & set(sys.modules)))\n"
+              "echokit.Router\n"
+              "print('echokit.router' in sys.modules)")
+    root = path.dirname(path.dirname(path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-c", script], cwd=root,
+                            check=True, capture_output=True, text=True)
+    assert output.stdout.split("\n")[:2] == ["[]", "True"]
+    with pytest.raises(AttributeError):
+        echokit.NotAThing
+
+
+def test_coroutine_detection():
+    from functools import partial
+    from echokit.echokit import _is_coroutine_function
+
+    async def handler(request, session):
+        pass
+
+    class Handlers:
+        async def method(self):
+            pass
+
+    assert _is_coroutine_function(handler)
+    assert _is_coroutine_function(partial(handler, None))
+    assert _is_coroutine_function(Handlers().method)
+    assert not _is_coroutine_function(lambda: None)
+    assert not _is_coroutine_function(print)
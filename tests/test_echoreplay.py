@@ -0,0 +1,73 @@
+import json
+import pytest
+from os import path
+from echokit.echoreplay import replay, format_report, read_events
+
+SKILL = '''
+from echokit import EchoKit
+
+app = EchoKit("", verify_app_id=False)
+handler = app.handler
+
+
+@app.intent("MyColorIsIntent")
+@app.slot("color")
+def my_color_is(request, session, color):
+    if color == "boom":
+        raise ValueError("boom")
+    return app.response(color)
+'''
+
+
+@pytest.fixture
+def replay_files(tmp_path):
+    request_path = path.join(path.dirname(__file__), "requests",
+                             "set_color_intent.txt")
+    with open(request_path) as f:
+        event = json.load(f)
+    lines = []
+    for i in range(20):
+        color = "boom" if i % 10 == 0 else f"color_{i}"
+        event["request"]["intent"]["slots"]["color"]["value"] = color
+        # Mix bare events with captured {"event": ..., "response": ...}
+        lines.append(json.dumps(event if i % 2 else {"event": event}))
+    events_path = tmp_path / "events.jsonl"
+    events_path.write_text("\n".join(lines) + "\n")
+    (tmp_path / "replay_skill.py").write_text(SKILL)
+    return str(events_path), str(tmp_path)
+
+
+def test_read_events(replay_files):
+    events_path, _ = replay_files
+    events = list(read_events(events_path, limit=5))
+    assert len(events) == 5
+    assert all("request" in event for event in events)
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_replay(replay_files, processes):
+    events_path, app_dir = replay_files
+    report = replay(events_path, "replay_skill", app_dir=app_dir,
+                    processes=processes, warmup=5)
+    assert report["events"] == 15
+    assert report["intents"]["MyColorIsIntent"]["count"] == 15
+    assert report["errors"] == {"ValueError: boom": 1}
+    assert report["throughput"] > 0
+    assert "MyColorIsIntent" in format_report(report)
+
+
+def test_rate(replay_files):
+    events_path, app_dir = replay_files
+    report = replay(events_path, "replay_skill:app", app_dir=app_dir,
+                    rate=100, limit=10)
+    assert report["events"] == 10
+    assert report["elapsed"] >= 0.09
+
+
+def test_sys_path_not_grown(replay_files):
+    import sys
+    events_path, app_dir = replay_files
+    replay(events_path, "replay_skill", app_dir=app_dir, limit=1)
+    length = len(sys.path)
+    replay(events_path, "replay_skill", app_dir=app_dir, limit=1)
+    assert len(sys.path) == length
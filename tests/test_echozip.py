@@ -0,0 +1,173 @@
+import os
+import sys
+import zipfile
+import pytest
+from echokit.echozip import (STORED, Layout, ZipCache, collect, echozip,
+                             report)
+
+
+@pytest.fixture
+def project(tmp_path):
+    project = tmp_path / "skill"
+    (project / "data").mkdir(parents=True)
+    (project / "__pycache__").mkdir()
+    (project / "skill.py").write_text("from echokit import EchoKit\n" * 50 +
+                                      "handler = EchoKit('').handler\n")
+    (project / "data" / "facts.txt").write_text("A fact\n" * 100)
+    (project / "data" / "random.bin").write_bytes(os.urandom(4096))
+    (project / "__pycache__" / "skill.cpython-311.pyc").write_bytes(b"x")
+    return project
+
+
+def test_contents(project, tmp_path):
+    output = str(tmp_path / "skill.zip")
+    cwd = os.getcwd()
+    result = echozip(str(project), output=output)
+    assert os.getcwd() == cwd
+    with zipfile.ZipFile(output) as archive:
+        assert archive.testzip() is None
+        names = archive.namelist()
+        assert names == sorted(names)
+        assert "skill.py" in names
+        assert "data/facts.txt" in names
+        assert "echokit/__init__.py" in names
+        assert not any("__pycache__" in name for name in names)
+        assert archive.read("skill.py") == \
+            (project / "skill.py").read_bytes()
+        info = archive.getinfo("data/facts.txt")
+        assert info.date_time == (1980, 1, 1, 0, 0, 0)
+        assert info.external_attr >> 16 & 0o777 == 0o644
+        assert info.compress_size < info.file_size
+    # Incompressible data is stored as is
+    stored = [e for e in result.entries if e.name == "data/random.bin"][0]
+    assert stored.method == STORED
+    assert stored.compressed_size == stored.size == 4096
+    assert len(result.entries) == len(names)
+
+
+def test_reproducible(project, tmp_path):
+    first = echozip(str(project), output=str(tmp_path / "first.zip"))
+    os.utime(project / "skill.py", (0, 0))
+    second = echozip(str(project), output=str(tmp_path / "second.zip"),
+                     workers=1)
+    with open(first.path, "rb") as a, open(second.path, "rb") as b:
+        assert a.read() == b.read()
+
+
+def test_cache(project, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    first = echozip(str(project), output=str(tmp_path / "first.zip"),
+                    cache=ZipCache(cache_dir))
+    assert first.hits == 0
+    assert first.misses == len(first.entries)
+    # A new cache (as in a later build) reads entries from disk
+    (project / "skill.py").write_text("from echokit import EchoKit\n")
+    second = echozip(str(project), output=str(tmp_path / "second.zip"),
+                     cache=ZipCache(cache_dir))
+    assert second.misses == 1
+    assert second.hits == len(second.entries) - 1
+    with zipfile.ZipFile(second.path) as archive:
+        assert archive.testzip() is None
+        assert archive.read("skill.py") == b"from echokit import EchoKit\n"
+        assert archive.read("data/random.bin") == \
+            (project / "data" / "random.bin").read_bytes()
+
+
+def test_collect_skips_vendored_echokit(project):
+    (project / "echokit").mkdir()
+    (project / "echokit" / "old.py").write_text("")
+    names = [name for name, source in collect(str(project))]
+    assert "echokit/old.py" not in names
+    assert "echokit/echokit.py" in names
+
+
+def test_errors(project, tmp_path):
+    with pytest.raises(NotADirectoryError):
+        echozip(str(tmp_path / "missing"))
+    output = tmp_path / "exists.zip"
+    output.write_bytes(b"")
+    with pytest.raises(FileExistsError):
+        echozip(str(project), output=str(output))
+
+
+def test_layout_rules():
+    layout = Layout(exclude=("tests/", "*.md", "data/*.csv"),
+                    include=("docs/keep.md",))
+    assert layout.excluded("tests/test_skill.py")
+    assert layout.excluded("skill/tests/fixtures/event.json")
+    assert layout.excluded("README.md")
+    assert layout.excluded("data/facts.csv")
+    assert not layout.excluded("docs/keep.md")
+    assert not layout.excluded("tests.py")
+    assert not layout.excluded("other/data/facts.csv")
+
+
+def test_cold_start_hidden():
+    layout = Layout.cold_start()
+    assert layout.excluded(".env")
+    assert layout.excluded(".git/HEAD")
+    assert layout.excluded(".venv/lib/python3.11/site-packages/six.py")
+    assert layout.excluded("skill/.pytest_cache/v/cache/nodeids")
+    assert not layout.excluded("skill/main.py")
+    assert not layout.excluded("skill/data.v1.json")
+
+
+@pytest.fixture
+def cold_start_project(project):
+    (project / "tests").mkdir()
+    (project / "tests" / "test_skill.py").write_text("")
+    (project / "README.md").write_text("# Skill")
+    (project / "icon.png").write_bytes(b"\x89PNG" + b"\0" * 1000)
+    (project / "broken.py").write_text("def broken(:\n")
+    return project
+
+
+def test_cold_start(cold_start_project, tmp_path):
+    result = echozip(str(cold_start_project), output=str(tmp_path / "a.zip"),
+                     layout=Layout.cold_start())
+    tag = sys.implementation.cache_tag
+    with zipfile.ZipFile(result.path) as archive:
+        names = archive.namelist()
+        assert "skill.py" in names
+        assert f"__pycache__/skill.{tag}.pyc" in names
+        assert f"echokit/__pycache__/echokit.{tag}.pyc" in names
+        assert "tests/test_skill.py" not in names
+        assert "README.md" not in names
+        # Unchecked hash-based bytecode
+        pyc = archive.read(f"__pycache__/skill.{tag}.pyc")
+        assert pyc[4:8] == b"\x01\0\0\0"
+        assert archive.getinfo("icon.png").compress_type == STORED
+    assert [name for name, error in result.failed] == ["broken.py"]
+    # Bytecode is reproducible too
+    again = echozip(str(cold_start_project), output=str(tmp_path / "b.zip"),
+                    layout=Layout.cold_start())
+    with open(result.path, "rb") as a, open(again.path, "rb") as b:
+        assert a.read() == b.read()
+
+
+def test_sourceless(project, tmp_path):
+    result = echozip(str(project), output=str(tmp_path / "a.zip"),
+                     layout=Layout.cold_start(sources=False))
+    with zipfile.ZipFile(result.path) as archive:
+        names = archive.namelist()
+    assert "skill.pyc" in names
+    assert "skill.py" not in names
+    assert "echokit/__init__.pyc" in names
+    # The sourceless bundle still imports
+    bundle = report(result, handler="skill.handler", runs=1)
+    assert bundle.import_ms > 0
+
+
+def test_report(project, tmp_path):
+    result = echozip(str(project), output=str(tmp_path / "a.zip"),
+                     layout=Layout.cold_start())
+    bundle = report(result, handler="skill.handler", runs=2)
+    assert bundle.size == os.path.getsize(result.path)
+    assert bundle.uncompressed > bundle.size
+    assert bundle.bytecode > 0
+    assert bundle.module == "skill"
+    assert len(bundle.import_times) == 2
+    assert "echokit/" in bundle.sizes
+    text = str(bundle)
+    assert "import skill:" in text
+    assert "bytecode:" in text
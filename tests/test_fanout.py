@@ -0,0 +1,169 @@
+import json
+import time
+import pytest
+import echokit
+from os import path
+from echokit.context import current_context
+from echokit import fanout
+from echokit.fanout import (fan_out, fan_out_async, current_deadline,
+                            executor)
+
+
+@pytest.fixture
+def set_color_intent_request():
+    request_path = path.join(path.dirname(__file__), "requests",
+                             "set_color_intent.txt")
+    with open(request_path) as f:
+        return json.load(f)
+
+
+def backend(value, latency=0.0, error=None):
+    """Fake backend call with injected latency"""
+    def call():
+        time.sleep(latency)
+        if error is not None:
+            raise error
+        return value
+    return call
+
+
+class LambdaContext:
+    def __init__(self, remaining_ms):
+        self.remaining_ms = remaining_ms
+
+    def get_remaining_time_in_millis(self):
+        return self.remaining_ms
+
+
+def test_parallel():
+    started = time.monotonic()
+    result = fan_out({"a": backend(1, 0.1), "b": backend(2, 0.1),
+                      "c": backend(3, 0.1)}, timeout=1)
+    assert time.monotonic() - started < 0.25
+    assert result.complete
+    assert result.results == {"a": 1, "b": 2, "c": 3}
+    assert result["a"] == 1
+    assert result.response is None
+
+
+def test_deadline_and_errors():
+    started = time.monotonic()
+    result = fan_out({"fast": backend(1), "slow": backend(2, 1.0),
+                      "broken": backend(3, error=ValueError("down"))},
+                     timeout=0.1)
+    assert time.monotonic() - started < 0.5
+    assert not result.complete
+    assert result.results == {"fast": 1}
+    assert result.timed_out == {"slow"}
+    assert isinstance(result.errors["broken"], ValueError)
+    assert result.get("slow") is None
+    with pytest.raises(KeyError):
+        result["slow"]
+
+
+def test_fallback():
+    calls = {"fast": backend(1), "slow": backend(2, 0.5)}
+    result = fan_out(calls, timeout=0.05, fallback=lambda r: "fallback")
+    assert result.response == "fallback"
+    result = fan_out(calls, timeout=0.05, required=["fast"],
+                     fallback=lambda r: "fallback")
+    assert result.response is None
+
+
+def test_deadline_visible_to_calls():
+    def cooperative():
+        deadline = current_deadline()
+        while not deadline.cancelled:
+            time.sleep(0.01)
+        return deadline.remaining()
+
+    result = fan_out({"c": cooperative}, timeout=0.05)
+    assert result.timed_out == {"c"}
+    assert current_deadline() is None
+
+
+def test_shared_pool():
+    assert executor() is executor()
+
+
+def test_stuck_pool_replaced():
+    import threading
+    release = threading.Event()
+    pool = executor()
+    hung = {f"hung{i}": release.wait for i in range(fanout.WORKERS)}
+    try:
+        assert fan_out(hung, timeout=0.05).timed_out == set(hung)
+        # Every thread is stuck, so the next fan-out gets a new pool
+        result = fan_out({"a": backend(1)}, timeout=1)
+        assert result.results == {"a": 1}
+        assert executor() is not pool
+    finally:
+        release.set()
+
+
+def test_async(set_color_intent_request):
+    import asyncio
+    app = echokit.EchoKit("")
+    app.fan_out_budget = 0.2
+
+    @app.intent("MyColorIsIntent")
+    async def my_color_is(request, session):
+        ticks = []
+
+        async def tick():
+            while True:
+                ticks.append(1)
+                await asyncio.sleep(0.01)
+        ticker = asyncio.ensure_future(tick())
+        result = await app.fan_out_async({"color": backend("red", 0.05),
+                                          "slow": backend("blue", 1.0)})
+        ticker.cancel()
+        # The event loop kept running while the calls were awaited
+        assert len(ticks) >= 3
+        return app.response(f"{result['color']} {sorted(result.timed_out)}")
+
+    response = asyncio.run(app.handle_async(set_color_intent_request))
+    assert response["response"]["outputSpeech"]["text"] == "red ['slow']"
+
+
+def test_async_without_calls():
+    import asyncio
+    result = asyncio.run(fan_out_async({}, timeout=1))
+    assert result.complete
+
+
+def test_app_lambda_deadline(set_color_intent_request):
+    app = echokit.EchoKit("")
+    seen = {}
+
+    @app.intent("MyColorIsIntent")
+    def my_color_is(request, session):
+        def lookup():
+            # Request context is available to calls
+            seen["ctx"] = current_context()
+            return "red"
+        result = app.fan_out(
+            {"color": lookup, "slow": backend("blue", 1.0)},
+            fallback=lambda r: app.response(f"Only {r['color']}")
+        )
+        return result.response or app.response("All of them")
+
+    started = time.monotonic()
+    response = app.handler(set_color_intent_request, LambdaContext(400))
+    # 400ms left, less the 250ms margin
+    assert time.monotonic() - started < 0.4
+    assert response["response"]["outputSpeech"]["text"] == "Only red"
+    assert seen["ctx"] is not None
+
+
+def test_app_budget(set_color_intent_request):
+    app = echokit.EchoKit("")
+    app.fan_out_budget = 0.05
+
+    @app.intent("MyColorIsIntent")
+    def my_color_is(request, session):
+        result = app.fan_out({"slow": backend("blue", 0.5)})
+        return app.response(str(sorted(result.timed_out)))
+
+    response = app.handler(set_color_intent_request, {})
+    assert response["response"]["outputSpeech"]["text"] == "['slow']"
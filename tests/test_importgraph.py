@@ -0,0 +1,146 @@
+import ast
+import json
+import zipfile
+import pytest
+from echokit.echozip import Layout, collect, echozip, report
+from echokit.exc import ASKException
+from echokit.importgraph import module_name, shake
+
+MAIN = '''
+import importlib
+import json
+from os import path
+from importlib import import_module
+from echokit import EchoKit, Router
+from . import helpers
+from .sub import thing
+
+MESSAGES = path.join(path.dirname(__file__), "messages")
+
+
+def handler(event, context):
+    importlib.import_module("skill.plugins.alpha")
+    import_module(event["plugin"])
+'''
+
+
+@pytest.fixture
+def project(tmp_path):
+    project = tmp_path / "project"
+    files = {
+        "skill/__init__.py": "",
+        "skill/main.py": MAIN,
+        "skill/helpers.py": "import os.path\n",
+        "skill/unused.py": "import skill.helpers\n",
+        "skill/data.txt": "package data",
+        "skill/messages/en.json": "{}",
+        "skill/sub/__init__.py": "",
+        "skill/sub/thing.py": "from ..helpers import *\n",
+        "skill/sub/sub.txt": "subpackage data",
+        "skill/plugins/__init__.py": "",
+        "skill/plugins/alpha.py": "",
+        "skill/plugins/beta.py": "",
+        "notes.txt": "not needed",
+    }
+    for name, content in files.items():
+        (project / name).parent.mkdir(parents=True, exist_ok=True)
+        (project / name).write_text(content)
+    return project
+
+
+def test_shake(project):
+    manifest = shake(collect(str(project)), "skill.main.handler")
+    kept = manifest.files
+    assert kept["skill/main.py"] == ["entry point (skill.main.handler)"]
+    assert kept["skill/__init__.py"][0] == "parent package of skill/main.py"
+    assert "imported by skill/main.py:7" in kept["skill/helpers.py"]
+    assert "imported by skill/sub/thing.py:1" in kept["skill/helpers.py"]
+    assert "skill/sub/__init__.py" in kept
+    assert "skill/sub/thing.py" in kept
+    assert kept["skill/plugins/alpha.py"] == [
+        "imported by skill/main.py:14 (dynamically, with a literal name)"
+    ]
+    assert "skill/plugins/beta.py" not in kept
+    assert "skill/unused.py" not in kept
+    # Data files in kept packages, and mentioned by kept modules
+    assert kept["skill/data.txt"] == ["data file of package skill"]
+    assert kept["skill/sub/sub.txt"] == ["data file of package skill.sub"]
+    assert "mentioned by skill/main.py:10 ('messages')" in \
+        kept["skill/messages/en.json"]
+    assert "notes.txt" not in kept
+    # echokit's lazily loaded names are followed
+    assert any("loaded lazily" in reason
+               for reason in kept["echokit/router.py"])
+    assert "echokit/echokit.py" in kept
+    assert "echokit/server.py" not in kept
+    assert "echokit/echozip.py" not in kept
+    assert {"json", "os", "importlib"} <= manifest.external
+    assert "skill/main.py:15: import_module(event['plugin'])" in \
+        manifest.dynamic
+    # Unresolved calls are always listed, even in packages whose lazily
+    # loaded names are followed
+    assert any(d.startswith("echokit/__init__.py:") for d in manifest.dynamic)
+
+
+def test_lazy_names_as_attributes(project, tmp_path):
+    (project / "skill" / "main.py").write_text(
+        "import echokit\n"
+        "GOODBYE = echokit.ResponseTemplate('Goodbye')\n"
+        "handler = echokit.EchoKit('').handler\n"
+    )
+    manifest = shake(collect(str(project)), "skill.main.handler")
+    assert "loaded lazily as echokit.ResponseTemplate, echokit being " \
+           "imported by skill/main.py:1" in \
+        manifest.files["echokit/template.py"]
+    # The shaken bundle imports
+    result = echozip(str(project), output=str(tmp_path / "skill.zip"),
+                     layout=Layout(handler="skill.main.handler"))
+    assert report(result, handler="skill.main.handler", runs=1).import_ms
+
+
+def test_allow(project):
+    manifest = shake(collect(str(project)), "skill.main.handler",
+                     allow=("skill.plugins.*", "*.txt"))
+    assert manifest.files["skill/plugins/beta.py"] == \
+        ["allowed (skill.plugins.*)"]
+    assert manifest.files["notes.txt"] == ["allowed (*.txt)"]
+
+
+def test_unknown_handler(project):
+    with pytest.raises(ASKException):
+        shake(collect(str(project)), "skill.missing.handler")
+
+
+def test_module_name():
+    assert module_name("echokit/echokit.py") == "echokit.echokit"
+    assert module_name("skill/__init__.py") == "skill"
+    assert module_name("skill/data.txt") is None
+    assert module_name("my-skill/main.py") is None
+
+
+def test_echozip_manifest(project, tmp_path):
+    output = tmp_path / "skill.zip"
+    result = echozip(str(project), output=str(output),
+                     layout=Layout.cold_start(handler="skill.main.handler"))
+    with open(tmp_path / "skill.manifest.json") as f:
+        manifest = json.load(f)
+    with zipfile.ZipFile(result.path) as archive:
+        names = archive.namelist()
+    assert sorted(manifest["files"]) == names
+    assert "skill/unused.py" not in names
+    pyc = [name for name in names
+           if name.startswith("skill/__pycache__/main.")][0]
+    assert manifest["files"][pyc] == ["bytecode of skill/main.py"]
+
+
+def test_python37_strings():
+    # Python 3.7 parses string literals as ast.Str rather than
+    # ast.Constant
+    from echokit.importgraph import _string
+
+    class Str:
+        def __init__(self, s):
+            self.s = s
+    assert _string(Str("echokit.router")) == "echokit.router"
+    assert _string(ast.Constant(value="echokit")) == "echokit"
+    assert _string(ast.Constant(value=1)) is None
@@ -0,0 +1,83 @@
+import copy
+import json
+import logging
+import pytest
+import echokit
+from os import path
+from echokit.logs import RequestLogger, REDACTED
+
+
+@pytest.fixture(scope="module")
+def set_color_intent_request():
+    request_path = path.join(path.dirname(__file__), "requests",
+                             "set_color_intent.txt")
+    with open(request_path) as f:
+        request = json.load(f)
+    request["context"]["System"]["apiAccessToken"] = "secret"
+    return request
+
+
+class CountingLogger(RequestLogger):
+    records = 0
+
+    def record(self, *args):
+        self.records += 1
+        return super().record(*args)
+
+
+def _app(request_logger):
+    app = echokit.EchoKit("", request_logger=request_logger)
+
+    @app.intent("MyColorIsIntent")
+    def my_color_is(request, session):
+        return app.response("Hi")
+    return app
+
+
+def _logged(caplog):
+    return [json.loads(r.getMessage()) for r in caplog.records
+            if r.name == "test.echokit"]
+
+
+def test_lazy_when_disabled(set_color_intent_request, caplog):
+    caplog.set_level(logging.WARNING, logger="test.echokit")
+    request_logger = CountingLogger(logging.getLogger("test.echokit"))
+    _app(request_logger).handler(set_color_intent_request, {})
+    assert request_logger.records == 0
+    assert _logged(caplog) == []
+
+
+def test_sampling(set_color_intent_request, caplog):
+    caplog.set_level(logging.INFO, logger="test.echokit")
+    request_logger = CountingLogger(logging.getLogger("test.echokit"),
+                                    sample_rate=0)
+    _app(request_logger).handler(set_color_intent_request, {})
+    assert request_logger.records == 0
+
+
+def test_summary(set_color_intent_request, caplog):
+    caplog.set_level(logging.INFO, logger="test.echokit")
+    request_logger = RequestLogger(logging.getLogger("test.echokit"),
+                                   summary=True)
+    _app(request_logger).handler(set_color_intent_request, {})
+    record, = _logged(caplog)
+    assert set(record) == {"requestId", "type", "intent", "latencyMs"}
+    assert record["type"] == "IntentRequest"
+    assert record["intent"] == "MyColorIsIntent"
+
+
+def test_full_record_redacted(set_color_intent_request, caplog):
+    caplog.set_level(logging.INFO, logger="test.echokit")
+    event = copy.deepcopy(set_color_intent_request)
+    request_logger = RequestLogger(
+        logging.getLogger("test.echokit"),
+        redact=["event.context.System.apiAccessToken",
+                "response.response.outputSpeech.text"]
+    )
+    _app(request_logger).handler(event, {})
+    record, = _logged(caplog)
+    assert record["event"]["context"]["System"]["apiAccessToken"] == REDACTED
+    assert record["event"]["request"] == event["request"]
+    assert record["response"]["response"]["outputSpeech"]["text"] == REDACTED
+    # The event itself is left alone
+    assert event["context"]["System"]["apiAccessToken"] == "secret"
@@ -0,0 +1,109 @@
+import io
+import json
+import timeit
+import pytest
+import echokit
+from os import path
+from echokit.metrics import BUCKETS, Histogram, Metrics, PHASES
+
+
+@pytest.fixture(scope="module")
+def set_color_intent_request():
+    request_path = path.join(path.dirname(__file__), "requests",
+                             "set_color_intent.txt")
+    with open(request_path) as f:
+        return json.load(f)
+
+
+def _app(**kwargs):
+    app = echokit.EchoKit("", **kwargs)
+
+    @app.intent("MyColorIsIntent")
+    @app.slot("color")
+    def my_color_is(request, session, color):
+        return app.response(color)
+    return app
+
+
+def test_histogram():
+    histogram = Histogram()
+    assert histogram.percentile(50) is None
+    for _ in range(99):
+        histogram.observe(0.0001)
+    histogram.observe(1.0)
+    assert histogram.count == 100
+    assert 0.0001 <= histogram.percentile(50) < 0.0002
+    assert 0.0001 <= histogram.percentile(99) < 0.0002
+    assert histogram.percentile(100) >= 1.0
+
+
+def test_overflow():
+    metrics = Metrics()
+    metrics.record("Slow", 0.001, 0.001, 0.001, 60.0, 0.001)
+    histogram = metrics.histogram("Slow", "handler")
+    assert histogram.percentile(99) == BUCKETS[-1]
+    line, = metrics.emf()
+    # Strict JSON: no Infinity
+    record = json.loads(line, parse_constant=pytest.fail)
+    assert record["handlerP99"] == BUCKETS[-1] * 1000
+
+
+def test_records_phases(set_color_intent_request):
+    app = _app()
+    calls = []
+    app.metrics.add_hook(lambda name, timings: calls.append((name, timings)))
+    for _ in range(3):
+        app.handler(set_color_intent_request, {})
+    assert app.metrics.names() == ["MyColorIsIntent"]
+    for phase in PHASES:
+        assert app.metrics.histogram("MyColorIsIntent", phase).count == 3
+    name, timings = calls[0]
+    assert name == "MyColorIsIntent"
+    assert set(timings) == set(PHASES)
+    assert all(t >= 0 for t in timings.values())
+
+
+def test_disabled(set_color_intent_request):
+    app = _app(metrics=False)
+    assert app.metrics is None
+    app.handler(set_color_intent_request, {})
+
+
+def test_emf(set_color_intent_request):
+    app = _app()
+    app.handler(set_color_intent_request, {})
+    stream = io.StringIO()
+    app.metrics.export_emf(stream, namespace="MySkill")
+    record, = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert record["Intent"] == "MyColorIsIntent"
+    assert record["Requests"] == 1
+    directive, = record["_aws"]["CloudWatchMetrics"]
+    assert directive["Namespace"] == "MySkill"
+    for metric in directive["Metrics"]:
+        assert metric["Name"] in record
+    # Exporting resets by default
+    assert app.metrics.emf() == []
+
+
+def test_prometheus():
+    metrics = Metrics()
+    metrics.record('Say"Hi"', 0.001, 0.001, 0.001, 0.01, 0.001)
+    text = metrics.prometheus()
+    assert '# TYPE echokit_phase_duration_seconds histogram' in text
+    assert ('echokit_phase_duration_seconds_count'
+            '{intent="Say\\"Hi\\"",phase="handler"} 1') in text
+    assert ('echokit_phase_duration_seconds_bucket'
+            '{intent="Say\\"Hi\\"",phase="handler",le="+Inf"} 1') in text
+
+
+def test_overhead(set_color_intent_request):
+    """Timing each phase should add only a few microseconds per request"""
+    number = 2000
+    timings = {}
+    for metrics in (False, True):
+        app = _app(metrics=metrics)
+        timings[metrics] = min(timeit.repeat(
+            lambda: app.handler(set_color_intent_request, {}),
+            number=number, repeat=5
+        )) / number
+    assert timings[True] - timings[False] < 20e-6
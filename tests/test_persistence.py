@@ -0,0 +1,181 @@
+import copy
+import json
+import os
+import pytest
+import echokit
+from os import path
+from echokit.exc import ASKException
+from echokit.persistence import (MemoryBackend, SQLiteBackend, SessionStore,
+                                 user_id)
+
+
+@pytest.fixture
+def set_color_intent_request():
+    request_path = path.join(path.dirname(__file__), "requests",
+                             "set_color_intent.txt")
+    with open(request_path) as f:
+        return json.load(f)
+
+
+def _with_user(request, user, color="red"):
+    request = copy.deepcopy(request)
+    request["session"]["user"]["userId"] = user
+    request["request"]["intent"]["slots"]["color"]["value"] = color
+    return request
+
+
+def test_dirty_tracking():
+    backend = MemoryBackend()
+    backend.data["u1"] = {"a": 1, "b": 2}
+    store = SessionStore(backend, batch_size=1)
+    attributes = store.get("u1")
+    assert dict(attributes) == {"a": 1, "b": 2}
+    assert not attributes.dirty
+    attributes["a"] = 10
+    del attributes["b"]
+    assert attributes.dirty
+    assert attributes._take_changes() == ({"a": 10}, {"b"})
+    assert not attributes.dirty
+
+
+def test_batched_writes():
+    backend = MemoryBackend()
+    store = SessionStore(backend, batch_size=2, interval=None)
+    store.get("u1")["color"] = "red"
+    assert not store.commit()
+    store.get("u1")["size"] = 3
+    assert not store.commit()
+    store.get("u2")["color"] = "blue"
+    assert store.commit()
+    assert backend.writes == 1
+    assert backend.data == {"u1": {"color": "red", "size": 3},
+                            "u2": {"color": "blue"}}
+    assert not store.commit()
+
+
+def test_eviction_writes_changes():
+    backend = MemoryBackend()
+    store = SessionStore(backend, maxsize=1, batch_size=100, interval=None)
+    store.get("u1")["color"] = "red"
+    store.get("u2")
+    assert len(store) == 1
+    assert backend.data == {"u1": {"color": "red"}}
+    store.flush()
+    assert backend.writes == 1
+
+
+def test_concurrent_flush():
+    import threading
+    backend = MemoryBackend()
+    store = SessionStore(backend, batch_size=100, interval=None)
+    attributes = store.get("u1")
+    done = threading.Event()
+
+    def write(prefix):
+        for i in range(2000):
+            attributes[f"{prefix}{i}"] = i
+
+    def flush():
+        while not done.is_set():
+            store.flush()
+    flusher = threading.Thread(target=flush)
+    flusher.start()
+    writers = [threading.Thread(target=write, args=(prefix,))
+               for prefix in "abcd"]
+    for thread in writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    done.set()
+    flusher.join()
+    store.flush()
+    # No change recorded while a flush was taking them is lost
+    assert backend.data["u1"] == dict(attributes)
+    assert len(backend.data["u1"]) == 8000
+
+
+def test_flush_releases_lock():
+    import threading
+
+    class SlowBackend(MemoryBackend):
+        def write(self, changes):
+            # Another request changes attributes while the batch is
+            # being written
+            other = threading.Thread(target=store.get("u2").__setitem__,
+                                     args=("color", "blue"))
+            other.start()
+            other.join(1)
+            self.finished = not other.is_alive()
+            super().write(changes)
+
+    backend = SlowBackend()
+    store = SessionStore(backend, batch_size=100, interval=None)
+    store.get("u1")["color"] = "red"
+    store.flush()
+    assert backend.finished
+    store.flush()
+    assert backend.data == {"u1": {"color": "red"}, "u2": {"color": "blue"}}
+
+
+def test_lambda_interval():
+    import subprocess
+    import sys
+    code = ("from echokit.persistence import SessionStore, MemoryBackend;"
+            "print(SessionStore(MemoryBackend()).interval)")
+    root = path.dirname(path.dirname(path.abspath(__file__)))
+    env = dict(os.environ, AWS_LAMBDA_FUNCTION_NAME="skill")
+    output = subprocess.check_output([sys.executable, "-c", code], cwd=root,
+                                     env=env)
+    # Changes are written at the end of every invocation
+    assert float(output) == 0.0
+    env.pop("AWS_LAMBDA_FUNCTION_NAME")
+    output = subprocess.check_output([sys.executable, "-c", code], cwd=root,
+                                     env=env)
+    assert float(output) == 5.0
+
+
+def test_sqlite_backend(tmp_path):
+    database = str(tmp_path / "skill.db")
+    store = SessionStore(SQLiteBackend(database), batch_size=1)
+    store.get("u1")["cart"] = ["apple", {"qty": 2}]
+    store.get("u1")["gone"] = True
+    store.flush()
+    del store.get("u1")["gone"]
+    store.flush()
+    assert SQLiteBackend(database).load("u1") == {"cart": ["apple",
+                                                           {"qty": 2}]}
+    assert SQLiteBackend(database).load("u2") == {}
+    with pytest.raises(ASKException):
+        SQLiteBackend(database, table="bad name")
+
+
+def test_user_id(set_color_intent_request):
+    assert user_id(_with_user(set_color_intent_request, "u1")) == "u1"
+    assert user_id({"context": {"System": {"user": {"userId": "u2"}}}}) \
+        == "u2"
+    assert user_id({}) is None
+
+
+def test_app_persistent(set_color_intent_request):
+    backend = MemoryBackend()
+    app = echokit.EchoKit("", store=SessionStore(backend, batch_size=1))
+
+    @app.intent("MyColorIsIntent")
+    @app.slot("color")
+    def my_color_is(request, session, color):
+        previous = app.persistent.get("color", "nothing")
+        app.persistent["color"] = color
+        return app.response(f"It was {previous}")
+
+    first = app.handler(_with_user(set_color_intent_request, "u1"), {})
+    second = app.handler(_with_user(set_color_intent_request, "u1", "blue"),
+                         {})
+    assert first["response"]["outputSpeech"]["text"] == "It was nothing"
+    assert second["response"]["outputSpeech"]["text"] == "It was red"
+    assert backend.data == {"u1": {"color": "blue"}}
+    assert "color" not in second["sessionAttributes"]
+
+
+def test_no_store():
+    with pytest.raises(ASKException):
+        echokit.EchoKit("").persistent
@@ -0,0 +1,103 @@
+import json
+import pytest
+import echokit
+from os import path
+from echokit.exc import RequestRejected
+from echokit.prevalidate import Prevalidator, is_ping, PING_RESPONSE
+from echokit.router import Router
+from tests.test_server import _serve_and_post
+
+
+@pytest.fixture
+def set_color_intent_request():
+    request_path = path.join(path.dirname(__file__), "requests",
+                             "set_color_intent.txt")
+    with open(request_path) as f:
+        return json.load(f)
+
+
+def _handler(request, session):
+    pass
+
+
+@pytest.mark.parametrize("event, code", [
+    ({}, RequestRejected.MALFORMED),
+    ([], RequestRejected.MALFORMED),
+    ({"request": {"type": "IntentRequest"}}, RequestRejected.MALFORMED),
+    ({"request": {"type": 5}}, RequestRejected.MALFORMED),
+    ({"request": {"type": "LaunchRequest"}}, RequestRejected.APP_ID),
+    ({"request": {"type": "LaunchRequest"},
+      "session": {"application": {"applicationId": "other"}}},
+     RequestRejected.APP_ID),
+    ({"request": {"type": "IntentRequest", "intent": {"name": "Nope"}},
+      "session": {"application": {"applicationId": "skill"}}},
+     RequestRejected.UNHANDLED),
+])
+def test_rejections(event, code):
+    prevalidator = Prevalidator({"LaunchRequest": _handler}, "skill")
+    with pytest.raises(RequestRejected) as e:
+        prevalidator.check(event)
+    assert e.value.code == code
+
+
+def test_accepts(set_color_intent_request):
+    prevalidator = Prevalidator({"MyColorIsIntent": _handler}, "")
+    assert prevalidator.check(set_color_intent_request) == \
+        ("MyColorIsIntent", _handler)
+    # The same checks, in two steps (timed as separate phases)
+    assert prevalidator.verify(set_color_intent_request) == "MyColorIsIntent"
+    assert prevalidator.lookup("MyColorIsIntent") is _handler
+    with pytest.raises(RequestRejected):
+        prevalidator.lookup("Nope")
+    # Any application ID
+    set_color_intent_request["session"]["application"]["applicationId"] = "x"
+    assert Prevalidator({"MyColorIsIntent": _handler}).check(
+        set_color_intent_request)[0] == "MyColorIsIntent"
+
+
+def test_pings():
+    assert is_ping({"source": "aws.events", "detail-type": "Scheduled Event"})
+    assert is_ping({"source": "serverless-plugin-warmup"})
+    assert is_ping({"warmup": True})
+    assert not is_ping({"warmup": True, "request": {}})
+    assert not is_ping({"source": "aws.s3"})
+    assert not is_ping(None)
+
+
+def test_app_rejects_before_parsing(set_color_intent_request):
+    app = echokit.EchoKit("skill")
+    parsed = []
+    parse = app._parse
+    app._parse = lambda event: parsed.append(event) or parse(event)
+
+    @app.intent("MyColorIsIntent")
+    def my_color_is(request, session):
+        return app.response("Hi")
+
+    with pytest.raises(RequestRejected) as e:
+        app.handler(set_color_intent_request, {})
+    assert e.value.code == RequestRejected.APP_ID
+    assert parsed == []
+    assert app.handler({"source": "aws.events"}, {}) == PING_RESPONSE
+
+    # Rebuilt after registering another handler
+    set_color_intent_request["session"]["application"]["applicationId"] = \
+        "skill"
+    set_color_intent_request["request"]["intent"]["name"] = "OtherIntent"
+    with pytest.raises(RequestRejected):
+        app.handler(set_color_intent_request, {})
+    app.intent("OtherIntent")(my_color_is)
+    assert app.handler(set_color_intent_request, {})["response"]
+    assert len(parsed) == 1
+
+
+def test_router_and_server(set_color_intent_request):
+    app = echokit.EchoKit("")
+    router = Router(app)
+    assert router.handler({"warmup": True}, None) == PING_RESPONSE
+    assert router.rejected == 0
+    results = _serve_and_post(app, [{"warmup": True},
+                                    set_color_intent_request])
+    assert results[0] == (200, PING_RESPONSE)
+    assert results[1][0] == 400
+    assert results[1][1]["code"] == RequestRejected.UNHANDLED
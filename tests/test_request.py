@@ -0,0 +1,110 @@
+import pytest
+import json
+from os import path
+from echokit.request import ASKRequest, LazyASKRequest, Envelope, \
+    IntentRequest, Request, Slot
+
+
+@pytest.fixture(scope="module")
+def multi_slot_intent_request():
+    request_path = path.join(path.dirname(__file__), "requests",
+                             "multi_slot_intent.txt")
+    with open(request_path) as f:
+        return json.load(f)
+
+
+def test_eager_wraps_nested(multi_slot_intent_request):
+    event = ASKRequest(**multi_slot_intent_request)
+    assert isinstance(dict.__getitem__(event, "request"), ASKRequest)
+
+
+def test_lazy_defers_nested(multi_slot_intent_request):
+    event = LazyASKRequest(**multi_slot_intent_request)
+    assert type(dict.__getitem__(event, "context")) is dict
+    assert type(dict.__getitem__(event, "request")) is dict
+
+
+def test_lazy_dot_access(multi_slot_intent_request):
+    event = LazyASKRequest(**multi_slot_intent_request)
+    assert event.request.type == "IntentRequest"
+    assert event.request.intent.name == "AnimalColorIntent"
+    assert event.request.intent.slots["FirstColor"].value == "red"
+    assert event.session.application.applicationId == ""
+    assert event.does_not_exist is None
+
+
+def test_lazy_caches_wrapper(multi_slot_intent_request):
+    event = LazyASKRequest(**multi_slot_intent_request)
+    request = event.request
+    assert isinstance(request, LazyASKRequest)
+    assert event.request is request
+    assert event["request"] is request
+
+
+def test_lazy_dict_matches_eager(multi_slot_intent_request):
+    raw = dict(multi_slot_intent_request, extra={"a": None, "b": {"c": None}})
+    eager = ASKRequest(**raw)
+    lazy = LazyASKRequest(**raw)
+    # Touch part of the tree so the result mixes wrapped/unwrapped objects
+    assert lazy.request.intent.name == "AnimalColorIntent"
+    assert lazy._dict() == eager._dict()
+    assert lazy._dict()["extra"] == {"b": {}}
+
+
+class TestEnvelope:
+    def test_dispatch_fields(self, multi_slot_intent_request):
+        event = Envelope(multi_slot_intent_request)
+        assert isinstance(event.request, IntentRequest)
+        assert event.request.type == "IntentRequest"
+        assert event.request.intent.name == "AnimalColorIntent"
+        assert event.session.application.applicationId == ""
+
+    def test_slots(self, multi_slot_intent_request):
+        slots = Envelope(multi_slot_intent_request).request.intent.slots
+        assert isinstance(slots["SecondColor"], Slot)
+        assert slots["SecondColor"].name == "SecondColor"
+        assert slots["SecondColor"].value == "purple"
+        # Dot notation, and _dict() as with ASKRequest
+        assert slots.FirstColor.value == "red"
+        assert slots.NotASlot is None
+        assert slots._dict() == \
+            multi_slot_intent_request["request"]["intent"]["slots"]
+        assert sorted(slots) == sorted(name for name, _ in slots.items())
+        assert slots.get("NotASlot") is None
+
+    def test_no_copy(self, multi_slot_intent_request):
+        event = Envelope(multi_slot_intent_request)
+        assert event.request._raw is multi_slot_intent_request["request"]
+
+    def test_unknown_fields(self, multi_slot_intent_request):
+        event = Envelope(multi_slot_intent_request)
+        assert event.context.System.user.userId == ""
+        assert event.request.dialogState is None
+        assert event["version"] == "1.0"
+        with pytest.raises(KeyError):
+            event["not_a_field"]
+
+    def test_nested_changes_kept(self, multi_slot_intent_request):
+        import copy
+        original = copy.deepcopy(multi_slot_intent_request)
+        event = Envelope(multi_slot_intent_request)
+        event.context.System.user.userId = "changed"
+        assert event.context is event.context
+        assert event.context.System.user.userId == "changed"
+        assert event._dict()["context"]["System"]["user"]["userId"] == \
+            "changed"
+        # The incoming event is left as it was
+        assert multi_slot_intent_request == original
+
+    def test_slots_only(self):
+        with pytest.raises(AttributeError):
+            Envelope({}).unknown_field = 1
+
+    def test_launch_request(self):
+        event = Envelope({"request": {"type": "LaunchRequest"}})
+        assert type(event.request) is Request
+        assert event.session.application.applicationId is None
+
+    def test_dict(self, multi_slot_intent_request):
+        event = Envelope(multi_slot_intent_request)
+        assert event._dict() == ASKRequest(**multi_slot_intent_request)._dict()
@@ -0,0 +1,100 @@
+import copy
+import json
+import pytest
+import echokit
+from os import path
+from echokit.exc import ASKException
+from echokit.router import Router, application_id
+from tests.test_server import _serve_and_post
+
+
+@pytest.fixture
+def set_color_intent_request():
+    request_path = path.join(path.dirname(__file__), "requests",
+                             "set_color_intent.txt")
+    with open(request_path) as f:
+        return json.load(f)
+
+
+def _app(app_id):
+    app = echokit.EchoKit(app_id)
+
+    @app.intent("MyColorIsIntent")
+    def my_color_is(request, session):
+        return app.response(f"Hello from {app_id}")
+    return app
+
+
+def _for(request, app_id):
+    request = copy.deepcopy(request)
+    request["session"]["application"]["applicationId"] = app_id
+    request["context"]["System"]["application"]["applicationId"] = app_id
+    return request
+
+
+@pytest.fixture
+def router():
+    return Router(_app("skill-a"), _app("skill-b"))
+
+
+def test_routes_by_app_id(router, set_color_intent_request):
+    for app_id in ("skill-a", "skill-b", "skill-a"):
+        response = router.handler(_for(set_color_intent_request, app_id), {})
+        assert response["response"]["outputSpeech"]["text"] == \
+            f"Hello from {app_id}"
+    assert router.counts == {"skill-a": 2, "skill-b": 1}
+    assert router.metrics()["skill-a"].histogram(
+        "MyColorIsIntent", "handler").count == 2
+
+
+def test_rejects_unknown_before_parsing(router):
+    # Nothing but the application ID is read from the event
+    event = {"session": {"application": {"applicationId": "other"}},
+             "request": None}
+    with pytest.raises(ASKException):
+        router.handler(event, {})
+    with pytest.raises(ASKException):
+        router.handler({}, {})
+    assert router.rejected == 2
+
+
+def test_duplicate_app_id(router, set_color_intent_request):
+    with pytest.raises(ASKException):
+        router.add(_app("skill-a"))
+    app = _app("skill-c")
+    router.add(app, "skill-c", "skill-c-beta")
+    assert router.apps["skill-c-beta"] is app
+    # Events for the alias are answered by the app
+    for app_id in ("skill-c-beta", "skill-c"):
+        response = router.handler(_for(set_color_intent_request, app_id), {})
+        assert response["response"]["outputSpeech"]["text"] == \
+            "Hello from skill-c"
+    assert router.counts["skill-c-beta"] == 1
+    # Aliases are only accepted by the app they're routed to
+    with pytest.raises(ASKException):
+        router.apps["skill-a"].handler(
+            _for(set_color_intent_request, "skill-c-beta"), {})
+
+
+def test_application_id_without_session():
+    event = {"context": {"System": {"application": {"applicationId": "x"}}}}
+    assert application_id(event) == "x"
+
+
+def test_prometheus(router, set_color_intent_request):
+    router.handler(_for(set_color_intent_request, "skill-a"), {})
+    text = router.prometheus()
+    assert text.count("# TYPE") == 1
+    assert 'app="skill-a",intent="MyColorIsIntent"' in text
+    assert 'app="skill-b",intent' not in text
+
+
+def test_server(router, set_color_intent_request):
+    results = _serve_and_post(router, [
+        _for(set_color_intent_request, "skill-b"),
+        _for(set_color_intent_request, "unknown"),
+    ])
+    assert results[0][0] == 200
+    assert results[0][1]["response"]["outputSpeech"]["text"] == \
+        "Hello from skill-b"
+    assert results[1][0] == 400
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import pytest
+import echokit
+from os import path
+from echokit.server import Server, _parse_head, _keep_alive
+
+
+@pytest.fixture(scope="module")
+def set_color_intent_request():
+    request_path = path.join(path.dirname(__file__), "requests",
+                             "set_color_intent.txt")
+    with open(request_path) as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def app():
+    app = echokit.EchoKit("")
+
+    @app.intent("MyColorIsIntent")
+    @app.slot("color")
+    def my_color_is(request, session, color):
+        return app.response(f"Your color is {color}")
+
+    @app.intent("WhatsMyColorIntent")
+    async def whats_my_color(request, session):
+        await asyncio.sleep(0)
+        return app.response("Async")
+    return app
+
+
+async def _post(port, payloads):
+    """Send each payload over one keep-alive connection"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    results = []
+    for payload in payloads:
+        body = payload if isinstance(payload, bytes) else \
+            json.dumps(payload).encode()
+        writer.write(f"POST / HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n"
+                     .encode() + body)
+        head = await reader.readuntil(b"\r\n\r\n")
+        _, _, headers = _parse_head(head)
+        status = int(head.split(b" ")[1])
+        body = await reader.readexactly(int(headers["content-length"]))
+        results.append((status, json.loads(body)))
+    writer.close()
+    return results
+
+
+def _serve_and_post(app, payloads):
+    async def main():
+        server = Server(app, port=0)
+        sock = server.bind()
+        task = asyncio.ensure_future(server.serve(sock))
+        try:
+            return await _post(server.port, payloads)
+        finally:
+            task.cancel()
+    return asyncio.run(main())
+
+
+def test_keep_alive_dispatch(app, set_color_intent_request):
+    whats_my_color = json.loads(json.dumps(set_color_intent_request))
+    whats_my_color["request"]["intent"]["name"] = "WhatsMyColorIntent"
+    results = _serve_and_post(app, [set_color_intent_request, whats_my_color,
+                                    set_color_intent_request])
+    assert [status for status, _ in results] == [200, 200, 200]
+    speech = [r["response"]["outputSpeech"]["text"] for _, r in results]
+    assert speech == ["Your color is red", "Async", "Your color is red"]
+
+
+def test_errors(app, set_color_intent_request):
+    unhandled = json.loads(json.dumps(set_color_intent_request))
+    unhandled["request"]["intent"]["name"] = "NotAnIntent"
+    results = _serve_and_post(app, [b"{not json", unhandled])
+    assert results[0][0] == 400
+    assert results[1][0] == 400
+    assert "NotAnIntent" in results[1][1]["error"]
+
+
+@pytest.mark.parametrize("length", ["-1", "abc", "1_0", "+5"])
+def test_invalid_content_length(app, length):
+    async def main():
+        server = Server(app, port=0)
+        task = asyncio.ensure_future(server.serve(server.bind()))
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1",
+                                                           server.port)
+            writer.write(f"POST / HTTP/1.1\r\nConnection: close\r\n"
+                         f"Content-Length: {length}\r\n\r\n".encode())
+            response = await reader.read()
+            writer.close()
+            return response
+        finally:
+            task.cancel()
+    response = asyncio.run(main())
+    assert response.startswith(b"HTTP/1.1 400 ")
+
+
+def test_keep_alive_headers():
+    assert _keep_alive("HTTP/1.1", {})
+    assert not _keep_alive("HTTP/1.1", {"connection": "close"})
+    assert not _keep_alive("HTTP/1.0", {})
+    assert _keep_alive("HTTP/1.0", {"connection": "keep-alive"})
@@ -0,0 +1,148 @@
+import datetime
+import enum as enum_
+import json
+import pytest
+import echokit
+from os import path
+from echokit.slots import SlotSpec, date, duration, enum, integer
+
+
+@pytest.fixture
+def multi_slot_intent_request():
+    request_path = path.join(path.dirname(__file__), "requests",
+                             "multi_slot_intent.txt")
+    with open(request_path) as f:
+        return json.load(f)
+
+
+def _slots(request):
+    return request["request"]["intent"]["slots"]
+
+
+def _dispatch(request, *args, typed=True, **types):
+    app = echokit.EchoKit("", typed=typed)
+    received = {}
+
+    @app.intent("AnimalColorIntent")
+    @app.slot(*args, **types)
+    def handler(request, session, **kwargs):
+        received.update(kwargs)
+        return app.response("")
+
+    app.handler(request, {})
+    return received
+
+
+@pytest.mark.parametrize("typed", [True, False])
+def test_plain_slots(multi_slot_intent_request, typed):
+    received = _dispatch(multi_slot_intent_request, "FirstColor",
+                         "SecondColor", typed=typed)
+    assert received == {"FirstColor": "red", "SecondColor": "purple"}
+
+
+def test_missing_slot_default(multi_slot_intent_request):
+    received = _dispatch(multi_slot_intent_request, "FirstColor",
+                         Count=SlotSpec(integer, default=0))
+    assert received == {"FirstColor": "red", "Count": 0}
+
+
+def test_shared_spec(multi_slot_intent_request):
+    canonical = SlotSpec(canonical=True)
+    app = echokit.EchoKit("")
+    received = {}
+
+    @app.intent("AnimalColorIntent")
+    @app.slot(FirstColor=canonical)
+    def first(request, session, FirstColor):
+        received["first"] = FirstColor
+        return app.response("")
+
+    # The same spec for another slot, decorated later
+    @app.intent("OtherIntent")
+    @app.slot(SecondColor=canonical)
+    def second(request, session, SecondColor):
+        return app.response("")
+
+    app.handler(multi_slot_intent_request, {})
+    assert received == {"first": "red"}
+
+
+def test_no_slots(multi_slot_intent_request):
+    del multi_slot_intent_request["request"]["intent"]["slots"]
+    assert _dispatch(multi_slot_intent_request, "FirstColor") == \
+        {"FirstColor": None}
+
+
+def test_conversion(multi_slot_intent_request):
+    _slots(multi_slot_intent_request).update({
+        "Guests": {"name": "Guests", "value": "4"},
+        "Day": {"name": "Day", "value": "2017-10-08"},
+        "Length": {"name": "Length", "value": "PT1H30M"},
+        "Bad": {"name": "Bad", "value": "?"},
+    })
+    received = _dispatch(multi_slot_intent_request, Guests=integer, Day=date,
+                         Length=duration, Bad=SlotSpec(integer, default=-1))
+    assert received == {"Guests": 4, "Day": datetime.date(2017, 10, 8),
+                        "Length": datetime.timedelta(hours=1, minutes=30),
+                        "Bad": -1}
+
+
+@pytest.mark.parametrize("typed", [True, False])
+def test_canonical(multi_slot_intent_request, typed):
+    _slots(multi_slot_intent_request)["FirstColor"]["resolutions"] = {
+        "resolutionsPerAuthority": [
+            {"status": {"code": "ER_SUCCESS_NO_MATCH"}, "values": []},
+            {"status": {"code": "ER_SUCCESS_MATCH"},
+             "values": [{"value": {"name": "Crimson", "id": "crimson"}}]},
+        ]
+    }
+    received = _dispatch(multi_slot_intent_request, typed=typed,
+                         FirstColor=SlotSpec(canonical=True),
+                         SecondColor=SlotSpec(canonical=True))
+    assert received == {"FirstColor": "Crimson", "SecondColor": "purple"}
+
+
+def test_memoized():
+    calls = []
+
+    def convert(value):
+        calls.append(value)
+        return value.upper()
+
+    spec = SlotSpec(convert)
+    for _ in range(3):
+        assert spec.extract({"value": "red"}) == "RED"
+    assert calls == ["red"]
+
+
+class TestTypes:
+    def test_date(self):
+        assert date("2017-10") == datetime.date(2017, 10, 1)
+        assert date("2017") == datetime.date(2017, 1, 1)
+        assert date("2017-W41") == datetime.date(2017, 10, 9)
+        assert date("2017-W41-WE") == datetime.date(2017, 10, 14)
+        with pytest.raises(ValueError):
+            date("201X")
+
+    def test_duration(self):
+        assert duration("P2D") == datetime.timedelta(days=2)
+        assert duration("P1W") == datetime.timedelta(weeks=1)
+        assert duration("PT0.5S") == datetime.timedelta(seconds=0.5)
+        for value in ("P", "PT", "10M", "P1H"):
+            with pytest.raises(ValueError):
+                duration(value)
+
+    def test_enum_values(self):
+        convert = enum("Single", "Double")
+        assert convert("double") == "Double"
+        with pytest.raises(ValueError):
+            convert("triple")
+
+    def test_enum_class(self):
+        class Room(enum_.Enum):
+            SINGLE = "single room"
+            DOUBLE = "double room"
+
+        convert = enum(Room)
+        assert convert("Double Room") is Room.DOUBLE
+        assert convert("single") is Room.SINGLE
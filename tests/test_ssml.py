@@ -0,0 +1,94 @@
+import pytest
+from echokit.exc import ASKException
+from echokit.response import Response
+from echokit.ssml import SSML, validate
+
+
+def test_build():
+    speech = SSML().text("Hello").pause("500ms").say_as("3", "ordinal")
+    assert speech.build() == ('<speak>Hello<break time="500ms"/>'
+                              '<say-as interpret-as="ordinal">3</say-as>'
+                              '</speak>')
+    assert str(speech) == speech.build()
+
+
+def test_text_escaped():
+    speech = SSML("Tom & <Jerry>").emphasis('"quoted"', "strong")
+    assert speech.fragment == ('Tom &amp; &lt;Jerry&gt;<emphasis level="strong">'
+                               '&quot;quoted&quot;</emphasis>')
+
+
+def test_nested():
+    inner = SSML().text("fast").pause(strength="weak")
+    speech = SSML().prosody(inner, rate="150%", volume="+6dB")
+    assert speech.fragment == ('<prosody rate="150%" volume="+6dB">fast'
+                               '<break strength="weak"/></prosody>')
+
+
+def test_fragment_cached():
+    speech = SSML("Hi")
+    assert speech.fragment is speech.fragment
+    speech.text(" there")
+    assert speech.fragment == "Hi there"
+
+
+def test_elements():
+    speech = (SSML().audio("https://example.com/a.mp3")
+              .sub("Al", "aluminum")
+              .phoneme("pecan", "pɪˈkɑːn")
+              .lang("bonjour", "fr-FR")
+              .voice("hi", "Kendra")
+              .effect("secret")
+              .paragraph("P")
+              .sentence("S"))
+    validate(speech.build())
+
+
+@pytest.mark.parametrize("build", [
+    lambda: SSML().pause("11s"),
+    lambda: SSML().pause("soon"),
+    lambda: SSML().pause(strength="loud"),
+    lambda: SSML().audio("http://example.com/a.mp3"),
+    lambda: SSML().say_as("3", "roman"),
+    lambda: SSML().emphasis("a", "extreme"),
+    lambda: SSML().prosody("a", rate="10%"),
+    lambda: SSML().prosody("a", pitch="+80%"),
+    lambda: SSML().prosody("a", volume="11"),
+    lambda: SSML().prosody("a"),
+    lambda: SSML().phoneme("a", "a", alphabet="klingon"),
+    lambda: SSML().effect("a", "shouted"),
+])
+def test_invalid(build):
+    with pytest.raises(ASKException):
+        build()
+
+
+@pytest.mark.parametrize("markup", [
+    "Hello",
+    "<speak>Hello",
+    "<speak>Hi</speak><speak>again</speak>",
+    "<speak><blink>Hi</blink></speak>",
+])
+def test_validate_invalid(markup):
+    with pytest.raises(ASKException):
+        validate(markup)
+
+
+def test_validate():
+    validate('<speak>Hi <amazon:effect name="whispered">there</amazon:effect>'
+             '</speak>')
+
+
+def test_response():
+    speech = SSML("Hello")
+    response = Response(speech).reprompt(SSML("Again?"))
+    body = response._dict["response"]
+    assert body["outputSpeech"] == {"type": "SSML",
+                                    "ssml": "<speak>Hello</speak>"}
+    assert body["reprompt"]["outputSpeech"] == {
+        "type": "SSML", "ssml": "<speak>Again?</speak>"}
+
+
+def test_invalid_speech_type():
+    with pytest.raises(ASKException):
+        Response("Hi", speech_type="Markdown")
@@ -0,0 +1,116 @@
+import json
+import pytest
+import echokit
+from os import path
+from echokit.exc import ASKException
+from echokit.response import Response
+from echokit.template import ResponseTemplate
+
+
+def test_matches_builder():
+    template = ResponseTemplate(
+        "Your favorite color is {color}", reprompt="What's your color?",
+        card={"type": "Simple", "title": "Color", "content": "{color}"},
+        end_session=False
+    )
+    rendered = template.render(color="red")
+    built = Response("Your favorite color is red") \
+        .reprompt("What's your color?").simple_card("Color", "red")
+    built.end_session = False
+    assert rendered._dict == built._dict
+
+
+def test_standard_card():
+    template = ResponseTemplate("Hi", card={
+        "type": "Standard", "title": "{title}", "text": "Body",
+        "image": {"smallImageUrl": "https://example.com/{name}.png"}
+    })
+    card = template.render(title="T", name="small")._dict["response"]["card"]
+    assert card == {"type": "Standard", "title": "T", "text": "Body",
+                    "image": {"smallImageUrl": "https://example.com/small.png"}}
+
+
+def test_constant_fragments_shared():
+    template = ResponseTemplate("Hi {name}", reprompt="Say something")
+    first = template.render(name="a")._dict["response"]
+    second = template.render(name="b")._dict["response"]
+    assert first["reprompt"] is second["reprompt"]
+    assert first["outputSpeech"]["text"] == "Hi a"
+    assert second["outputSpeech"]["text"] == "Hi b"
+    assert first is not second
+
+
+def test_modifying_rendered_response():
+    template = ResponseTemplate("Goodbye")
+    first = template.render()
+    first.end_session = False
+    first.reprompt("Still there?").simple_card("Title", "Content")
+    second = template.render()
+    assert second._dict["response"] == {
+        "shouldEndSession": True,
+        "outputSpeech": {"type": "PlainText", "text": "Goodbye"},
+    }
+
+
+def test_ssml_values_escaped():
+    template = ResponseTemplate("<speak>Hello {name}</speak>",
+                                speech_type="SSML")
+    speech = template.render(name="Tom & <Jerry>")._dict["response"]
+    assert speech["outputSpeech"]["ssml"] == \
+        "<speak>Hello Tom &amp; &lt;Jerry&gt;</speak>"
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"speech": "Hi {}"},
+    {"speech": "Hi {0}"},
+    {"speech": "Hi {user.name}"},
+    {"speech": "Hi {name!r}"},
+    {"speech": "Hi {name:>10}"},
+    {"speech": "Hi {name"},
+    {"speech": "Hi {session_attributes}"},
+    {"speech": "Hi", "speech_type": "Markdown"},
+    {"speech": "<speak>Hi {name}", "speech_type": "SSML"},
+    {"speech": "Hi {name}", "speech_type": "SSML"},
+    {"speech": "<speak><blink>{name}</blink></speak>",
+     "speech_type": "SSML"},
+    {"speech": "Hi", "reprompt": "<speak>Hi<break></speak>",
+     "reprompt_type": "SSML"},
+    {"speech": "Hi", "card": {"type": "Fancy"}},
+    {"speech": "Hi", "card": {"type": "Simple", "title": "T"}},
+    {"speech": "Hi", "card": {"type": "LinkAccount", "title": "T"}},
+])
+def test_invalid_templates(kwargs):
+    with pytest.raises(ASKException):
+        ResponseTemplate(**kwargs)
+
+
+def test_missing_value():
+    with pytest.raises(ASKException):
+        ResponseTemplate("Hi {name}").render()
+
+
+def test_app_render():
+    request_path = path.join(path.dirname(__file__), "requests",
+                             "set_color_intent.txt")
+    with open(request_path) as f:
+        request = json.load(f)
+    request["session"]["attributes"] = {"visits": 1}
+    app = echokit.EchoKit("")
+    template = ResponseTemplate("Your color is {color}", end_session=False)
+
+    @app.intent("MyColorIsIntent")
+    @app.slot("color")
+    def my_color_is(request, session, color):
+        return app.render(template, color=color)
+
+    response = app.handler(request, {})
+    assert response["response"]["outputSpeech"]["text"] == "Your color is red"
+    assert response["response"]["shouldEndSession"] is False
+    assert response["sessionAttributes"] == {"visits": 1}
+
+
+def test_escaped_braces():
+    template = ResponseTemplate("Say {{hi}} {name}", reprompt="{{constant}}")
+    body = template.render(name="Bob")._dict["response"]
+    assert body["outputSpeech"]["text"] == "Say {hi} Bob"
+    assert body["reprompt"]["outputSpeech"]["text"] == "{constant}"